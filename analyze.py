@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+import os
+import re
+import csv
+import sys
+import json
+import argparse
+from time import perf_counter
+
+# Este script sólo importa la librería estándar al arrancar: pandas, scipy y
+# matplotlib se cargan dentro de cada subcomando que los necesita, así una
+# consulta rápida (stats sobre un .summary.json) no paga la pila científica
+
+# Extensiones de las salidas pre-procesadas que se aceptan como corrida
+RUN_EXT = re.compile(r'[.](?:csv(?:[.](?:gz|zst|xz))?|parquet|feather)$', re.IGNORECASE)
+
+# Tiempo acumulado en importaciones diferidas (ver --timing)
+_import_seconds = 0.0
+
+def lazy(module: str, *names: str):
+    """
+    Importa `module` (y devuelve sus atributos `names`, si se indican)
+    contabilizando el tiempo para --timing.
+    """
+    global _import_seconds
+    start = perf_counter()
+    mod = __import__(module, fromlist=list(names) or ['__name__'])
+    _import_seconds += perf_counter() - start
+    values = [getattr(mod, name) for name in names]
+    return values[0] if len(values) == 1 else (values or mod)
+
+def find_runs(paths: list):
+    """
+    Expande la lista de archivos y carpetas (p. ej. una carpeta *_csv o su
+    merge/) en corridas (directory, name), una por nombre aunque exista en
+    varios formatos.
+    """
+    runs = {}
+    for path in paths:
+        if os.path.isdir(path):
+            files = [os.path.join(path, f) for f in sorted(os.listdir(path))]
+        elif os.path.isfile(path):
+            files = [path]
+        else:
+            raise FileNotFoundError(f"No existe: {path}")
+        for file in files:
+            if RUN_EXT.search(file) and os.path.isfile(file):
+                directory, filename = os.path.split(file)
+                runs.setdefault((directory + os.sep, RUN_EXT.sub('', filename)), None)
+    return list(runs)
+
+def run_metadata(name: str):
+    """
+    Distancia y MSPs de una corrida por su nombre; también entiende los
+    nombres de merge/ ({freq}-{distance} o {distance}-{msps}).
+    """
+    parse_name = lazy('src.catalog', 'parse_name')
+    if meta := parse_name(name + '.csv'):
+        return meta
+    # La distancia lleva 'm' minúscula y los MSPs 'M' o 'MSPs' ('8M-21m',
+    # '2MSPs-120m', '120m-4msps'); sin distinguir mayúsculas, '8M' sería la distancia
+    distance = re.search(r'(?<![A-Za-z0-9])(\d+)m(?![A-Za-z])', name)
+    msps = re.search(r'(?<![A-Za-z0-9])(\d+)(?:M|(?i:msps))(?![A-Za-z0-9])', name)
+    return {
+        'distancia': float(distance.group(1)) if distance else None,
+        'msps': int(msps.group(1)) if msps else None,
+        'sf': None,
+        'bw_khz': None,
+        'version': None,
+    }
+
+def load_runs(runs: list):
+    """
+    Carga y concatena las corridas, con las columnas prueba, distancia, msps,
+    sf y bw_khz añadidas.
+    """
+    pd = lazy('pandas')
+    load_csv = lazy('src.data_processes', 'load_csv')
+    frames = []
+    for directory, name in runs:
+        meta = run_metadata(name)
+        df = load_csv(directory, name, muestras=meta['msps'])
+        for col in ('distancia', 'msps', 'sf', 'bw_khz'):
+            df[col] = meta[col]
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True)
+
+def cmd_stats(args, runs):
+    RunSummary, summary_path = lazy('src.summaries', 'RunSummary', 'summary_path')
+    paths = [summary_path(f'{directory}{name}.csv') for directory, name in runs]
+    summaries = [not args.no_summary and os.path.isfile(path) for path in paths]
+    if all(summaries):
+        # Sólo resúmenes en línea (--summary): ni se leen los CSV ni se importa pandas
+        return [{'prueba': name, **RunSummary.load(path).packet_stats()} for (_, name), path in zip(runs, paths)]
+
+    pd = lazy('pandas')
+    stats_paquetes = lazy('src.data_analyses', 'stats_paquetes')
+    rows = []
+    for run, path, summary in zip(runs, paths, summaries):
+        table = stats_paquetes(RunSummary.load(path) if summary else load_runs([run]))
+        rows.append(table.assign(prueba=run[1]).set_index('prueba'))
+    return pd.concat(rows)
+
+def cmd_describe(args, runs):
+    describir_metricas = lazy('src.data_analyses', 'describir_metricas')
+    load_summary = lazy('src.data_processes', 'load_summary')
+    summary_path = lazy('src.summaries', 'summary_path')
+    if not args.no_summary and all(os.path.isfile(summary_path(f'{d}{n}.csv')) for d, n in runs) and len({d for d, _ in runs}) == 1:
+        # Cuartiles aproximados (sketch del resumen)
+        return describir_metricas(load_summary(runs[0][0], [n for _, n in runs]))
+    return describir_metricas(load_runs(runs))
+
+def cmd_compare(args, runs):
+    comparar_metricas = lazy('src.data_analyses', 'comparar_metricas')
+    df = load_runs(runs)
+    return comparar_metricas(df, args.metrics.split(','), args.by, args.strata.split(',') if args.strata else None, args.workers)
+
+def cmd_plot(args, runs):
+    pd = lazy('pandas')
+    render_batch = lazy('src.data_visualizations', 'render_batch')
+    df = load_runs(runs)
+    kwargs = {
+        'metricas': {'metricas': args.metrics.split(','), 'columna_grupo': args.by},
+        'propagacion': {'metrica': args.metric},
+    }.get(args.kind, {})
+    estados = render_batch([(df, args.kind, args.output, kwargs)], workers=1)
+    return pd.DataFrame({'grafico': [args.kind], 'salida': [args.output], 'estado': estados})
+
+def cmd_fit(args, runs):
+    ajustar_modelos_propagacion = lazy('src.data_analyses', 'ajustar_modelos_propagacion')
+    df = load_runs(runs)
+    por = [col for col in args.by.split(',') if col and df[col].notna().any()] if args.by else []
+    return ajustar_modelos_propagacion(df, por or ['msps'], args.metric, args.bootstrap, args.level, args.seed)
+
+def cmd_join(args, runs):
+    cruzar_receptores = lazy('src.data_joins', 'cruzar_receptores')
+    by_dialect = {}
+    for run in runs:
+        by_dialect.setdefault(run_metadata(run[1]).get('dialecto'), []).append(run)
+    if not by_dialect.get('gnuradio') or not by_dialect.get('neisser'):
+        raise SystemExit("join: hacen falta corridas de GNU Radio y de Neisser (p. ej. data/prueba_2/03-04-2025_csv data/prueba_2/Neisser_03-04-2025_csv)")
+    joined, summary = cruzar_receptores(load_runs(by_dialect['gnuradio']), load_runs(by_dialect['neisser']),
+                                        solo_emparejados=args.matched_only)
+    if args.output:
+        joined.to_csv(args.output, index=False)
+    return summary
+
+COMMANDS = {
+    'stats': cmd_stats,
+    'describe': cmd_describe,
+    'compare': cmd_compare,
+    'plot': cmd_plot,
+    'fit': cmd_fit,
+    'join': cmd_join,
+}
+
+def print_table(table, fmt: str):
+    if isinstance(table, list):
+        return print_rows(table, fmt)
+    if fmt == 'csv':
+        table.to_csv(sys.stdout)
+    elif fmt == 'json':
+        print(table.to_json(orient='table', indent=2))
+    else:
+        print(table.to_string())
+
+def print_rows(rows: list, fmt: str):
+    # Igual que print_table, para las filas (diccionarios) de los caminos sin pandas
+    columns = list(dict.fromkeys(key for row in rows for key in row))
+    if fmt == 'csv':
+        writer = csv.DictWriter(sys.stdout, columns)
+        writer.writeheader()
+        writer.writerows(rows)
+    elif fmt == 'json':
+        print(json.dumps(rows, indent=2))
+    else:
+        text = [[f'{row[col]:.6f}' if isinstance(row.get(col), float) else str(row.get(col, '')) for col in columns] for row in rows]
+        widths = [max(len(col), *(len(r[i]) for r in text)) for i, col in enumerate(columns)]
+        print('  '.join(col.rjust(w) for col, w in zip(columns, widths)))
+        for r in text:
+            print('  '.join(value.rjust(w) for value, w in zip(r, widths)))
+
+def main():
+    start = perf_counter()
+    parser = argparse.ArgumentParser(description="Análisis rápido de corridas pre-procesadas (CSV, merge/, parquet o feather)")
+    parser.add_argument("--format", choices=('table', 'csv', 'json'), default='table',
+                        help="Formato de salida de la tabla (por defecto: table)")
+    parser.add_argument("--timing", action='store_true', default=False,
+                        help="Muestra por stderr el tiempo de importación de dependencias y el total")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def add(name, help):
+        sub = subparsers.add_parser(name, help=help)
+        sub.add_argument("paths", nargs='+', help="Archivos de corrida o carpetas (p. ej. data/prueba_4/26-06-2025_csv/merge)")
+        return sub
+
+    sub = add('stats', "Paquetes totales, CRC y overflows por corrida (usa .summary.json si existe)")
+    sub.add_argument("--no-summary", action='store_true', default=False, help="Ignora los resúmenes y lee los CSV")
+    sub = add('describe', "Estadísticos descriptivos de las métricas numéricas")
+    sub.add_argument("--no-summary", action='store_true', default=False, help="Ignora los resúmenes y lee los CSV")
+    sub = add('compare', "Compara métricas entre niveles de un factor (ANOVA / Welch / Kruskal-Wallis)")
+    sub.add_argument("--metrics", default="sto,cfo,snr", help="Métricas separadas por comas (por defecto: sto,cfo,snr)")
+    sub.add_argument("--by", default="distancia", help="Factor a comparar (por defecto: distancia)")
+    sub.add_argument("--strata", default=None, help="Columnas de estratificación separadas por comas (p. ej. msps)")
+    sub.add_argument("--workers", type=int, default=1, help="Número de procesos (por defecto: 1)")
+    sub = add('plot', "Renderiza un gráfico (se omite si los datos no cambiaron)")
+    sub.add_argument("--kind", choices=('histograma', 'correlacion', 'metricas', 'propagacion'), default='histograma',
+                     help="Tipo de gráfico (por defecto: histograma)")
+    sub.add_argument("--metrics", default="sto,cfo,snr", help="Métricas del gráfico 'metricas'")
+    sub.add_argument("--by", default="distancia", help="Columna de agrupación del gráfico 'metricas'")
+    sub.add_argument("--metric", default="rssi (dBm)", help="Métrica del gráfico 'propagacion' (por defecto: 'rssi (dBm)')")
+    sub.add_argument("--output", default="output", help="Carpeta de salida (por defecto: output)")
+    sub = add('fit', "Ajusta el modelo de propagación log-distancia por grupo, con intervalos bootstrap")
+    sub.add_argument("--metric", default="rssi (dBm)", help="Métrica a modelar (por defecto: 'rssi (dBm)')")
+    sub.add_argument("--by", default="msps,sf,bw_khz", help="Columnas de agrupación (por defecto: msps,sf,bw_khz)")
+    sub.add_argument("--bootstrap", type=int, default=1000, help="Número de remuestreos (por defecto: 1000)")
+    sub.add_argument("--level", type=float, default=0.95, help="Nivel de confianza (por defecto: 0.95)")
+    sub.add_argument("--seed", type=int, default=0, help="Semilla (por defecto: 0)")
+
+    sub = add('join', "Une los registros de GNU Radio y Neisser por (distancia, MSPs, numero) y cuenta los emparejados")
+    sub.add_argument("--output", default=None, help="Escribe el conjunto unido en este CSV")
+    sub.add_argument("--matched-only", action='store_true', default=False, help="Sólo los registros recibidos por ambos receptores")
+
+    args = parser.parse_args()
+    try:
+        runs = find_runs(args.paths)
+    except FileNotFoundError as e:
+        parser.error(str(e))
+    if not runs:
+        parser.error("No se encontraron corridas en las rutas indicadas")
+
+    print_table(COMMANDS[args.command](args, runs), args.format)
+    if args.timing:
+        print(f"importaciones: {_import_seconds:.3f} s, total: {perf_counter() - start:.3f} s", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
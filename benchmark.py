@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import argparse
+import platform
+import subprocess
+import tempfile
+from datetime import datetime
+from time import perf_counter
+from multiprocessing import get_context
+from concurrent.futures import ProcessPoolExecutor
+from generate_logs import gen_file_name, generate_log
+
+try:
+    # Sólo en Unix: memoria residente máxima del proceso
+    import resource
+except ImportError:
+    resource = None
+
+BENCHMARKS = ('preprocess', 'preprocess_neisser', 'load_csv', 'limpiar_datos', 'comparar_metricas', 'importacion')
+
+# Módulos cuyo tiempo de importación se mide (arranque de analyze.py y de los notebooks)
+IMPORT_MODULES = ('analyze', 'preprocess_common', 'src.summaries', 'src.data_processes', 'src.data_analyses', 'src.data_visualizations')
+
+# Distancias asignadas a las filas en comparar_metricas (el log sintético es de una sola corrida)
+DISTANCES = (1, 60, 120)
+
+def parse_size(text: str):
+    """
+    Convierte '10k', '1m' o '100M' en un número de líneas.
+    """
+    text = text.strip().lower()
+    factor = {'k': 1_000, 'm': 1_000_000}.get(text[-1], 1)
+    return int(float(text.rstrip('km')) * factor)
+
+def bench_preprocess(input_path: str, output_path: str, engine: str):
+    import preprocess
+    binary = engine in preprocess.BINARY_ENGINES
+    with open(input_path, 'rb' if binary else 'r', **({} if binary else {'encoding': 'utf-8', 'errors': 'replace'})) as infile, \
+         open(output_path, 'w', encoding='utf-8') as outfile:
+        start = perf_counter()
+        preprocess.pre_process(infile, outfile, None, ',', None, None, None, engine)
+    return perf_counter() - start
+
+def bench_preprocess_neisser(input_path: str, output_path: str):
+    import preprocess_neisser
+    with open(input_path, 'r', encoding='utf-8', errors='replace') as infile, \
+         open(output_path, 'w', encoding='utf-8') as outfile:
+        start = perf_counter()
+        preprocess_neisser.pre_process(infile, outfile, None, ',', None, None, None)
+    return perf_counter() - start
+
+def _load(csv_path: str):
+    from src.data_processes import load_csv
+    directory, name = os.path.split(os.path.splitext(csv_path)[0])
+    return load_csv(directory + os.sep, name, muestras=2, cache=False)
+
+def bench_load_csv(csv_path: str):
+    # Las importaciones (pandas) quedan fuera de la medición
+    import src.data_processes
+    start = perf_counter()
+    _load(csv_path)
+    return perf_counter() - start
+
+def bench_limpiar_datos(csv_path: str):
+    from src.data_processes import limpiar_datos
+    df = _load(csv_path)
+    start = perf_counter()
+    limpiar_datos(df, ['sto', 'cfo', 'snr'])
+    return perf_counter() - start
+
+def bench_comparar_metricas(csv_path: str):
+    import numpy as np
+    from src.data_analyses import comparar_metricas_por_distancia
+    df = _load(csv_path)
+    df['distancia'] = np.resize(DISTANCES, len(df))
+    start = perf_counter()
+    comparar_metricas_por_distancia(df, 'snr')
+    return perf_counter() - start
+
+def bench_importacion(module: str):
+    # En un proceso nuevo: nada está importado todavía
+    import importlib
+    start = perf_counter()
+    importlib.import_module(module)
+    return perf_counter() - start
+
+def _run(function: str, kwargs: dict):
+    # Se ejecuta en un proceso nuevo, así la memoria máxima es sólo la de esta prueba
+    seconds = globals()[function](**kwargs)
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 if resource else None
+    return seconds, rss
+
+def measure(function: str, **kwargs):
+    """
+    Ejecuta una prueba en un proceso aislado (spawn).
+
+    Devuelve:
+      Tupla (segundos, memoria residente máxima en MB o None).
+    """
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as pool:
+        return pool.submit(_run, function, kwargs).result()
+
+def count_lines(path: str):
+    with open(path, 'rb') as f:
+        return sum(block.count(b'\n') for block in iter(lambda: f.read(1 << 20), b''))
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_suite(sizes: list, work_dir: str, engines: list, benchmarks: list, seed: int = 0):
+    """
+    Ejecuta la batería de pruebas para cada tamaño de log.
+
+    Parámetros:
+      sizes      - Tamaños de los logs sintéticos (en líneas)
+      work_dir   - Carpeta para los logs y CSV generados (se reutilizan entre ejecuciones)
+      engines    - Motores de preprocess.py a medir
+      benchmarks - Subconjunto de BENCHMARKS
+
+    Devuelve:
+      Lista de diccionarios, uno por medición.
+    """
+    results = []
+    if 'importacion' in benchmarks:
+        # No depende del tamaño del log: una medición por módulo, con tamaño 0
+        for module in IMPORT_MODULES:
+            seconds, rss = measure('bench_importacion', module=module)
+            result = {
+                'benchmark': 'importacion',
+                'variante': module,
+                'tamano': 0,
+                'lineas': None,
+                'mb': None,
+                'segundos': round(seconds, 4),
+                'lineas_s': None,
+                'mb_s': None,
+                'rss_max_mb': round(rss, 1) if rss is not None else None,
+            }
+            print(f"{'importacion':<20} {module:<24} {result['segundos']:>9.3f} s {result['rss_max_mb'] or 0:>8.1f} MB")
+            results.append(result)
+    if not set(benchmarks) - {'importacion'}:
+        return results
+    for size in sizes:
+        folder = os.path.join(work_dir, f'{size}-{seed}')
+        os.makedirs(folder, exist_ok=True)
+        logs = {}
+        for dialect in ('gnuradio', 'neisser'):
+            path = os.path.join(folder, gen_file_name(dialect, 1, 2))
+            if not os.path.isfile(path):
+                generate_log(path, dialect, size, seed)
+            logs[dialect] = path
+        csv_path = os.path.splitext(logs['gnuradio'])[0] + '.csv'
+
+        tasks = []
+        if 'preprocess' in benchmarks or not os.path.isfile(csv_path):
+            # La salida del motor regex es también la entrada de las pruebas de pandas
+            for engine in (engines if 'preprocess' in benchmarks else ['regex']):
+                output_path = csv_path if engine == 'regex' else f'{csv_path}.{engine}'
+                tasks.append(('preprocess', engine, logs['gnuradio'], 'bench_preprocess',
+                              {'input_path': logs['gnuradio'], 'output_path': output_path, 'engine': engine}))
+        if 'preprocess_neisser' in benchmarks:
+            tasks.append(('preprocess_neisser', '', logs['neisser'], 'bench_preprocess_neisser',
+                          {'input_path': logs['neisser'], 'output_path': os.path.splitext(logs['neisser'])[0] + '.csv'}))
+        for name in ('load_csv', 'limpiar_datos', 'comparar_metricas'):
+            if name in benchmarks:
+                tasks.append((name, '', csv_path, f'bench_{name}', {'csv_path': csv_path}))
+
+        for name, variant, source, function, kwargs in tasks:
+            seconds, rss = measure(function, **kwargs)
+            if name not in benchmarks:
+                continue
+            lines = count_lines(source)
+            megabytes = os.path.getsize(source) / 1e6
+            result = {
+                'benchmark': name,
+                'variante': variant,
+                'tamano': size,
+                'lineas': lines,
+                'mb': round(megabytes, 3),
+                'segundos': round(seconds, 4),
+                'lineas_s': round(lines / seconds) if seconds else None,
+                'mb_s': round(megabytes / seconds, 2) if seconds else None,
+                'rss_max_mb': round(rss, 1) if rss is not None else None,
+            }
+            print(f"{name:<20} {variant:<9} {size:>12,} {result['segundos']:>9.3f} s {result['lineas_s'] or 0:>12,} líneas/s "
+                  f"{result['mb_s'] or 0:>8.2f} MB/s {result['rss_max_mb'] or 0:>8.1f} MB")
+            results.append(result)
+    return results
+
+def save_results(path: str, results: list, label: str | None):
+    """
+    Añade los resultados al archivo JSON lines, con la versión (commit) y el entorno.
+    """
+    meta = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'etiqueta': label,
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+    }
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        for result in results:
+            f.write(json.dumps({**meta, **result}) + '\n')
+
+def compare(path: str, results: list, baseline: str):
+    """
+    Compara los resultados actuales con la última medición guardada de la
+    etiqueta o commit `baseline` (mismo benchmark, variante y tamaño).
+    """
+    previous = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            record = json.loads(line)
+            if baseline in (record.get('etiqueta'), record.get('commit')):
+                previous[(record['benchmark'], record['variante'], record['tamano'])] = record
+
+    print(f"\nComparación con {baseline} (tiempo actual / anterior):")
+    for result in results:
+        old = previous.get((result['benchmark'], result['variante'], result['tamano']))
+        if old and old['segundos']:
+            ratio = result['segundos'] / old['segundos']
+            flag = '  <- regresión' if ratio > 1.1 else ''
+            print(f"{result['benchmark']:<20} {result['variante']:<9} {result['tamano']:>12,} {ratio:>7.2f}x{flag}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Mide el rendimiento del pre-procesado y del análisis con logs sintéticos")
+    parser.add_argument("--sizes", default="10k,100k,1m",
+                        help="Tamaños de los logs en líneas, separados por comas (p. ej. 10k,1m,100m; por defecto: 10k,100k,1m)")
+    parser.add_argument("--engines", default="regex,dispatch,mmap",
+                        help="Motores de preprocess.py a medir (por defecto: regex,dispatch,mmap)")
+    parser.add_argument("--benchmarks", default=",".join(BENCHMARKS),
+                        help=f"Pruebas a ejecutar (por defecto: {','.join(BENCHMARKS)})")
+    parser.add_argument("--work_dir", default=os.path.join(tempfile.gettempdir(), 'iot_benchmark'),
+                        help="Carpeta para los logs sintéticos, que se reutilizan entre ejecuciones")
+    parser.add_argument("--output", default=os.path.join('benchmarks', 'resultados.jsonl'),
+                        help="Archivo JSON lines donde se añaden los resultados (por defecto: benchmarks/resultados.jsonl)")
+    parser.add_argument("--label", default=None,
+                        help="Etiqueta de esta ejecución (p. ej. el nombre de la rama)")
+    parser.add_argument("--compare", default=None,
+                        help="Etiqueta o commit de una ejecución anterior con la que comparar")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Semilla de los logs sintéticos (por defecto: 0)")
+
+    args = parser.parse_args()
+
+    benchmarks = args.benchmarks.split(',')
+    unknown = set(benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"Pruebas desconocidas: {', '.join(sorted(unknown))}")
+
+    results = run_suite([parse_size(s) for s in args.sizes.split(',')], args.work_dir, args.engines.split(','), benchmarks, args.seed)
+    if args.compare and os.path.isfile(args.output):
+        compare(args.output, results, args.compare)
+    save_results(args.output, results, args.label)
+
+if __name__ == "__main__":
+    sys.exit(main())
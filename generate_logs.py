@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+import os
+import argparse
+import random
+from datetime import datetime, timedelta
+
+# Tamaño del bloque de texto que se acumula antes de escribir en disco
+BUFFER_LINES = 50_000
+
+DIALECTS = ('gnuradio', 'neisser')
+
+def gnuradio_packet(rng: random.Random, index: int, message: str, crc_error_rate: float, my_sto: bool):
+    """
+    Genera las líneas de un paquete del dialecto GNU Radio (frame_sync), con el
+    mismo formato que los logs reales de data/prueba_*.
+    """
+    lines = []
+    if my_sto:
+        lines.append(f"[1frame_sync_impl.cc] {index - 1}My STO: {rng.gauss(0, 1e-4):.6g}")
+    sto = rng.uniform(0, 127)
+    lines.append(
+        f"[frame_sync_impl.cc] {index} CFO estimate: {rng.gauss(-0.19, 0.02):.6g}, STO estimate: {sto:.6g}, "
+        f"snr est: {rng.gauss(9, 3):.6g}, k_hat: {round(sto)}, k_hat2: {rng.randrange(8192)}, "
+        f"espacios: {rng.randrange(128)}, CFO_INT2: {rng.randrange(560, 2200)}, STO estimate 2: {rng.randrange(-4096, 4096)}")
+    lines += [
+        "",
+        "--------Header--------",
+        f"Payload length: {len(message)}",
+        "CRC presence:   1",
+        "Coding rate:    1",
+        "Header checksum valid!",
+        "",
+        f"rx msg: {message}",
+        "CRC invalid!" if rng.random() < crc_error_rate else "CRC valid!",
+        "",
+    ]
+    return lines
+
+def neisser_packet(rng: random.Random, timestamp: datetime, message: str):
+    """
+    Genera las líneas de un paquete del dialecto Neisser (tamaño, mensaje y RSSI/SNR).
+    """
+    stamps = [(timestamp + timedelta(microseconds=1000 * i)).isoformat() for i in range(3)]
+    return [
+        f"{stamps[0]} - Packet Size: {len(message)} bytes",
+        f"{stamps[1]} - Received string: {message}",
+        f"{stamps[2]} - RSSI: {rng.randrange(-110, -60)} dBm, SNR: {rng.choice(range(-40, 60)) / 4:.2f} dB",
+    ]
+
+def generate_log(path: str, dialect: str, lines: int, seed: int = 0, loss_rate: float = 0.05,
+                 crc_error_rate: float = 0.02, overflow_rate: float = 0.02, my_sto: bool = False, prefix: str = "SYNTH"):
+    """
+    Escribe un log sintético de al menos `lines` líneas.
+
+    Parámetros:
+      path           - Ruta del archivo de salida
+      dialect        - 'gnuradio' o 'neisser'
+      lines          - Número (mínimo) de líneas a generar
+      seed           - Semilla del generador (mismo seed, mismo archivo)
+      loss_rate      - Fracción de paquetes perdidos (saltos en el contador)
+      crc_error_rate - Fracción de paquetes con "CRC invalid!" (sólo gnuradio)
+      overflow_rate  - Probabilidad de una línea "N overflows" entre paquetes (sólo gnuradio)
+      my_sto         - Si se añaden las líneas "[1frame_sync_impl.cc] My STO" (sólo gnuradio)
+      prefix         - Texto del mensaje antes del contador
+
+    Devuelve:
+      Número de líneas escritas.
+    """
+    rng = random.Random(seed)
+    timestamp = datetime(2025, 1, 1)
+    written = 0
+    counter = 0
+    index = 1
+    buffer = []
+
+    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+        if dialect == 'gnuradio':
+            buffer.append("usrp_source :info: set_min_output_buffer on block 1 to 8320")
+            buffer.append("Press Enter to quit: ")
+
+        while written + len(buffer) < lines:
+            # Paquetes perdidos: el contador avanza sin que se reciba nada
+            while rng.random() < loss_rate:
+                counter += 1
+            message = f"{prefix}:{counter:02d}"
+            if dialect == 'gnuradio':
+                if rng.random() < overflow_rate:
+                    buffer.append(f"usrp_source :error: In the last {rng.randrange(100, 200000)} ms, {rng.randint(1, 3)} overflows occurred.")
+                buffer += gnuradio_packet(rng, index, message, crc_error_rate, my_sto)
+            else:
+                buffer += neisser_packet(rng, timestamp, message)
+                timestamp += timedelta(seconds=3)
+            counter += 1
+            index += 1
+
+            if len(buffer) >= BUFFER_LINES:
+                f.write('\n'.join(buffer) + '\n')
+                written += len(buffer)
+                buffer = []
+
+        if buffer:
+            f.write('\n'.join(buffer) + '\n')
+            written += len(buffer)
+
+    return written
+
+def gen_file_name(dialect: str, distance: int, msps: int, version: int = 1):
+    """
+    Nombre de archivo que reconocen FILE_REGEX* de cada script de pre-procesado.
+    """
+    if dialect == 'gnuradio':
+        return f"{distance}m-{msps}MSPs-7sf-125khz-{version}.txt"
+    return f"{distance}m{msps}msps.txt"
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera logs sintéticos de GNU Radio o Neisser para pruebas de rendimiento")
+    parser.add_argument("--output_folder", default="synthetic_txt",
+                        help="Carpeta donde se escriben los logs (por defecto: synthetic_txt)")
+    parser.add_argument("--dialect", choices=DIALECTS, default="gnuradio",
+                        help="Dialecto del log (por defecto: gnuradio)")
+    parser.add_argument("--lines", type=int, default=100_000,
+                        help="Número de líneas por archivo (por defecto: 100000)")
+    parser.add_argument("--distances", default="1,60,120",
+                        help="Distancias en metros separadas por comas; se genera un archivo por distancia (por defecto: 1,60,120)")
+    parser.add_argument("--msps", type=int, default=2,
+                        help="MSPs usados en el nombre de los archivos (por defecto: 2)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Semilla del generador (por defecto: 0)")
+    parser.add_argument("--loss-rate", type=float, default=0.05,
+                        help="Fracción de paquetes perdidos (por defecto: 0.05)")
+    parser.add_argument("--my-sto", action='store_true', default=False,
+                        help="Añade las líneas '[1frame_sync_impl.cc] My STO' (sólo gnuradio)")
+
+    args = parser.parse_args()
+
+    os.makedirs(args.output_folder, exist_ok=True)
+    for i, distance in enumerate(int(d) for d in args.distances.split(',')):
+        path = os.path.join(args.output_folder, gen_file_name(args.dialect, distance, args.msps))
+        written = generate_log(path, args.dialect, args.lines, args.seed + i, args.loss_rate, my_sto=args.my_sto,
+                               prefix=f"{distance}M_{args.msps}MS")
+        print(f"{path}: {written} líneas")
+
+if __name__ == "__main__":
+    main()
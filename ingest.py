@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+import os
+import argparse
+import preprocess
+import preprocess_neisser
+from preprocess_common import COMPRESSIONS, OUTPUT_FORMATS, SHARDS_FOLDER, clean_folder, export_instrumentation, merge_shards, output_name, process_file, run_jobs, shard_path, write_columnar_merge, write_merge_summaries
+
+# Registro de dialectos (ver preprocess_common.Dialect); se prueban en orden y
+# el primero que reconoce el nombre gana
+DIALECTS = {
+    'gnuradio': preprocess.DIALECT,
+    'neisser': preprocess_neisser.DIALECT,
+}
+
+def detect_dialect(filename: str):
+    """
+    Devuelve (nombre_dialecto, grupos) para un archivo de entrada, o None.
+    """
+    for name, dialect in DIALECTS.items():
+        if (groups := dialect.parse_name(filename)) is not None:
+            return name, groups
+    return None
+
+def mirror_path(input_root: str, output_root: str, folder: str):
+    """
+    Carpeta de salida equivalente a `folder`: misma ruta relativa bajo
+    output_root, con el sufijo _txt de cada componente cambiado a _csv
+    (data/prueba_2/03-04-2025_txt -> data/prueba_2/03-04-2025_csv).
+    """
+    relative = os.path.relpath(folder, input_root)
+    if relative == '.':
+        return output_root
+    parts = [p[:-4] + '_csv' if p.lower().endswith('_txt') else p for p in relative.split(os.sep)]
+    return os.path.join(output_root, *parts)
+
+def scan(input_root: str, output_root: str):
+    """
+    Recorre el árbol de entrada una sola vez y devuelve los archivos reconocidos.
+
+    Devuelve:
+      Lista de tuplas (carpeta_entrada, carpeta_salida, nombre, dialecto, grupos).
+    """
+    found = []
+    for dirpath, dirnames, filenames in os.walk(input_root):
+        # No se entra en las carpetas de salida (si están dentro de la entrada) ni en las ocultas
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith('.') and d != 'merge' and not d.lower().endswith('_csv'))
+        for filename in sorted(filenames):
+            if detected := detect_dialect(filename):
+                found.append((dirpath, mirror_path(input_root, output_root, dirpath), filename, *detected))
+    return found
+
+def ingest(input_root: str, output_root: str, merge: bool, separator: str = ',', workers: int = 1, engine: str = 'regex',
+           fmt: str = 'csv', summary: bool = False, compress: str | None = None, metrics_log: str | None = None, prometheus: str | None = None):
+    """
+    Procesa todo un árbol de datos en una sola pasada: detecta el dialecto de
+    cada archivo, reparte todos los archivos de todos los dialectos en un único
+    pool de procesos y escribe las salidas en un árbol espejo.
+
+    Parámetros:
+      input_root  - Raíz del árbol de entrada (p. ej. data)
+      output_root - Raíz del árbol de salida
+      merge       - Si se escriben los archivos merge/{freq}-{distance}.csv de cada carpeta
+      (el resto como en preprocess_common.process_files)
+    """
+    options = {'engine': engine}
+    instrument = bool(metrics_log or prometheus)
+    files = scan(input_root, output_root)
+
+    # Miembros de merge por carpeta de salida: {nombre: (grupo, clave, csv)}
+    folders = {output_folder: {} for _, output_folder, *_ in files}
+    for output_folder in folders:
+        os.makedirs(output_folder, exist_ok=True)
+        if merge:
+            os.makedirs(os.path.join(output_folder, 'merge'), exist_ok=True)
+            clean_folder(os.path.join(output_folder, 'merge'))
+            os.makedirs(os.path.join(output_folder, 'merge', SHARDS_FOLDER))
+
+    jobs = []
+    shards = {folder: [] for folder in folders}
+    for input_folder, output_folder, filename, dialect, groups in files:
+        spec = DIALECTS[dialect]
+        input_path = os.path.join(input_folder, filename)
+        output_path = os.path.join(output_folder, output_name(filename, compress))
+        merged_path = None
+        if merge:
+            # Siempre por fragmentos: los archivos de una misma carpeta pueden
+            # caer en workers distintos
+            group = spec.group(groups)
+            merged_path = shard_path(os.path.join(output_folder, 'merge'), group, output_name(filename)[:-len('.csv')])
+            shards[output_folder].append((group, spec.order_key(groups, filename), merged_path))
+            folders[output_folder][filename] = (group, spec.order_key(groups, filename), output_path)
+        dialect_options = {key: value for key, value in options.items() if key in spec.options}
+        jobs.append((os.path.getsize(input_path), spec, input_path, output_path, merged_path, separator, groups, 0.0, dialect_options, fmt, summary, instrument))
+
+    # Los archivos más grandes primero, para que ningún worker quede con la cola larga al final
+    order = sorted(range(len(jobs)), key=lambda i: -jobs[i][0])
+    results = run_jobs(process_file, [jobs[i][1:] for i in order], workers)
+    records = [None] * len(jobs)
+    for i, record in zip(order, results):
+        records[i] = record
+
+    if merge:
+        for output_folder, folder_shards in shards.items():
+            merge_folder = os.path.join(output_folder, 'merge')
+            merge_shards(merge_folder, folder_shards, compress)
+            # Cada grupo se convierte con el esquema de su dialecto
+            groups = {}
+            for _, folder, _, dialect, name_groups in files:
+                if folder == output_folder:
+                    groups.setdefault(dialect, set()).add(DIALECTS[dialect].group(name_groups))
+            for dialect, dialect_groups in groups.items():
+                write_columnar_merge(merge_folder, fmt, DIALECTS[dialect].schema, separator, dialect_groups)
+            if summary:
+                write_merge_summaries(merge_folder, folders[output_folder])
+    export_instrumentation(records, output_root, metrics_log, prometheus, False)
+    return files
+
+def main():
+    parser = argparse.ArgumentParser(description="Procesa en una sola pasada todos los logs (GNU Radio y Neisser) de un árbol de datos")
+    parser.add_argument("--input_root", default="data",
+                        help="Raíz del árbol de entrada (por defecto: data)")
+    parser.add_argument("--output_root", default=os.path.join("output", "ingest"),
+                        help="Raíz del árbol de salida; las carpetas *_txt se escriben como *_csv (por defecto: output/ingest, para no escribir dentro de data/)")
+    parser.add_argument("--separator", default=",",
+                        help="Separador para el archivo CSV (por defecto: ',')")
+    parser.add_argument("--merge", action='store_true', default=False,
+                        help="Si se establece, escribe en cada carpeta de salida los archivos merge/{freq}-{distance}.csv")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Número de procesos compartidos por todos los dialectos (por defecto: número de CPUs)")
+    parser.add_argument("--engine", choices=sorted(preprocess.ENGINES), default="regex",
+                        help="Motor de parseo de líneas del dialecto GNU Radio (por defecto: regex)")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="csv",
+                        help="Formato de salida: 'csv' o, además del CSV, 'parquet' o 'feather' (por defecto: csv)")
+    parser.add_argument("--summary", action='store_true', default=False,
+                        help="Escribe los resúmenes .summary.json junto a cada CSV y merge")
+    parser.add_argument("--compress", choices=COMPRESSIONS, default=None,
+                        help="Comprime los CSV de salida y los merge (gz, zst o xz)")
+    parser.add_argument("--metrics-log", default=None,
+                        help="Añade a este archivo JSON lines un registro de instrumentación por archivo")
+    parser.add_argument("--prometheus", default=None,
+                        help="Escribe la instrumentación por archivo en este archivo de texto de Prometheus")
+    parser.add_argument("--list", action='store_true', default=False,
+                        help="Sólo muestra los archivos detectados, su dialecto y su carpeta de salida")
+
+    args = parser.parse_args()
+    output_root = args.output_root
+
+    if args.list:
+        for input_folder, output_folder, filename, dialect, _ in scan(args.input_root, output_root):
+            print(f"{dialect:<9} {os.path.join(input_folder, filename)} -> {output_folder}")
+        return
+
+    files = ingest(args.input_root, output_root, args.merge, args.separator, args.workers, args.engine,
+                   args.format, args.summary, args.compress, args.metrics_log, args.prometheus)
+    print(f"{len(files)} archivos procesados en {len({f[1] for f in files})} carpetas")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+import os
+import json
+import pickle
+import hashlib
+import argparse
+from dataclasses import dataclass, field
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import pandas as pd
+import preprocess
+import preprocess_neisser
+from ingest import detect_dialect
+from preprocess_common import file_hash, output_name, process_files
+
+# Versión del formato de las etapas; cambiarla invalida toda la caché del pipeline
+PIPELINE_VERSION = 1
+
+# Resultados de las etapas, direccionados por contenido (<clave>.pkl)
+CACHE_DIR = os.path.join('.cache', 'pipeline')
+
+# Script de pre-procesado de cada dialecto (etapa parse)
+PARSERS = {'gnuradio': preprocess, 'neisser': preprocess_neisser}
+
+# Valores por defecto del archivo de configuración
+DEFAULTS = {
+    'dialecto': None,
+    'grupos': ['msps', 'sf', 'bw_khz'],
+    'columna_grupo': 'distancia',
+    'metricas': ['sto', 'cfo', 'snr', 'rssi (dBm)', 'snr (dB)'],
+    'limpieza': {'iqr_multiplier': 1.5, 'modo': 'sequential'},
+    'graficos_corrida': ['histograma', 'correlacion'],
+    'graficos_grupo': ['box'],
+    'propagacion': None,
+    'workers': 1,
+}
+
+@dataclass
+class Stage:
+    """
+    Nodo del DAG. La clave de su resultado es el hash de la función, sus
+    parámetros, las claves de las etapas de las que lee (deps) y el contenido
+    de sus archivos de entrada; `after` sólo impone orden.
+    """
+    name: str
+    func: str
+    params: dict
+    deps: list = field(default_factory=list)
+    after: list = field(default_factory=list)
+    inputs: list = field(default_factory=list)
+    local: bool = False
+
+def load_config(path: str):
+    """
+    Lee el archivo de configuración (JSON) de una prueba y completa los valores
+    por defecto. Claves: nombre, salida (carpeta de resultados), entrada
+    (carpeta *_txt) y/o csv, y opcionalmente dialecto, grupos, columna_grupo,
+    metricas, limpieza, graficos_corrida, graficos_grupo, propagacion y workers.
+    Con entrada, la etapa parse escribe los CSV en csv (por defecto
+    <salida>/csv, nunca junto a los CSV versionados de data/). Sin entrada no
+    hay etapa parse: se leen, sin modificarlos, los CSV ya pre-procesados de csv.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        config = {**DEFAULTS, **json.load(f)}
+    for key in ('nombre', 'salida'):
+        if key not in config:
+            raise ValueError(f"Falta la clave '{key}' en {path}")
+    if not config.get('entrada') and not config.get('csv'):
+        raise ValueError(f"Falta la clave 'entrada' o 'csv' en {path}")
+    config['limpieza'] = {**DEFAULTS['limpieza'], **(config['limpieza'] or {})} if config['limpieza'] is not False else False
+    config.setdefault('entrada', None)
+    if not config.get('csv'):
+        config['csv'] = os.path.join(config['salida'], 'csv')
+    return config
+
+def _slug(values: dict):
+    return ",".join(f"{k}={v}" for k, v in values.items()) or "todo"
+
+def build_dag(config: dict):
+    """
+    Construye el DAG de una prueba a partir de los nombres de los archivos de
+    entrada (o, sin entrada, de los CSV de csv, sin etapa parse): parse → load → enrich (por corrida) → stats y gráficos por corrida;
+    concat → clean → stats y gráficos por grupo (p. ej. cada MSPs/SF/BW); y,
+    opcionalmente, el ajuste del modelo de propagación de toda la campaña.
+
+    Devuelve:
+      Diccionario nombre -> Stage, en orden topológico.
+    """
+    # Import diferido: catalog arrastra pandas/sqlite sólo cuando se usa el pipeline
+    from src.catalog import DATE_REGEX, TEST_REGEX, parse_name
+
+    entrada, csv, salida = config['entrada'], config['csv'], config['salida']
+    # Sin entrada, las corridas son los CSV que ya hay en csv
+    origen = entrada or csv
+    corridas = []
+    for filename in sorted(os.listdir(origen)):
+        if entrada:
+            detected = detect_dialect(filename)
+            if detected is None:
+                continue
+            csv_name = output_name(filename)
+        elif filename.endswith('.csv'):
+            csv_name = filename
+        else:
+            continue
+        meta = parse_name(csv_name)
+        if meta is None or (config['dialecto'] and meta['dialecto'] != config['dialecto']):
+            continue
+        corridas.append((filename, csv_name[:-len('.csv')], meta))
+    if not corridas:
+        raise ValueError(f"No hay archivos de entrada reconocidos en {origen}")
+    dialectos = {meta['dialecto'] for *_, meta in corridas}
+    if len(dialectos) > 1:
+        raise ValueError(f"La carpeta {origen} mezcla dialectos ({', '.join(sorted(dialectos))}); indica 'dialecto'")
+    dialecto = dialectos.pop()
+
+    partes = os.path.normpath(origen).split(os.sep)
+    test = next((int(m.group(1)) for p in partes if (m := TEST_REGEX.match(p))), None)
+    fecha = next((m.group(1) for p in partes if (m := DATE_REGEX.search(p))), None)
+
+    dag = {}
+    def add(stage):
+        dag[stage.name] = stage
+
+    if entrada:
+        add(Stage('parse', 'stage_parse', {'dialecto': dialecto, 'entrada': entrada, 'csv': csv, 'workers': config['workers']},
+                  inputs=[os.path.join(entrada, filename) for filename, _, _ in corridas], local=True))
+
+    grupos = {}
+    for filename, name, meta in corridas:
+        meta = {'test': test, 'fecha': fecha, **meta, 'prueba': name}
+        add(Stage(f'load:{name}', 'stage_load', {'csv': csv, 'nombre': name, 'muestras': meta['msps']},
+                  after=['parse'] if entrada else [], inputs=[os.path.join(csv, f'{name}.csv')]))
+        add(Stage(f'enrich:{name}', 'stage_enrich', {'meta': meta}, deps=[f'load:{name}']))
+        add(Stage(f'stats:{name}', 'stage_run_stats', {'salida': os.path.join(salida, name)}, deps=[f'enrich:{name}']))
+        for tipo in config['graficos_corrida']:
+            add(Stage(f'plot:{tipo}:{name}', 'stage_run_plot', {'tipo': tipo, 'salida': os.path.join(salida, name, tipo)}, deps=[f'enrich:{name}']))
+        clave = {col: meta.get(col) for col in config['grupos'] if meta.get(col) is not None}
+        grupos.setdefault(_slug(clave), []).append(f'enrich:{name}')
+
+    metricas = config['metricas']
+    for slug, miembros in grupos.items():
+        salida_grupo = os.path.join(salida, 'grupos', slug)
+        add(Stage(f'concat:{slug}', 'stage_concat', {}, deps=miembros))
+        limpio = f'concat:{slug}'
+        if config['limpieza'] is not False:
+            limpieza = config['limpieza']
+            add(Stage(f'clean:{slug}', 'stage_clean', {'columnas': limpieza.get('columnas', metricas), 'iqr_multiplier': limpieza['iqr_multiplier'], 'modo': limpieza['modo']},
+                      deps=[f'concat:{slug}']))
+            limpio = f'clean:{slug}'
+        add(Stage(f'compare:{slug}', 'stage_compare', {'metricas': metricas, 'columna_grupo': config['columna_grupo'], 'salida': salida_grupo}, deps=[limpio]))
+        for tipo in config['graficos_grupo']:
+            add(Stage(f'plot:{tipo}:{slug}', 'stage_group_plot', {'metricas': metricas, 'tipo': tipo, 'columna_grupo': config['columna_grupo'], 'salida': os.path.join(salida_grupo, tipo)},
+                      deps=[limpio]))
+
+    if config['propagacion']:
+        add(Stage('concat:campana', 'stage_concat', {}, deps=[f'enrich:{name}' for _, name, _ in corridas]))
+        add(Stage('fit:propagacion', 'stage_fit', {'metrica': config['propagacion'], 'por': config['grupos'], 'salida': os.path.join(salida, 'propagacion')},
+                  deps=['concat:campana']))
+    return dag
+
+# Etapas. Cada una recibe sus parámetros y los resultados de sus deps, y
+# devuelve un valor serializable; si es un diccionario con 'archivos', la
+# caché sólo se da por buena mientras esos archivos existan
+
+def stage_parse(params, deps):
+    # El pre-procesado incremental ya omite las entradas sin cambios
+    process_files(PARSERS[params['dialecto']].DIALECT, params['entrada'], params['csv'], merge=False, slow_down=0, separator=',',
+                  workers=params['workers'], incremental=True)
+    return None
+
+def stage_load(params, deps):
+    from src.data_processes import load_csv
+    return load_csv(params['csv'] + os.sep, params['nombre'], muestras=params['muestras'], cache=False)
+
+def stage_enrich(params, deps):
+    from src.catalog import METADATA
+    df = deps[0]
+    for col, value in params['meta'].items():
+        if col in METADATA or col == 'prueba':
+            df[col] = pd.Series(value, index=df.index, dtype='category')
+    df['distancia'] = params['meta']['distancia']
+    return df
+
+def _guardar_tablas(salida, tablas):
+    os.makedirs(salida, exist_ok=True)
+    archivos = []
+    for nombre, tabla in tablas.items():
+        archivos.append(os.path.join(salida, f'{nombre}.csv'))
+        tabla.to_csv(archivos[-1])
+    return archivos
+
+def stage_run_stats(params, deps):
+    from src.data_analyses import describir_metricas, stats_paquetes
+    from src.data_sequences import analizar_secuencias
+    df = deps[0]
+    tablas = {'stats_paquetes': stats_paquetes(df), 'describir_metricas': describir_metricas(df)}
+    if 'numero' in df.columns:
+        tablas['secuencias'] = analizar_secuencias(df, por='prueba')
+    return {**tablas, 'archivos': _guardar_tablas(params['salida'], tablas)}
+
+def stage_run_plot(params, deps):
+    from src.data_visualizations import PLOTS
+    archivos = PLOTS[params['tipo']](deps[0], output_path=params['salida']) or []
+    return {'archivos': [os.path.join(params['salida'], a) for a in archivos]}
+
+def stage_concat(params, deps):
+    # Las columnas categóricas se unen sobre la unión de sus categorías
+    categoricas = {col for df in deps for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)}
+    df = pd.concat(deps, ignore_index=True)
+    for col in categoricas:
+        df[col] = df[col].astype('category')
+    return df
+
+def stage_clean(params, deps):
+    from src.data_processes import limpiar_datos
+    df = deps[0]
+    columnas = [col for col in params['columnas'] if col in df.columns]
+    # Límites IQR por corrida, como en los notebooks
+    return limpiar_datos(df, columnas, params['iqr_multiplier'], params['modo'], by='prueba')
+
+def stage_compare(params, deps):
+    from src.data_analyses import comparar_metricas
+    tabla = comparar_metricas(deps[0], params['metricas'], params['columna_grupo'])
+    return {'comparacion': tabla, 'archivos': _guardar_tablas(params['salida'], {'comparacion': tabla})}
+
+def stage_group_plot(params, deps):
+    from src.data_visualizations import plot_metricas_por_distancia
+    archivos = plot_metricas_por_distancia(deps[0], params['metricas'], params['tipo'], params['columna_grupo'], params['salida'])
+    return {'archivos': [os.path.join(params['salida'], a) for a in archivos]}
+
+def stage_fit(params, deps):
+    from src.data_analyses import ajustar_modelos_propagacion
+    from src.data_visualizations import plot_modelos_propagacion
+    df = deps[0]
+    por = [col for col in params['por'] if col in df.columns]
+    ajustes = ajustar_modelos_propagacion(df, por, params['metrica'])
+    archivos = _guardar_tablas(params['salida'], {'ajustes': ajustes})
+    archivos += [os.path.join(params['salida'], a) for a in plot_modelos_propagacion(df, ajustes, por, params['metrica'], params['salida'])]
+    return {'ajustes': ajustes, 'archivos': archivos}
+
+# Ejecución
+
+def cache_path(key: str, ext: str = 'pkl'):
+    return os.path.join(CACHE_DIR, f'{key}.{ext}')
+
+def load_result(key: str):
+    with open(cache_path(key), 'rb') as f:
+        return pickle.load(f)
+
+def _cached(key: str):
+    # Resultado válido en caché: existe y, si produjo archivos, siguen existiendo
+    # (la lista se guarda aparte para no deserializar el resultado)
+    if not os.path.isfile(cache_path(key)):
+        return False
+    if not os.path.isfile(cache_path(key, 'json')):
+        return True
+    with open(cache_path(key, 'json'), 'r', encoding='utf-8') as f:
+        return all(os.path.isfile(a) for a in json.load(f))
+
+def _code_versions():
+    # Versiones del código del que dependen los resultados de las etapas
+    from src.data_processes import CACHE_VERSION
+    from src.data_visualizations import RENDER_VERSION
+    return [PIPELINE_VERSION, preprocess.PARSER_VERSION, preprocess_neisser.PARSER_VERSION, CACHE_VERSION, RENDER_VERSION]
+
+def stage_key(stage: Stage, keys: dict):
+    params = {k: v for k, v in stage.params.items() if k != 'workers'}
+    payload = [_code_versions(), stage.func, params, [keys[d] for d in stage.deps],
+               [file_hash(path) if os.path.isfile(path) else None for path in stage.inputs]]
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+def _execute(func: str, params: dict, dep_keys: list, key: str):
+    # Se ejecuta en un proceso del pool: lee las entradas de la caché y deja ahí el resultado
+    result = globals()[func](params, [load_result(k) for k in dep_keys])
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = f'{cache_path(key)}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+    if isinstance(result, dict) and 'archivos' in result:
+        with open(cache_path(key, 'json'), 'w', encoding='utf-8') as f:
+            json.dump(result['archivos'], f)
+    os.replace(tmp, cache_path(key))
+    return key
+
+def _init_worker():
+    # Los gráficos se renderizan sin interfaz
+    import matplotlib
+    matplotlib.use('Agg')
+
+def run_dag(dag: dict, workers: int = 1, force: bool = False, dry_run: bool = False):
+    """
+    Ejecuta el DAG: en cuanto las dependencias de una etapa terminan se calcula
+    su clave y, si el resultado no está en caché, se envía al pool; las ramas
+    independientes (corridas, grupos) corren en paralelo.
+
+    Parámetros:
+      dag     - Resultado de build_dag
+      workers - Número de procesos
+      force   - Ignorar la caché y recalcular todo
+      dry_run - Sólo informar qué etapas se recalcularían (las que dependen de
+                archivos aún no generados se consideran pendientes)
+
+    Devuelve:
+      Diccionario nombre -> clave del resultado (ver load_result).
+    """
+    keys, status = {}, {}
+    pending = dict(dag)
+    running = {}
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) if workers > 1 and not dry_run else None
+    try:
+        while pending or running:
+            ready = [s for s in pending.values() if all(d in keys for d in s.deps + s.after)]
+            for stage in ready:
+                del pending[stage.name]
+                key = keys[stage.name] = stage_key(stage, keys)
+                if not force and _cached(key):
+                    status[stage.name] = 'cache'
+                elif dry_run:
+                    status[stage.name] = 'pendiente'
+                elif stage.local or executor is None:
+                    _execute(stage.func, stage.params, [keys[d] for d in stage.deps], key)
+                    status[stage.name] = 'calculado'
+                else:
+                    running[executor.submit(_execute, stage.func, stage.params, [keys[d] for d in stage.deps], key)] = stage.name
+            if running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+                    status[running.pop(future)] = 'calculado'
+            elif pending and not ready:
+                raise ValueError(f"Dependencias sin resolver: {', '.join(sorted(pending))}")
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
+
+    for name in dag:
+        print(f"{status[name]:<10} {name}")
+    return keys
+
+def main():
+    parser = argparse.ArgumentParser(description="Ejecuta el pipeline de análisis de una prueba (parse → load → enrich → clean → stats → plots) con caché por etapas")
+    parser.add_argument("config", help="Archivo JSON con la descripción de la prueba")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Número de procesos (por defecto, el de la configuración)")
+    parser.add_argument("--force", action='store_true', default=False,
+                        help="Recalcula todas las etapas aunque estén en caché")
+    parser.add_argument("--dry-run", action='store_true', default=False,
+                        help="Sólo muestra qué etapas se recalcularían")
+
+    args = parser.parse_args()
+    config = load_config(args.config)
+    run_dag(build_dag(config), args.workers or config['workers'], args.force, args.dry_run)
+
+if __name__ == "__main__":
+    main()
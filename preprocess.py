@@ -1,11 +1,14 @@
 #!/usr/bin/env python3
 import os
 import re
-import argparse
-from tqdm import tqdm
+import io
+import mmap
+import shutil
 from dataclasses import dataclass
 from io import TextIOWrapper
-from time import sleep
+from time import perf_counter
+from contextlib import nullcontext
+from preprocess_common import Dialect, FolderWatcher, RowSink, RunSummary, TXT_SUFFIX, Tail, build_parser, clean_folder, compression_of, count_buffer, count_lines, header_line, instrument_rows, load_checkpoint, output_name, run_cli, save_checkpoint
 
 # Regex de las Líneas
 numbers = r"[+-]?(?:(?:\d+(?:\.\d*)?)|\.\d+)(?:[eE][+-]?\d+)?"
@@ -16,8 +19,51 @@ MESSAGE = re.compile(f"rx msg: (.+:(\\d+))?") #?
 CRC = re.compile(f"CRC (invalid|valid)")
 OVERFLOW = re.compile(f"(\\d+) overflows") #?
 
+# Versión en bytes de las mismas regex para el motor mmap, unidas en una sola
+# alternativa que se recorre con finditer sobre el buffer completo. Todas las ramas
+# empiezan por un literal distinto (sin grupos delante, para que re pueda saltar
+# rápido entre candidatos) y el tipo de línea se deduce de su primer byte. Los
+# dígitos de OVERFLOW se leen hacia atrás desde " overflows" y la captura del
+# mensaje va en un lookahead para no consumir el resto de la línea. '.' se
+# reemplaza por [^\r\n] para no cruzar saltos de línea (igual que en modo texto).
+_b_numbers = numbers.encode()
+LINE_EVENTS = re.compile(
+    rb" overflows"
+    rb"|rx msg: (?=(?:([^\r\n]+:(\d+)))?)"
+    rb"|\[1frame_sync_impl[^\r\n]cc\] \d+My STO: (" + _b_numbers + rb")"
+    rb"|\[frame_sync_impl[^\r\n]cc\] \d+ CFO estimate: (" + _b_numbers + rb"), STO estimate: (" + _b_numbers + rb"), snr est: (" + _b_numbers + rb"), k_hat: (" + _b_numbers + rb"), k_hat2: (" + _b_numbers + rb"), espacios: (" + _b_numbers + rb"), CFO_INT2: (" + _b_numbers + rb"), STO estimate 2: (" + _b_numbers + rb")"
+    rb"|CRC (invalid|valid)"
+)
+
+# Nombre de cada regex en los contadores de coincidencias (instrumentación);
+# los motores incrementan hits[i] en el mismo orden
+HIT_NAMES = ('OVERFLOW', 'MESSAGE', 'MY_STO', 'DEF_LOG', 'CRC')
+
+# Versión del formato de salida; cambiarla invalida el manifiesto de --incremental
+PARSER_VERSION = "2"
+
+# Esquema de la salida columnar (--format parquet|feather)
+SCHEMA = {
+    'mensaje': 'str',
+    'numero': 'int32',
+    'my_sto': 'float32',
+    'sto': 'float32',
+    'cfo': 'float32',
+    'snr': 'float32',
+    'crc_error': 'bool',
+    'previous_overflow_sum': 'int32',
+    'k_hat': 'Int32',
+    'k_hat2': 'Int32',
+    'espacios': 'Int32',
+    'cfo_int2': 'Int32',
+    'sto_estimate2': 'float32',
+}
+
+# Columnas numéricas del CSV que se resumen en línea (opción --summary)
+SUMMARY_COLUMNS = [col for col in SCHEMA if col != 'mensaje']
+
 # Clase de lineas csv dataclass
-@dataclass
+@dataclass(slots=True)
 class Row:
     mensaje: str            # *
     numero: str             # *
@@ -34,9 +80,10 @@ class Row:
     sto_estimate2: str = ""  # Opcional, no siempre presente
 
 # Expresión regular para filtrar los archivos
-FILE_REGEX = re.compile(r'^(\d+[mk])-(\d+m)-(\d+)[.]txt$', re.IGNORECASE)
-FILE_REGEX_EXTENDED = re.compile(r'^(\d+[m])-(\d+MSPs)-(\d+)[.]txt$', re.IGNORECASE)
-FILE_REGEX_EXTENDED2 = re.compile(r'^(\d+[m])-(\d+MSPs)-(\d+sf)-(\d+khz)-(\d+)[.]txt$', re.IGNORECASE)
+# (también comprimidos: .txt.gz, .txt.zst, .txt.xz)
+FILE_REGEX = re.compile(r'^(\d+[mk])-(\d+m)-(\d+)' + TXT_SUFFIX, re.IGNORECASE)
+FILE_REGEX_EXTENDED = re.compile(r'^(\d+[m])-(\d+MSPs)-(\d+)' + TXT_SUFFIX, re.IGNORECASE)
+FILE_REGEX_EXTENDED2 = re.compile(r'^(\d+[m])-(\d+MSPs)-(\d+sf)-(\d+khz)-(\d+)' + TXT_SUFFIX, re.IGNORECASE)
 
 def set_header(outfile: TextIOWrapper, separator: str):
     """
@@ -50,33 +97,32 @@ def set_header(outfile: TextIOWrapper, separator: str):
       None
     """
     # Escribiendo encabezado en el archivo de salida
-    outfile.write(f'mensaje{separator}numero{separator}my_sto{separator}sto{separator}cfo{separator}snr{separator}crc_error{separator}previous_overflow_sum{separator}k_hat{separator}k_hat2{separator}espacios{separator}cfo_int2{separator}sto_estimate2\n')
+    outfile.write(header_line(['mensaje', 'numero', 'my_sto', 'sto', 'cfo', 'snr', 'crc_error', 'previous_overflow_sum', 'k_hat', 'k_hat2', 'espacios', 'cfo_int2', 'sto_estimate2'], separator))
 
-def pre_process(infile: TextIOWrapper, outfile: TextIOWrapper, merged_file: TextIOWrapper| None, separator: str, freq, distance, version):
+def new_row():
     """
-    Función de pre-procesado (aún sin implementación).
+    Crea una fila vacía para empezar a procesar un archivo.
+    """
+    return Row(mensaje="", numero=0, my_sto="", sto="", cfo="", snr="", crc_error=False, overflow_count=0, k_hat="", k_hat2="", espacios="", cfo_int2="", sto_estimate2="")
+
+def row_writer(sink: RowSink):
+    """
+    Construye la función que pasa una fila al RowSink (que la escribe en la
+    salida y en el archivo combinado, si lo hay) y la reinicia para el
+    siguiente paquete.
     
     Parámetros:
-      infile   - Objeto de archivo de entrada
-      outfile  - Objeto de archivo de salida
-      freq     - Frecuencia de muestreo (primer grupo de la regex)
-      distance - Distancia (segundo grupo de la regex)
-      version  - Versión (tercer grupo de la regex)
+      sink - RowSink de la corrida
     
-    La función se encargará de leer el contenido del archivo de entrada y escribir
-    el resultado en el archivo de salida. Por ahora, simplemente copia el contenido.
+    Devuelve:
+      Función write_row(row).
     """
-    #escribiendo encabezado en el archivo de salida
-    set_header(outfile, separator)
+    write = sink.write
 
     # Función para escribir en el archivo de salida
     def write_row(row: Row):
-        # Convertir el dataclass a una cadena CSV
-        values = [f'"{row.mensaje}"', str(row.numero), row.my_sto, row.sto, row.cfo, row.snr, str(int(row.crc_error)), str(row.overflow_count), row.k_hat, row.k_hat2, row.espacios, row.cfo_int2, row.sto_estimate2]
-        outfile.write(separator.join(values) + '\n')
-        if merged_file:
-            # Escribir en el archivo combinado
-            merged_file.write(separator.join(values) + '\n')
+        # Convertir el dataclass a las columnas del CSV (el mensaje aparte, lo cita el sink)
+        write(row.mensaje, [str(row.numero), row.my_sto, row.sto, row.cfo, row.snr, '1' if row.crc_error else '0', str(row.overflow_count), row.k_hat, row.k_hat2, row.espacios, row.cfo_int2, row.sto_estimate2])
 
         row.mensaje = ""
         row.numero = -1
@@ -92,23 +138,75 @@ def pre_process(infile: TextIOWrapper, outfile: TextIOWrapper, merged_file: Text
         row.cfo_int2 = ""
         row.sto_estimate2 = ""
 
+    return write_row
+
+def pre_process(infile: TextIOWrapper, outfile: TextIOWrapper, merged_file: TextIOWrapper| None, separator: str, freq, distance, version, engine: str = 'regex', summary: RunSummary | None = None, stats: dict | None = None):
+    """
+    Función de pre-procesado (aún sin implementación).
+    
+    Parámetros:
+      infile   - Objeto de archivo de entrada
+      outfile  - Objeto de archivo de salida
+      freq     - Frecuencia de muestreo (primer grupo de la regex)
+      distance - Distancia (segundo grupo de la regex)
+      version  - Versión (tercer grupo de la regex)
+      engine   - Motor de parseo de líneas (ver ENGINES)
+      summary  - RunSummary que se actualiza con cada fila, o None
+      stats    - Diccionario donde se dejan los contadores de instrumentación, o None
+    
+    La función se encargará de leer el contenido del archivo de entrada y escribir
+    el resultado en el archivo de salida. Por ahora, simplemente copia el contenido.
+    """
+    #escribiendo encabezado en el archivo de salida
+    set_header(outfile, separator)
+
+    sink = RowSink([outfile, merged_file], separator, summary)
+    write_row = row_writer(sink)
+    if stats is not None:
+        write_row = instrument_rows(write_row, stats)
+
     # Aquí se implementará el pre-procesado deseado.
-    row = Row(mensaje="", numero=0, my_sto="", sto="", cfo="", snr="", crc_error=False, overflow_count=0, k_hat="", k_hat2="", espacios="", cfo_int2="", sto_estimate2="")
+    row = new_row()
+
+    hits = [0] * len(HIT_NAMES)
+    ENGINES[engine](infile, row, write_row, hits, stats)
+    flush_start = perf_counter()
+    sink.flush()
+    if stats is not None:
+        stats['write_seconds'] += perf_counter() - flush_start
+        stats['hits'] = hits
 
+def parse_regex(infile, row: Row, write_row, hits: list, stats: dict | None = None):
+    """
+    Motor de parseo original: prueba las regex en orden fijo sobre cada línea.
+    
+    Parámetros:
+      infile    - Iterable de líneas de entrada
+      row       - Fila en construcción
+      write_row - Función que escribe y reinicia la fila al llegar la línea CRC
+      hits      - Contadores de coincidencias por regex (orden de HIT_NAMES)
+      stats     - Si no es None, se cuentan las líneas leídas (ver count_lines)
+    """
+    if stats is not None:
+        infile = count_lines(infile, stats)
     for line in infile:
         line = line.strip()
         # Buscar coincidencias en la línea actual
         if match := OVERFLOW.search(line):
+            hits[0] += 1
             row.overflow_count += int(match.group(1))
         
         elif match := MESSAGE.search(line):
+            hits[1] += 1
             row.mensaje = match.group(1) if match.group(1) else line
             row.numero = int(match.group(2)) if match.group(2) else -1
 
         elif match := MY_STO.search(line):
+            hits[2] += 1
             row.my_sto = match.group(1)
 
         elif match := DEF_LOG.search(line):
+            hits[3] += 1
             row.cfo = match.group(1)
             row.sto = match.group(2)
             row.snr = match.group(3)
@@ -119,6 +217,7 @@ def pre_process(infile: TextIOWrapper, outfile: TextIOWrapper, merged_file: Text
             row.sto_estimate2 = match.group(8)
         
         elif match := CRC.search(line): # final
+            hits[4] += 1
             row.crc_error = match.group(1) == "invalid"
             # Escribir la fila en el archivo de salida
             write_row(row)
@@ -126,6 +225,186 @@ def pre_process(infile: TextIOWrapper, outfile: TextIOWrapper, merged_file: Text
             # Si no hay coincidencias, se puede decidir qué hacer (opcional)
             pass
 
+def parse_dispatch(infile, row: Row, write_row, hits: list, stats: dict | None = None):
+    """
+    Motor de parseo por despacho de literales: clasifica cada línea con una
+    búsqueda de subcadena barata y sólo ejecuta la regex que corresponde.
+    Las líneas de encabezado (Payload length, Coding rate...) no contienen ningún
+    marcador y se descartan sin ejecutar regex. Respeta la misma prioridad que
+    `parse_regex`, por lo que produce exactamente el mismo CSV.
+    
+    Parámetros:
+      infile    - Iterable de líneas de entrada
+      row       - Fila en construcción
+      write_row - Función que escribe y reinicia la fila al llegar la línea CRC
+      hits      - Contadores de coincidencias por regex (orden de HIT_NAMES)
+      stats     - Si no es None, se cuentan las líneas leídas (ver count_lines)
+    """
+    if stats is not None:
+        infile = count_lines(infile, stats)
+    overflow_search = OVERFLOW.search
+    message_search = MESSAGE.search
+    my_sto_search = MY_STO.search
+    def_log_search = DEF_LOG.search
+    crc_search = CRC.search
+
+    for line in infile:
+        # Ninguna regex puede coincidir con menos de 9 caracteres ("CRC valid"):
+        # descarta de inmediato las líneas vacías que separan los bloques
+        if len(line) < 9:
+            continue
+
+        if 'overflows' in line and (match := overflow_search(line)):
+            hits[0] += 1
+            row.overflow_count += int(match.group(1))
+
+        elif 'rx msg: ' in line and (match := message_search(stripped := line.strip())):
+            hits[1] += 1
+            row.mensaje = match.group(1) if match.group(1) else stripped
+            row.numero = int(match.group(2)) if match.group(2) else -1
+
+        elif 'frame_sync_impl.cc]' in line:
+            # Las regex empiezan por su marcador, por lo que la búsqueda puede
+            # arrancar en la posición del marcador
+            if (pos := line.find('[1frame_sync_impl.cc]')) >= 0 and (match := my_sto_search(line, pos)):
+                hits[2] += 1
+                row.my_sto = match.group(1)
+            elif (pos := line.find('[frame_sync_impl.cc]')) >= 0 and (match := def_log_search(line, pos)):
+                hits[3] += 1
+                row.cfo, row.sto, row.snr, row.k_hat, row.k_hat2, row.espacios, row.cfo_int2, row.sto_estimate2 = match.groups()
+            elif (pos := line.find('CRC ')) >= 0 and (match := crc_search(line, pos)):
+                hits[4] += 1
+                row.crc_error = match.group(1) == "invalid"
+                write_row(row)
+
+        elif (pos := line.find('CRC ')) >= 0 and (match := crc_search(line, pos)): # final
+            hits[4] += 1
+            row.crc_error = match.group(1) == "invalid"
+            # Escribir la fila en el archivo de salida
+            write_row(row)
+
+def _line_bounds(buffer, pos: int):
+    """
+    Devuelve (inicio, fin) de la línea del buffer que contiene la posición `pos`.
+    """
+    start = max(buffer.rfind(b'\n', 0, pos), buffer.rfind(b'\r', 0, pos)) + 1
+    ends = [e for e in (buffer.find(b'\n', pos), buffer.find(b'\r', pos)) if e >= 0]
+    return start, min(ends) if ends else len(buffer)
+
+def _parse_line_at(buffer, pos: int, row: Row, write_row, hits: list):
+    """
+    Decodifica la línea del buffer que contiene `pos` y la procesa con `parse_regex`.
+    """
+    start, end = _line_bounds(buffer, pos)
+    parse_regex([buffer[start:end].decode('utf-8', errors='replace')], row, write_row, hits)
+
+def parse_mmap(infile, row: Row, write_row, hits: list, stats: dict | None = None):
+    """
+    Motor de parseo sobre bytes: mapea el archivo en memoria y recorre el buffer
+    completo con `LINE_EVENTS.finditer`, sin decodificar ni partir en líneas.
+    Sólo se decodifican los campos capturados. Produce el mismo CSV que `parse_regex`.
+    
+    Cada coincidencia se aplica cuando llega la siguiente: si ambas caen en la
+    misma línea (caso anómalo), esa línea se decodifica y se delega en
+    `parse_regex` para respetar la prioridad original entre regex.
+    
+    Parámetros:
+      infile    - Archivo de entrada abierto en modo binario (comprimido o no)
+      row       - Fila en construcción
+      write_row - Función que escribe y reinicia la fila al llegar la línea CRC
+      hits      - Contadores de coincidencias por regex (orden de HIT_NAMES)
+      stats     - Si no es None, se cuentan las líneas del buffer (ver count_buffer)
+    """
+    if isinstance(infile, io.BufferedReader):
+        if os.fstat(infile.fileno()).st_size == 0:
+            # mmap no admite archivos vacíos
+            if stats is not None:
+                count_buffer(b'', stats)
+            return
+        mapped = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+    else:
+        # Entrada comprimida: mmap necesita un archivo real, así que se
+        # descomprime el contenido completo en memoria
+        mapped = nullcontext(infile.read())
+
+    def overflow_digits(pos: int):
+        # Dígitos inmediatamente anteriores a " overflows" (grupo (\d+) de OVERFLOW)
+        start = pos
+        while start > 0 and 48 <= buffer[start - 1] <= 57:
+            start -= 1
+        return buffer[start:pos]
+
+    def apply(match):
+        start = match.start()
+        first = buffer[start]
+        if first == 32: # " overflows"
+            hits[0] += 1
+            row.overflow_count += int(overflow_digits(start))
+
+        elif first == 114: # "rx msg: "
+            if mensaje := match.group(1):
+                hits[1] += 1
+                row.mensaje = mensaje.decode('utf-8', errors='replace')
+                row.numero = int(match.group(2))
+            else:
+                # Sin contador: la línea se procesa como en modo texto (strip y
+                # MESSAGE), que descarta los "rx msg: " con el mensaje vacío
+                _parse_line_at(buffer, start, row, write_row, hits)
+
+        elif first == 67: # "CRC ", final
+            hits[4] += 1
+            row.crc_error = match.group(12) == b"invalid"
+            # Escribir la fila en el archivo de salida
+            write_row(row)
+
+        elif buffer[start + 1] == 49: # "[1frame_sync_impl.cc]"
+            hits[2] += 1
+            row.my_sto = match.group(3).decode('ascii')
+
+        else: # "[frame_sync_impl.cc]"
+            hits[3] += 1
+            (row.cfo, row.sto, row.snr, row.k_hat, row.k_hat2, row.espacios, row.cfo_int2,
+             row.sto_estimate2) = [v.decode('ascii') for v in match.group(4, 5, 6, 7, 8, 9, 10, 11)]
+
+    with mapped as buffer:
+        if stats is not None:
+            count_buffer(buffer, stats)
+        find = buffer.find
+        pending = None
+        conflict = []
+        last_end = 0
+        for match in LINE_EVENTS.finditer(buffer):
+            start = match.start()
+            if buffer[start] == 32 and not overflow_digits(start):
+                # " overflows" sin contador: no es una coincidencia de OVERFLOW
+                continue
+            if pending and find(b'\n', last_end, start) < 0 and find(b'\r', last_end, start) < 0:
+                # Misma línea que la coincidencia anterior
+                conflict.append(match)
+            else:
+                if conflict:
+                    _parse_line_at(buffer, pending.start(), row, write_row, hits)
+                    conflict = []
+                elif pending:
+                    apply(pending)
+                pending = match
+            last_end = match.end()
+
+        if conflict:
+            _parse_line_at(buffer, pending.start(), row, write_row, hits)
+        elif pending:
+            apply(pending)
+
+# Motores de parseo disponibles (opción --engine)
+ENGINES = {
+    'regex': parse_regex,
+    'dispatch': parse_dispatch,
+    'mmap': parse_mmap,
+}
+
+# Motores que reciben el archivo de entrada en modo binario
+BINARY_ENGINES = {'mmap'}
+
 def gen_file_name(freq: str, distance: str, version: str, str_format: str):
     """
     Genera un nombre de archivo basado en la frecuencia, distancia y versión.
@@ -142,77 +421,217 @@ def gen_file_name(freq: str, distance: str, version: str, str_format: str):
     return str_format.format(freq=freq, distance=distance, version=version)
     
 
-def process_files(input_folder: str, output_folder: str, merge: bool, slow_down: float, separator: str):
-    # Asegurarse de que la carpeta de salida exista
+def parse_file_name(filename: str):
+    """
+    Extrae frecuencia, distancia y versión del nombre de un archivo de entrada.
+    
+    Parámetros:
+      filename - Nombre del archivo
+    
+    Devuelve:
+      Tupla (freq, distance, version) o None si el nombre no cumple ninguna regex.
+    """
+    if match := FILE_REGEX.match(filename): 
+        freq, distance, version = match.groups()
+    elif match := FILE_REGEX_EXTENDED.match(filename):
+        distance, freq, version = match.groups()
+    elif match := FILE_REGEX_EXTENDED2.match(filename):
+        distance, freq, _, __, version = match.groups()
+    else:
+        return None
+    return freq, distance, version
+
+def order_key(groups: tuple, filename: str):
+    """
+    Clave de orden de un archivo dentro de su grupo de merge: la versión.
+    """
+    return (int(groups[2]), filename)
+
+def follow_files(input_folder: str, output_folder: str, merge: bool, separator: str, engine: str = 'dispatch', poll_interval: float = 1.0):
+    """
+    Modo --follow: vigila la carpeta de entrada y procesa sólo los bytes que se
+    van añadiendo a cada log mientras el receptor sigue escribiendo. Cada fila
+    se escribe en el CSV (y en el merge) en cuanto llega su línea CRC.
+    
+    El checkpoint guarda, por archivo, el offset del final de la última fila
+    completa, el inodo del log y el tamaño de su CSV, más el tamaño de cada
+    merge. Al reiniciar se truncan las salidas a esos tamaños y se continúa
+    desde el offset, así que no se duplica ni se pierde ninguna fila. Si un log
+    se trunca o se reemplaza, su CSV vuelve a quedar sólo con el encabezado, su
+    merge se reconstruye con los demás miembros del grupo y se relee desde el
+    inicio.
+    
+    Parámetros:
+      input_folder  - Carpeta con los logs que están creciendo
+      output_folder - Carpeta de salida
+      merge         - Si se escriben también los archivos merge/{freq}-{distance}.csv
+      separator     - Separador para el archivo CSV
+      engine        - Motor de parseo de líneas (uno de texto, ver ENGINES)
+      poll_interval - Segundos entre sondeos (o timeout de inotify)
+    """
+    parse = ENGINES[engine]
     os.makedirs(output_folder, exist_ok=True)
+    merge_folder = os.path.join(output_folder, 'merge')
+    checkpoint = load_checkpoint(output_folder)
+    checkpoint.setdefault('files', {})
+    checkpoint.setdefault('merge', {})
+
     if merge:
-        os.makedirs(os.path.join(output_folder, 'merge'), exist_ok=True)
-        # Limpiar la carpeta merge si existe
-        merge_folder = os.path.join(output_folder, 'merge')
-        for file in os.listdir(merge_folder):
-            os.remove(os.path.join(merge_folder, file))
-    
-    # Listar los archivos que cumplen con la regex en la carpeta de entrada
-    files = [
-        f for f in os.listdir(input_folder) if 
-        FILE_REGEX.match(f)
-        or FILE_REGEX_EXTENDED.match(f)
-        or FILE_REGEX_EXTENDED2.match(f)
-        ]
-    
-    # Barra de carga para el procesamiento de archivos
-    for filename in tqdm(files, desc="Procesando archivos"):
-        # match = FILE_REGEX.match(filename) or \
-        #        FILE_REGEX_EXTENDED.match(filename) or \
-        #         FILE_REGEX_EXTENDED2.match(filename)
-        if match := FILE_REGEX.match(filename): 
-            freq, distance, version = match.groups()
-        elif match := FILE_REGEX_EXTENDED.match(filename):
-            distance, freq, version = match.groups()
-        elif match := FILE_REGEX_EXTENDED2.match(filename):
-            distance, freq, _, __, version = match.groups()
-        else:
-            continue
-        if match:
-            # freq, distance, version = match.groups()
-            input_file_path = os.path.join(input_folder, filename)
-            output_file_path = os.path.join(output_folder, filename.replace('.txt', '.csv'))
-            if merge:
-                merged_file_path = os.path.join(output_folder, 'merge', f'{freq}-{distance}.csv')
-            
-            with open(input_file_path, 'r', encoding='utf-8', errors='replace') as infile, \
-                 open(output_file_path, 'w', encoding='utf-8') as outfile:
+        os.makedirs(merge_folder, exist_ok=True)
+        if not checkpoint['merge']:
+            # Primera ejecución: misma limpieza que el modo por lotes
+            clean_folder(merge_folder)
+
+    def open_output(path: str, size: int | None):
+        # Abre una salida para añadir filas, descartando lo escrito después del
+        # último checkpoint; si es nueva se escribe el encabezado
+        if size is not None and os.path.isfile(path):
+            with open(path, 'r+', encoding='utf-8') as f:
+                f.truncate(size)
+            return open(path, 'a', encoding='utf-8')
+        f = open(path, 'w', encoding='utf-8')
+        set_header(f, separator)
+        return f
+
+    def reset_output(f):
+        # Deja una salida abierta sólo con el encabezado
+        f.seek(0)
+        f.truncate()
+        set_header(f, separator)
+
+    def save():
+        for f in followed.values():
+            f['outfile'].flush()
+            checkpoint['files'][os.path.basename(f['tail'].path)] = {'offset': f['offset'], 'inode': f['tail'].inode, 'csv_size': f['outfile'].tell()}
+        for group, merged_file in merged_files.items():
+            merged_file.flush()
+            checkpoint['merge'][group] = merged_file.tell()
+        save_checkpoint(output_folder, checkpoint)
+
+    def restart(filename: str):
+        # El log se truncó o se reemplazó: se descartan las filas que salieron
+        # de él y se vuelve a empezar como con un archivo nuevo
+        f = followed[filename]
+        reset_output(f['outfile'])
+        f['row'] = new_row()
+        f['offset'] = 0
+        if f['group'] is not None:
+            merged_file = merged_files[f['group']]
+            reset_output(merged_file)
+            members = [name for name, other in followed.items() if other['group'] == f['group'] and name != filename]
+            for name in sorted(members, key=lambda name: order_key(parse_file_name(name), name)):
+                followed[name]['outfile'].flush()
+                with open(followed[name]['csv_path'], 'r', encoding='utf-8') as member:
+                    member.readline()
+                    shutil.copyfileobj(member, merged_file)
+        save()
+
+    merged_files = {}
+    followed = {}
+    watcher = FolderWatcher(input_folder, poll_interval)
+    try:
+        while True:
+            # Los archivos nuevos se incorporan en cuanto aparecen
+            for filename in sorted(os.listdir(input_folder)):
+                if filename in followed or not (groups := parse_file_name(filename)):
+                    continue
+                if compression_of(filename):
+                    # Un archivo comprimido ya está cerrado: no hay nada que seguir
+                    continue
+                freq, distance, version = groups
+                state = checkpoint['files'].get(filename, {})
+                merged_file = None
                 if merge:
-                    # Check if merged file exists to write header
-                    file_exists = os.path.isfile(merged_file_path)
-                    with open(merged_file_path, 'a', encoding='utf-8') as merged_file:
-                        # Write header if file is new
-                        if not file_exists:
-                            set_header(merged_file, separator)
-                        pre_process(infile, outfile, merged_file, separator, freq, distance, version)
-                else:
-                    pre_process(infile, outfile, None, separator, freq, distance, version)
-                
-            # Opcional: mensaje de confirmación por archivo
-            # print(f"Procesado: {filename}")
-            sleep(slow_down)  # Simulación de tiempo de procesamiento
+                    group = f'{freq}-{distance}'
+                    if group not in merged_files:
+                        merged_files[group] = open_output(os.path.join(merge_folder, f'{group}.csv'), checkpoint['merge'].get(group))
+                    merged_file = merged_files[group]
+                csv_path = os.path.join(output_folder, output_name(filename))
+                outfile = open_output(csv_path, state.get('csv_size'))
+                row = new_row()
+                if state.get('offset'):
+                    # Ya se escribieron filas antes: el contador vuelve al valor tras un reinicio
+                    row.numero = -1
+                # Lotes de una fila: cada fila se escribe en cuanto llega su línea CRC
+                sink = RowSink([outfile, merged_file], separator, batch_rows=1)
+                followed[filename] = {
+                    'tail': Tail(os.path.join(input_folder, filename), state.get('offset', 0), state.get('inode'), lambda filename=filename: restart(filename)),
+                    'row': row,
+                    'outfile': outfile,
+                    'csv_path': csv_path,
+                    'group': group if merge else None,
+                    'write_row': row_writer(sink),
+                    'hits': [0] * len(HIT_NAMES),
+                    'offset': state.get('offset', 0),
+                }
+
+            changed = False
+            for filename, f in followed.items():
+                tail = f['tail']
+                written = 0
+
+                def write_row(row, write=f['write_row']):
+                    nonlocal written
+                    write(row)
+                    written += 1
+
+                for line, end in tail.read_lines():
+                    parse((line,), f['row'], write_row, f['hits'])
+                    if written:
+                        # Sólo se avanza el checkpoint al final de una fila completa
+                        f['offset'] = end
+                        written = 0
+                        changed = True
+
+            if changed:
+                save()
+
+            watcher.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+        for f in followed.values():
+            f['outfile'].close()
+        for merged_file in merged_files.values():
+            merged_file.close()
+
+# Dialecto GNU Radio para la orquestación común (preprocess_common.process_files)
+DIALECT = Dialect(
+    name='gnuradio',
+    parse_name=parse_file_name,
+    order_key=order_key,
+    pre_process=pre_process,
+    set_header=set_header,
+    schema=SCHEMA,
+    summary_columns=SUMMARY_COLUMNS,
+    hit_names=HIT_NAMES,
+    parser_version=PARSER_VERSION,
+    binary_engines=frozenset(BINARY_ENGINES),
+    options=('engine',),
+)
 
 def main():
-    parser = argparse.ArgumentParser(description="Script para procesar archivos según una regex")
-    parser.add_argument("--input_folder", default="base_txt",
-                        help="Carpeta de entrada con los archivos (por defecto: base_txt)")
-    parser.add_argument("--output_folder", default="preprocessed_csv",
-                        help="Carpeta de salida donde se guardarán los resultados (por defecto: preprocessed_csv)")
-    parser.add_argument("--slow-down", type=float, default=0.3,
-                        help="Tiempo de retardo en segundos durante el procesamiento de cada archivo (por defecto: 0.3)")
-    parser.add_argument("--separator", default=",",
-                        help="Separador para el archivo CSV (por defecto: ',')")
-    parser.add_argument("--merge", action='store_true', default=False,
-                        help="Si se establece, fusiona todos los archivos en uno solo")
+    parser = build_parser("Script para procesar archivos según una regex")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="regex",
+                        help="Motor de parseo de líneas: 'regex' (original), 'dispatch' (despacho por literales) o 'mmap' (regex de bytes sobre el archivo mapeado en memoria) (por defecto: regex)")
+    
+    parser.add_argument("--follow", action='store_true', default=False,
+                        help="Vigila la carpeta de entrada y procesa en vivo las líneas que se añaden a cada log")
+    parser.add_argument("--poll-interval", type=float, default=1.0,
+                        help="Segundos entre sondeos de la carpeta en modo --follow (por defecto: 1.0)")
     
     args = parser.parse_args()
+
+    if args.follow:
+        if args.engine in BINARY_ENGINES:
+            parser.error("--follow requiere un motor de texto (regex o dispatch)")
+        if args.compress:
+            parser.error("--follow no admite --compress (las salidas se truncan en cada reinicio)")
+        follow_files(args.input_folder, args.output_folder, args.merge, args.separator, args.engine, args.poll_interval)
+        return
     
-    process_files(args.input_folder, args.output_folder, args.merge, args.slow_down, args.separator)
+    run_cli(DIALECT, args, {'engine': args.engine})
 
 if __name__ == "__main__":
     main()
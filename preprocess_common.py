@@ -0,0 +1,992 @@
+#!/usr/bin/env python3
+"""
+Utilidades compartidas por los scripts de pre-procesado (preprocess.py y
+preprocess_neisser.py).
+"""
+import os
+import re
+import sys
+import gzip
+import lzma
+import json
+import signal
+import hashlib
+import shutil
+import argparse
+from collections import Counter
+from contextlib import nullcontext
+from dataclasses import dataclass
+from typing import Callable
+from time import perf_counter, sleep
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from src.summaries import SUMMARY_SUFFIX, RunSummary, merge_summaries, summary_path
+
+try:
+    # Opcional: notificaciones del kernel en Linux; sin ella se usa sondeo
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:
+    INotify = None
+
+try:
+    # Opcional: sólo se necesita para entradas o salidas .zst
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Carpeta (dentro de merge/) donde cada worker escribe su fragmento privado
+SHARDS_FOLDER = '.shards'
+
+# Archivo (dentro de la carpeta de salida) con los offsets del modo --follow
+CHECKPOINT_FILE = '.follow_checkpoint.json'
+
+# Archivo (dentro de la carpeta de salida) con el manifiesto del modo --incremental
+MANIFEST_FILE = '.manifest.json'
+
+# Formatos de salida (opción --format); los columnares se escriben junto al CSV
+OUTPUT_FORMATS = ('csv', 'parquet', 'feather')
+
+# Compresiones admitidas en las entradas (.txt.gz, ...) y en las salidas (opción --compress)
+COMPRESSIONS = ('gz', 'zst', 'xz')
+
+# Final de los nombres de entrada que aceptan las FILE_REGEX de ambos dialectos
+TXT_SUFFIX = r'[.]txt(?:[.](?:gz|zst|xz))?$'
+
+# Saltos de línea y líneas sin más que espacios de un buffer de bytes (count_buffer)
+LINE_BREAK = re.compile(rb'\r\n|\r|\n')
+BLANK_LINE = re.compile(rb'(?:\A|(?<=\n)|(?<=\r)(?!\n))[ \t\x0b\x0c\x1c-\x1f]*(?:\r\n|\r|\n|\Z)')
+
+# Filas que acumula RowSink antes de volcarlas a sus archivos
+SINK_BATCH_ROWS = 4096
+
+# Archivo (dentro de la carpeta de salida) con las pilas muestreadas por --profile
+PROFILE_FILE = 'profile.folded'
+
+# Intervalo de muestreo de --profile, en segundos de CPU
+PROFILE_INTERVAL = 0.001
+
+def clean_folder(folder: str):
+    """
+    Elimina todo el contenido de una carpeta (archivos y subcarpetas).
+    """
+    for file in os.listdir(folder):
+        path = os.path.join(folder, file)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+
+def compression_of(path: str):
+    """
+    Compresión indicada por la extensión del archivo ('gz', 'zst', 'xz') o None.
+    """
+    ext = path.rsplit('.', 1)[-1].lower()
+    return ext if ext in COMPRESSIONS else None
+
+def strip_compression(path: str):
+    """
+    Quita la extensión de compresión, si la hay ('x.csv.gz' -> 'x.csv').
+    """
+    return path[:path.rfind('.')] if compression_of(path) else path
+
+def output_name(filename: str, compress: str | None = None):
+    """
+    Nombre del CSV de salida de un archivo de entrada ('x.txt.gz' -> 'x.csv' o,
+    con compress='gz', 'x.csv.gz').
+    """
+    return re.sub(TXT_SUFFIX, '.csv', filename, flags=re.IGNORECASE) + (f'.{compress}' if compress else '')
+
+def open_file(path: str, mode: str = 'r'):
+    """
+    Abre un archivo de texto (UTF-8) o binario ('rb', 'wb'), comprimiéndolo o
+    descomprimiéndolo en streaming según su extensión (.gz, .zst, .xz). En
+    lectura de texto los bytes inválidos se reemplazan, como en las entradas sin
+    comprimir.
+    """
+    kind = compression_of(path)
+    binary = 'b' in mode
+    kwargs = {} if binary else {'encoding': 'utf-8', 'errors': 'replace' if 'r' in mode else 'strict'}
+    if kind is None:
+        return open(path, mode, **kwargs)
+
+    mode = mode if binary else mode + 't'
+    if kind == 'gz':
+        # Nivel 6 (el de gzip por línea de comandos): mucho más rápido que 9
+        return gzip.open(path, mode, compresslevel=6, **kwargs)
+    if kind == 'xz':
+        return lzma.open(path, mode, **kwargs)
+    if zstandard is None:
+        raise RuntimeError(f"Para leer o escribir {path} hace falta el paquete zstandard (pip install zstandard)")
+    return zstandard.open(path, mode, **kwargs)
+
+def shard_path(merge_folder: str, group: str, key: str):
+    """
+    Ruta del fragmento (shard) privado de un archivo dentro de un grupo de merge.
+
+    Parámetros:
+      merge_folder - Carpeta merge de la salida
+      group        - Nombre del grupo ({freq}-{distance})
+      key          - Identificador único del archivo dentro del grupo
+
+    Devuelve:
+      Ruta del fragmento.
+    """
+    return os.path.join(merge_folder, SHARDS_FOLDER, f'{group}--{key}.csv')
+
+def run_jobs(worker, jobs: list, workers: int, desc: str = "Procesando archivos"):
+    """
+    Ejecuta `worker(*job)` para cada trabajo, en un pool de procesos si workers > 1.
+
+    Parámetros:
+      worker  - Función a nivel de módulo (debe poder serializarse con pickle)
+      jobs    - Lista de tuplas de argumentos
+      workers - Número de procesos (1 o menos: secuencial)
+      desc    - Texto de la barra de progreso
+
+    Devuelve:
+      Lista de resultados en el mismo orden que `jobs`.
+    """
+    # tqdm se importa aquí: los módulos que sólo usan los helpers no lo cargan
+    from tqdm import tqdm
+
+    if workers <= 1 or len(jobs) <= 1:
+        return [worker(*job) for job in tqdm(jobs, desc=desc)]
+
+    results = [None] * len(jobs)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(worker, *job): i for i, job in enumerate(jobs)}
+        for future in tqdm(as_completed(futures), total=len(futures), desc=desc):
+            results[futures[future]] = future.result()
+    return results
+
+def concat_csv(dest_path: str, paths: list):
+    """
+    Concatena varios CSV con el mismo encabezado en `dest_path`, escribiendo el
+    encabezado una sola vez. Entradas y destino pueden estar comprimidos.
+
+    Parámetros:
+      dest_path - Ruta del CSV resultante
+      paths     - Rutas de los CSV a concatenar, en orden
+
+    Devuelve:
+      None
+    """
+    with open_file(dest_path, 'w') as merged_file:
+        for i, path in enumerate(paths):
+            with open_file(path, 'r') as part:
+                header = part.readline()
+                if i == 0:
+                    merged_file.write(header)
+                shutil.copyfileobj(part, merged_file)
+
+def merge_shards(merge_folder: str, shards: list, compress: str | None = None):
+    """
+    Concatena los fragmentos de cada grupo en `merge/{grupo}.csv` con un único
+    encabezado. Los fragmentos se ordenan por su clave (versión) para que el
+    resultado sea determinista sin importar el orden en que terminaron los workers.
+
+    Parámetros:
+      merge_folder - Carpeta merge de la salida
+      shards       - Lista de tuplas (grupo, clave_orden, ruta_fragmento)
+      compress     - Compresión del merge resultante (ver COMPRESSIONS) o None
+
+    Devuelve:
+      None
+    """
+    grupos = {}
+    for group, order_key, path in shards:
+        grupos.setdefault(group, []).append((order_key, path))
+
+    for group, members in grupos.items():
+        members.sort()
+        concat_csv(os.path.join(merge_folder, output_name(f'{group}.txt', compress)), [path for _, path in members])
+
+    shutil.rmtree(os.path.join(merge_folder, SHARDS_FOLDER), ignore_errors=True)
+
+def file_hash(path: str):
+    """
+    SHA-256 del contenido de un archivo, leído por bloques.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def load_manifest(output_folder: str):
+    """
+    Lee el manifiesto del modo --incremental; devuelve un diccionario vacío si no existe.
+    """
+    path = os.path.join(output_folder, MANIFEST_FILE)
+    if not os.path.isfile(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_manifest(output_folder: str, manifest: dict):
+    """
+    Guarda el manifiesto del modo --incremental de forma atómica.
+    """
+    path = os.path.join(output_folder, MANIFEST_FILE)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+def plan_incremental(input_folder: str, members: dict, manifest: dict, settings: dict):
+    """
+    Compara las entradas actuales con el manifiesto de la ejecución anterior.
+
+    Un archivo se considera sin cambios si coinciden tamaño y mtime o, si no,
+    su hash de contenido, y además su CSV de salida sigue existiendo. Si cambian
+    los ajustes (versión del parser, separador, merge) se reprocesa todo.
+
+    Parámetros:
+      input_folder - Carpeta de entrada
+      members      - Diccionario nombre -> (grupo, clave_orden, ruta_csv_salida)
+      manifest     - Manifiesto anterior (ver load_manifest)
+      settings     - Ajustes que invalidan todas las salidas si cambian
+
+    Devuelve:
+      Tupla (pendientes, grupos_afectados, manifiesto_nuevo), con los nombres de
+      archivo a procesar y los grupos de merge que hay que reconstruir.
+    """
+    old = manifest.get('files', {}) if manifest.get('settings') == settings else {}
+    files = {}
+    pending = []
+    stale_groups = set()
+
+    for filename, (group, _, output_path) in members.items():
+        stat = os.stat(os.path.join(input_folder, filename))
+        entry = old.get(filename)
+        if entry and entry['group'] == group and os.path.isfile(output_path):
+            if entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+                files[filename] = entry
+                continue
+            digest = file_hash(os.path.join(input_folder, filename))
+            if entry['size'] == stat.st_size and entry['sha256'] == digest:
+                # Sólo cambió el mtime (p. ej. se copió de nuevo el mismo archivo)
+                files[filename] = dict(entry, mtime_ns=stat.st_mtime_ns)
+                continue
+        else:
+            digest = file_hash(os.path.join(input_folder, filename))
+
+        files[filename] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest, 'group': group}
+        pending.append(filename)
+        stale_groups.add(group)
+
+    # Las entradas que desaparecieron también invalidan su grupo
+    for filename, entry in old.items():
+        if filename not in members:
+            stale_groups.add(entry['group'])
+
+    return pending, stale_groups, {'settings': settings, 'files': files}
+
+def remove_outputs(csv_path: str):
+    """
+    Elimina un CSV de salida (con cualquier compresión) junto con su resumen y
+    sus versiones columnares.
+    """
+    csv_path = strip_compression(csv_path)
+    base = os.path.splitext(csv_path)[0]
+    paths = [csv_path, *(f'{csv_path}.{ext}' for ext in COMPRESSIONS), summary_path(csv_path), *(f'{base}.{fmt}' for fmt in OUTPUT_FORMATS if fmt != 'csv')]
+    for path in paths:
+        if os.path.isfile(path):
+            os.remove(path)
+
+def rebuild_merge_groups(merge_folder: str, members: dict, groups: set, compress: str | None = None):
+    """
+    Reconstruye `merge/{grupo}.csv` para los grupos indicados concatenando los
+    CSV por archivo de sus miembros (ordenados por clave), sin volver a parsear.
+    Un grupo sin miembros se elimina, con su resumen y su versión columnar.
+
+    Parámetros:
+      merge_folder - Carpeta merge de la salida
+      members      - Diccionario nombre -> (grupo, clave_orden, ruta_csv_salida)
+      groups       - Grupos a reconstruir
+      compress     - Compresión del merge (ver COMPRESSIONS) o None
+    """
+    for group in groups:
+        paths = [path for _, path in sorted((order, path) for g, order, path in members.values() if g == group)]
+        merged_file_path = os.path.join(merge_folder, output_name(f'{group}.txt', compress))
+        if paths:
+            concat_csv(merged_file_path, paths)
+        else:
+            remove_outputs(merged_file_path)
+
+class Tail:
+    """
+    Lee incrementalmente las líneas completas añadidas a un archivo que sigue
+    creciendo. Una línea a medio escribir se deja para la siguiente lectura.
+
+    Si el archivo se trunca (es más corto que el offset) o se reemplaza por
+    otro (cambia su inodo, aunque sea del mismo tamaño o mayor), se vuelve a
+    leer desde el inicio y antes se llama a on_reset() para que quien lo sigue
+    descarte lo que escribió a partir del archivo anterior.
+    """
+
+    def __init__(self, path: str, offset: int = 0, inode: int | None = None, on_reset=None):
+        self.path = path
+        self.offset = offset
+        self.inode = inode
+        self.on_reset = on_reset
+
+    def read_lines(self):
+        """
+        Devuelve una lista de tuplas (línea, offset_fin) con las líneas completas
+        escritas desde la última lectura, decodificadas igual que en modo texto.
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return []
+        size = stat.st_size
+        if size < self.offset or (self.inode is not None and stat.st_ino != self.inode):
+            # El archivo se truncó o se reemplazó: se vuelve a leer desde el inicio
+            self.offset = 0
+            if self.on_reset is not None:
+                self.on_reset()
+        self.inode = stat.st_ino
+        if size == self.offset:
+            return []
+
+        with open(self.path, 'rb') as infile:
+            infile.seek(self.offset)
+            data = infile.read(size - self.offset)
+
+        lines = []
+        pos = self.offset
+        pieces = data.splitlines(keepends=True)
+        for i, piece in enumerate(pieces):
+            last = i == len(pieces) - 1
+            # Una línea sin salto, o que termina en '\r' al final del bloque
+            # (puede ser la mitad de un '\r\n'), todavía no está completa
+            if last and (not piece.endswith((b'\n', b'\r')) or piece.endswith(b'\r')):
+                break
+            pos += len(piece)
+            lines.append((piece.decode('utf-8', errors='replace'), pos))
+        self.offset = pos
+        return lines
+
+class FolderWatcher:
+    """
+    Espera cambios en una carpeta: con inotify si está disponible (Linux con
+    `inotify_simple`) y, si no, por sondeo cada `poll_interval` segundos.
+    """
+
+    def __init__(self, folder: str, poll_interval: float = 1.0):
+        self.poll_interval = poll_interval
+        self.inotify = None
+        if INotify is not None:
+            try:
+                self.inotify = INotify()
+                self.inotify.add_watch(folder, inotify_flags.MODIFY | inotify_flags.CREATE | inotify_flags.MOVED_TO | inotify_flags.CLOSE_WRITE)
+            except OSError:
+                self.inotify = None
+
+    def wait(self):
+        if self.inotify is not None:
+            # El timeout asegura que un evento perdido no bloquee indefinidamente
+            self.inotify.read(timeout=int(self.poll_interval * 1000), read_delay=50)
+        else:
+            sleep(self.poll_interval)
+
+    def close(self):
+        if self.inotify is not None:
+            self.inotify.close()
+
+def load_checkpoint(output_folder: str):
+    """
+    Lee el checkpoint del modo --follow; devuelve un diccionario vacío si no existe.
+    """
+    path = os.path.join(output_folder, CHECKPOINT_FILE)
+    if not os.path.isfile(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_checkpoint(output_folder: str, checkpoint: dict):
+    """
+    Guarda el checkpoint del modo --follow de forma atómica (archivo temporal + rename).
+    """
+    path = os.path.join(output_folder, CHECKPOINT_FILE)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+def write_columnar(csv_path: str, fmt: str, schema: dict, separator: str = ','):
+    """
+    Escribe junto a un CSV ya generado su versión columnar tipada (mismo nombre
+    con extensión .parquet o .feather), aplicando el esquema declarado del dialecto.
+    Además de las columnas del CSV se añade `mensaje_prefijo` (texto antes del
+    contador) como categórica.
+
+    Parámetros:
+      csv_path  - Ruta del CSV de origen
+      fmt       - 'parquet' o 'feather' ('csv' no hace nada)
+      schema    - Diccionario columna -> dtype de pandas
+      separator - Separador del CSV
+    """
+    if fmt == 'csv':
+        return
+    # Dependencias opcionales: sólo se necesitan con --format parquet|feather
+    import pandas as pd
+
+    df = pd.read_csv(csv_path, sep=separator, dtype={'mensaje': str})
+    for col, dtype in schema.items():
+        if col not in df.columns:
+            continue
+        if dtype == 'bool':
+            df[col] = df[col].fillna(0).astype(bool)
+        elif dtype not in ('str', 'category'):
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(dtype)
+        else:
+            df[col] = df[col].astype(dtype)
+    if 'mensaje' in df.columns:
+        df.insert(df.columns.get_loc('mensaje') + 1, 'mensaje_prefijo', df['mensaje'].str.rsplit(':', n=1).str[0].astype('category'))
+
+    path = os.path.splitext(strip_compression(csv_path))[0] + f'.{fmt}'
+    if fmt == 'parquet':
+        df.to_parquet(path, index=False)
+    else:
+        df.to_feather(path)
+
+def write_columnar_merge(merge_folder: str, fmt: str, schema: dict, separator: str = ',', groups=None):
+    """
+    Escribe la versión columnar de los archivos de merge/ (de los grupos
+    indicados, o de todos si groups es None).
+    """
+    if fmt == 'csv':
+        return
+    for file in sorted(os.listdir(merge_folder)):
+        group, ext = os.path.splitext(strip_compression(file))
+        if ext == '.csv' and (groups is None or group in groups):
+            write_columnar(os.path.join(merge_folder, file), fmt, schema, separator)
+
+def write_merge_summaries(merge_folder: str, members: dict, groups=None):
+    """
+    Escribe `merge/{grupo}.summary.json` combinando los resúmenes por archivo de
+    los miembros de cada grupo (de los grupos indicados, o de todos si es None).
+
+    Parámetros:
+      merge_folder - Carpeta merge de la salida
+      members      - Diccionario nombre -> (grupo, clave_orden, ruta_csv_salida)
+      groups       - Grupos a reescribir
+    """
+    by_group = {}
+    for group, order, path in members.values():
+        by_group.setdefault(group, []).append((order, path))
+    for group in (by_group if groups is None else groups):
+        path = os.path.join(merge_folder, f'{group}{SUMMARY_SUFFIX}')
+        summary = merge_summaries([summary_path(p) for _, p in sorted(by_group.get(group, []))])
+        if summary:
+            summary.save(path)
+        elif os.path.isfile(path):
+            os.remove(path)
+
+class RowSink:
+    """
+    Salida por lotes de las filas de ambos dialectos. Cada fila se serializa
+    una sola vez y se guarda en el lote; al llenarse, el lote se une en un único
+    bloque de texto que se escribe en todos los archivos (CSV de la corrida,
+    merge o fragmento), en vez de una escritura por fila y archivo.
+
+    Las filas siguen RFC 4180, como csv.writer: el mensaje va siempre entre
+    comillas con las comillas internas duplicadas, y el resto de columnas se
+    escribe tal cual salvo si contiene el separador, comillas o un salto de
+    línea (p. ej. un número con --separator '.'), en cuyo caso también se cita.
+
+    Parámetros:
+      files      - Archivos de salida (los None se ignoran)
+      separator  - Separador para el archivo CSV
+      summary    - RunSummary que se actualiza con cada fila, o None
+      batch_rows - Filas por lote (1 escribe cada fila al llegar)
+    """
+    __slots__ = ('files', 'separator', 'summary', 'batch', 'batch_rows', 'special')
+
+    def __init__(self, files: list, separator: str, summary: RunSummary | None = None, batch_rows: int = SINK_BATCH_ROWS):
+        self.files = [f for f in files if f is not None]
+        self.separator = separator
+        self.summary = summary
+        self.batch = []
+        self.batch_rows = batch_rows
+        # Caracteres que obligan a citar un valor
+        self.special = re.compile('|'.join(re.escape(c) for c in (separator, '"', '\r', '\n')))
+
+    def write(self, mensaje: str, values: list):
+        """
+        Añade una fila: el mensaje y los valores (como texto) del resto de columnas.
+        """
+        if '"' in mensaje:
+            quoted = mensaje.replace('"', '""')
+        else:
+            quoted = mensaje
+        fields = values
+        if self.special.search(''.join(values)):
+            fields = [quote_field(v) if self.special.search(v) else v for v in values]
+        batch = self.batch
+        batch.append(f'"{quoted}"{self.separator}{self.separator.join(fields)}\n')
+        if self.summary:
+            self.summary.add(mensaje, values)
+        if len(batch) >= self.batch_rows:
+            self.flush()
+
+    def flush(self):
+        """
+        Escribe el lote pendiente en todos los archivos.
+        """
+        if self.batch:
+            block = ''.join(self.batch)
+            for f in self.files:
+                f.write(block)
+            self.batch.clear()
+
+def quote_field(value: str):
+    """
+    Cita un campo del CSV (RFC 4180): entre comillas, con las internas duplicadas.
+    """
+    return '"' + value.replace('"', '""') + '"'
+
+def header_line(columns: list, separator: str):
+    """
+    Línea de encabezado del CSV, citando los nombres que lo necesiten (p. ej.
+    'rssi (dBm)' con --separator ' ').
+    """
+    return separator.join(quote_field(c) if separator in c or '"' in c else c for c in columns) + '\n'
+
+def instrument_rows(write_row, stats: dict):
+    """
+    Envuelve write_row para contar filas emitidas (y con mensaje) y medir el
+    tiempo de escritura. Los totales se acumulan en `stats`.
+    """
+    stats.update(rows_emitted=0, rows_with_message=0, write_seconds=0.0)
+
+    def timed_write_row(row):
+        stats['rows_emitted'] += 1
+        if row.mensaje:
+            stats['rows_with_message'] += 1
+        start = perf_counter()
+        write_row(row)
+        stats['write_seconds'] += perf_counter() - start
+
+    return timed_write_row
+
+def count_lines(lines, stats: dict):
+    """
+    Recorre las líneas de entrada contando, en el mismo bucle del parseo,
+    cuántas hay y cuántas están vacías (stats['lines'], stats['blank_lines']).
+    Al terminar deja en stats['bytes_read'] los bytes leídos ya descomprimidos
+    (posición final del flujo binario bajo el archivo de texto).
+    """
+    count = blank = 0
+    for line in lines:
+        count += 1
+        if not line.strip():
+            blank += 1
+        yield line
+    stats['lines'] = count
+    stats['blank_lines'] = blank
+    try:
+        stats['bytes_read'] = lines.buffer.tell()
+    except (AttributeError, OSError):
+        stats['bytes_read'] = None
+
+def count_buffer(buffer, stats: dict):
+    """
+    Versión de count_lines para un buffer de bytes ya en memoria (motor mmap):
+    mismos saltos de línea que la lectura en modo texto (\n, \r\n y \r).
+    """
+    if not len(buffer):
+        stats.update(lines=0, blank_lines=0, bytes_read=0)
+        return
+    breaks = len(LINE_BREAK.findall(buffer))
+    ends_open = buffer[-1:] not in (b'\n', b'\r')
+    blank = len(BLANK_LINE.findall(buffer)) - (not ends_open)
+    stats.update(lines=breaks + ends_open, blank_lines=blank, bytes_read=len(buffer))
+
+class SamplingProfiler:
+    """
+    Perfilador por muestreo (sólo Unix): cada PROFILE_INTERVAL segundos de CPU
+    una señal SIGPROF anota la pila actual. Las pilas se guardan en formato
+    "folded" (marco;marco;marco -> muestras), el que usan flamegraph.pl y speedscope.
+    Se usa como contexto alrededor del bucle de parseo.
+    """
+    def __init__(self, interval: float = PROFILE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+
+    def _sample(self, signum, frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+            frame = frame.f_back
+        self.stacks[';'.join(reversed(stack))] += 1
+
+    def __enter__(self):
+        if not hasattr(signal, 'setitimer'):
+            print("--profile no está disponible en esta plataforma", file=sys.stderr)
+            return self
+        self._previous = signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        return self
+
+    def __exit__(self, *exc):
+        if hasattr(signal, 'setitimer'):
+            signal.setitimer(signal.ITIMER_PROF, 0, 0)
+            signal.signal(signal.SIGPROF, self._previous)
+        return False
+
+def file_metrics(input_path: str, dialect: str, engine: str, hit_names: tuple, hits: list, stats: dict, total_seconds: float):
+    """
+    Construye el registro de instrumentación de un archivo procesado.
+
+    Parámetros:
+      input_path    - Archivo de entrada
+      dialect       - Dialecto ('gnuradio' o 'neisser')
+      engine        - Motor de parseo usado
+      hit_names     - Nombre de cada regex, en el orden de `hits`
+      hits          - Coincidencias por regex
+      stats         - Totales de instrument_rows y de count_lines/count_buffer
+      total_seconds - Tiempo total de pre_process
+
+    Devuelve:
+      Diccionario con los bytes del archivo en disco (comprimidos si lo está) y
+      los leídos ya descomprimidos, líneas leídas, coincidencias por regex,
+      líneas sin coincidencia (no vacías), filas emitidas y descartadas
+      (paquetes cuyo mensaje llegó pero no su línea final CRC/RSSI) y tiempos
+      de parseo y escritura. Las líneas se cuentan durante el parseo; el
+      archivo no se vuelve a leer.
+    """
+    hits = dict(zip(hit_names, hits))
+    lines, blank = stats['lines'], stats['blank_lines']
+    return {
+        'file': os.path.basename(input_path),
+        'dialect': dialect,
+        'engine': engine,
+        'bytes': os.path.getsize(input_path),
+        'bytes_read': stats['bytes_read'],
+        'lines': lines,
+        'blank_lines': blank,
+        'hits': hits,
+        'unmatched_lines': max(lines - blank - sum(hits.values()), 0),
+        'rows_emitted': stats['rows_emitted'],
+        'rows_dropped': max(hits['MESSAGE'] - stats['rows_with_message'], 0),
+        'parse_seconds': round(total_seconds - stats['write_seconds'], 6),
+        'write_seconds': round(stats['write_seconds'], 6),
+    }
+
+def write_metrics_log(path: str, records: list):
+    """
+    Añade los registros de instrumentación (uno por archivo) a un log JSON lines.
+    """
+    with open(path, 'a', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps({k: v for k, v in record.items() if k != 'profile'}) + '\n')
+
+def write_prometheus(path: str, records: list):
+    """
+    Escribe los registros en formato de texto de Prometheus (para el textfile
+    collector de node_exporter), de forma atómica.
+    """
+    gauges = [
+        ('bytes', 'Bytes leídos del disco (comprimidos si la entrada lo está)'),
+        ('bytes_read', 'Bytes parseados, ya descomprimidos'),
+        ('lines', 'Líneas leídas del archivo de entrada'),
+        ('unmatched_lines', 'Líneas no vacías sin coincidencia con ninguna regex'),
+        ('rows_emitted', 'Filas escritas en el CSV'),
+        ('rows_dropped', 'Paquetes descartados porque no llegó su línea final'),
+        ('parse_seconds', 'Tiempo de parseo en segundos'),
+        ('write_seconds', 'Tiempo de escritura en segundos'),
+    ]
+    out = []
+    for key, help_text in gauges:
+        out.append(f'# HELP iot_ingest_{key} {help_text}')
+        out.append(f'# TYPE iot_ingest_{key} gauge')
+        for r in records:
+            if r[key] is not None:
+                out.append(f'iot_ingest_{key}{{dialect="{r["dialect"]}",engine="{r["engine"]}",file="{r["file"]}"}} {r[key]}')
+    out.append('# HELP iot_ingest_regex_hits Coincidencias por regex')
+    out.append('# TYPE iot_ingest_regex_hits gauge')
+    for r in records:
+        for regex, count in r['hits'].items():
+            out.append(f'iot_ingest_regex_hits{{dialect="{r["dialect"]}",engine="{r["engine"]}",file="{r["file"]}",regex="{regex}"}} {count}')
+
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        f.write('\n'.join(out) + '\n')
+    os.replace(path + '.tmp', path)
+
+def export_instrumentation(records: list, output_folder: str, metrics_log: str | None, prometheus: str | None, profile: bool):
+    """
+    Exporta los registros de instrumentación devueltos por los workers: log
+    JSON lines, textfile de Prometheus y, con --profile, las pilas muestreadas
+    de todos los archivos en `<salida>/profile.folded` más un resumen por consola.
+    """
+    records = [r for r in records if r]
+    if not records:
+        return
+    if metrics_log:
+        write_metrics_log(metrics_log, records)
+    if prometheus:
+        write_prometheus(prometheus, records)
+    if profile:
+        stacks = Counter()
+        for record in records:
+            stacks.update(record.get('profile', {}))
+        with open(os.path.join(output_folder, PROFILE_FILE), 'w', encoding='utf-8') as f:
+            for stack, count in stacks.most_common():
+                f.write(f'{stack} {count}\n')
+        leaves = Counter()
+        for stack, count in stacks.items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        total = sum(leaves.values()) or 1
+        print(f"Perfil ({total} muestras, pilas completas en {os.path.join(output_folder, PROFILE_FILE)}):")
+        for leaf, count in leaves.most_common(10):
+            print(f"  {100 * count / total:5.1f} %  {leaf}")
+
+@dataclass(frozen=True)
+class Dialect:
+    """
+    Lo que distingue a un dialecto de log (GNU Radio, Neisser) para la
+    orquestación común: process_file, process_incremental y process_files
+    sólo dependen de estos campos. Todos los campos son funciones de nivel de
+    módulo o datos, así que el dialecto viaja por pickle a los workers.
+
+    name            - Nombre del dialecto (registros de instrumentación, ingest)
+    parse_name      - nombre de archivo -> (freq, distance, version) o None
+                      (version es None si el dialecto no la tiene)
+    order_key       - (grupos, nombre) -> clave de orden dentro del merge
+    pre_process     - (infile, outfile, merged_file, separator, freq, distance,
+                      version, summary=, stats=, **opciones)
+    set_header      - (outfile, separator) escribe el encabezado del CSV
+    schema          - Esquema de la salida columnar
+    summary_columns - Columnas numéricas del CSV que se resumen en línea
+    hit_names       - Nombre de cada regex en los contadores de coincidencias
+    parser_version  - Versión del formato de salida (manifiesto de --incremental)
+    binary_engines  - Motores (opción 'engine') que leen la entrada en binario
+    options         - Opciones de línea de comandos que acepta pre_process (p. ej. ('engine',))
+    """
+    name: str
+    parse_name: Callable
+    order_key: Callable
+    pre_process: Callable
+    set_header: Callable
+    schema: dict
+    summary_columns: list
+    hit_names: tuple
+    parser_version: str
+    binary_engines: frozenset = frozenset()
+    options: tuple = ()
+
+    def group(self, groups: tuple):
+        """
+        Grupo de merge de un archivo: '{freq}-{distance}'.
+        """
+        return f'{groups[0]}-{groups[1]}'
+
+def process_file(dialect: Dialect, input_file_path: str, output_file_path: str, merged_file_path: str | None, separator: str, groups: tuple, slow_down: float = 0.0, options: dict | None = None, fmt: str = 'csv', summary: bool = False, instrument: bool = False, profile: bool = False):
+    """
+    Procesa un único archivo de entrada. Se ejecuta tanto en el modo secuencial
+    como dentro de los workers del modo paralelo (por eso es de nivel de módulo).
+    
+    Parámetros:
+      dialect          - Dialecto del archivo (ver Dialect)
+      input_file_path  - Ruta del archivo txt de entrada
+      output_file_path - Ruta del csv de salida
+      merged_file_path - Ruta del archivo combinado (o fragmento) o None
+      separator        - Separador para el archivo CSV
+      groups           - Grupos extraídos del nombre del archivo (dialect.parse_name)
+      slow_down        - Retardo en segundos después de procesar el archivo
+      options          - Opciones propias del dialecto para pre_process (p. ej. {'engine': 'mmap'})
+      fmt              - Formato de salida adicional al CSV (ver OUTPUT_FORMATS)
+      summary          - Si se escribe el resumen en línea junto al CSV (ver RunSummary)
+      instrument       - Si se devuelve el registro de instrumentación del archivo
+      profile          - Si se muestrea el parseo con SamplingProfiler (implica instrument)
+    
+    Devuelve:
+      Registro de instrumentación (ver file_metrics) o None.
+    """
+    options = options or {}
+    engine = options.get('engine', 'regex')
+    freq, distance, version = groups
+    run_summary = RunSummary(dialect.summary_columns) if summary else None
+    stats = {} if instrument or profile else None
+    profiler = SamplingProfiler() if profile else nullcontext()
+    start = perf_counter()
+    # Entradas y salidas comprimidas (.gz, .zst, .xz) se tratan en streaming
+    infile = open_file(input_file_path, 'rb' if engine in dialect.binary_engines else 'r')
+
+    with infile, open_file(output_file_path, 'w') as outfile, profiler:
+        if merged_file_path:
+            # Si el archivo combinado es nuevo, se le escribe el encabezado
+            file_exists = os.path.isfile(merged_file_path)
+            with open(merged_file_path, 'a', encoding='utf-8') as merged_file:
+                if not file_exists:
+                    dialect.set_header(merged_file, separator)
+                dialect.pre_process(infile, outfile, merged_file, separator, freq, distance, version, summary=run_summary, stats=stats, **options)
+        else:
+            dialect.pre_process(infile, outfile, None, separator, freq, distance, version, summary=run_summary, stats=stats, **options)
+
+    elapsed = perf_counter() - start
+
+    write_columnar(output_file_path, fmt, dialect.schema, separator)
+    if run_summary:
+        run_summary.save(summary_path(output_file_path))
+
+    sleep(slow_down)  # Simulación de tiempo de procesamiento
+
+    if stats is None:
+        return None
+    record = file_metrics(input_file_path, dialect.name, engine, dialect.hit_names, stats['hits'], stats, elapsed)
+    if profile:
+        record['profile'] = dict(profiler.stacks)
+    return record
+
+def process_incremental(dialect: Dialect, input_folder: str, output_folder: str, members: dict, merge: bool, slow_down: float, separator: str, workers: int, options: dict | None = None, fmt: str = 'csv', summary: bool = False, instrument: bool = False, profile: bool = False, compress: str | None = None):
+    """
+    Modo --incremental: sólo se procesan las entradas nuevas o modificadas según
+    el manifiesto de la carpeta de salida, y sólo se reconstruyen los grupos de
+    merge con algún miembro cambiado (a partir de los CSV por archivo). Las
+    salidas de las entradas que ya no existen se eliminan.
+    
+    Parámetros:
+      members - Diccionario nombre -> (grupo, clave_orden, ruta_csv_salida)
+      (el resto como en process_files)
+    
+    Devuelve:
+      Registros de instrumentación de los archivos procesados.
+    """
+    settings = {'parser_version': dialect.parser_version, 'separator': separator, 'merge': merge, 'format': fmt, 'summary': summary, 'compress': compress}
+    previous = load_manifest(output_folder)
+    pending, stale_groups, manifest = plan_incremental(input_folder, members, previous, settings)
+    for filename in previous.get('files', {}):
+        if filename not in members:
+            remove_outputs(os.path.join(output_folder, output_name(filename)))
+
+    jobs = []
+    for filename in pending:
+        jobs.append((dialect, os.path.join(input_folder, filename), members[filename][2], None, separator, dialect.parse_name(filename), slow_down, options, fmt, summary, instrument, profile))
+    records = run_jobs(process_file, jobs, workers)
+
+    if merge:
+        rebuild_merge_groups(os.path.join(output_folder, 'merge'), members, stale_groups, compress)
+        write_columnar_merge(os.path.join(output_folder, 'merge'), fmt, dialect.schema, separator, stale_groups)
+        if summary:
+            write_merge_summaries(os.path.join(output_folder, 'merge'), members, stale_groups)
+    save_manifest(output_folder, manifest)
+    return records
+
+def process_files(dialect: Dialect, input_folder: str, output_folder: str, merge: bool, slow_down: float, separator: str, workers: int = 1, options: dict | None = None, incremental: bool = False, fmt: str = 'csv', summary: bool = False, metrics_log: str | None = None, prometheus: str | None = None, profile: bool = False, compress: str | None = None):
+    """
+    Procesa todos los archivos de un dialecto de la carpeta de entrada.
+
+    Parámetros:
+      dialect       - Dialecto de los archivos (ver Dialect)
+      input_folder  - Carpeta de entrada
+      output_folder - Carpeta de salida
+      merge         - Si se escriben también los archivos merge/{freq}-{distance}.csv
+      slow_down     - Retardo en segundos después de procesar cada archivo
+      separator     - Separador para el archivo CSV
+      workers       - Número de procesos
+      options       - Opciones propias del dialecto para pre_process (p. ej. {'engine': 'mmap'})
+      incremental   - Sólo se procesan las entradas nuevas o modificadas (ver process_incremental)
+      fmt, summary, metrics_log, prometheus, profile, compress - Ver las opciones de la línea de comandos
+    """
+    # Asegurarse de que la carpeta de salida exista
+    os.makedirs(output_folder, exist_ok=True)
+    merge_folder = os.path.join(output_folder, 'merge')
+    if merge:
+        os.makedirs(merge_folder, exist_ok=True)
+        # Limpiar la carpeta merge si existe
+        if not incremental:
+            clean_folder(merge_folder)
+    
+    # Instrumentación por archivo (--metrics-log, --prometheus, --profile)
+    instrument = bool(metrics_log or prometheus or profile)
+
+    # Listar los archivos que cumplen con la regex en la carpeta de entrada
+    files = {f: groups for f in sorted(os.listdir(input_folder)) if (groups := dialect.parse_name(f))}
+
+    if incremental:
+        members = {}
+        for filename, groups in files.items():
+            members[filename] = (dialect.group(groups), dialect.order_key(groups, filename), os.path.join(output_folder, output_name(filename, compress)))
+        records = process_incremental(dialect, input_folder, output_folder, members, merge, slow_down, separator, workers, options, fmt, summary, instrument, profile, compress)
+        export_instrumentation(records, output_folder, metrics_log, prometheus, profile)
+        return
+
+    # Con varios workers cada archivo escribe su propio fragmento de merge, que
+    # se concatena al final; así ningún proceso comparte un archivo en modo append.
+    # Con salida comprimida también se usan fragmentos (sin comprimir), para
+    # comprimir cada merge de una vez en lugar de añadirle miembros
+    parallel = workers > 1 or bool(compress)
+    if merge and parallel:
+        os.makedirs(os.path.join(merge_folder, SHARDS_FOLDER), exist_ok=True)
+
+    jobs = []
+    shards = []
+    members = {}
+    for filename, groups in files.items():
+        input_file_path = os.path.join(input_folder, filename)
+        output_file_path = os.path.join(output_folder, output_name(filename, compress))
+        merged_file_path = None
+        if merge:
+            group = dialect.group(groups)
+            order_key = dialect.order_key(groups, filename)
+            members[filename] = (group, order_key, output_file_path)
+            if parallel:
+                merged_file_path = shard_path(merge_folder, group, output_name(filename)[:-len('.csv')])
+                shards.append((group, order_key, merged_file_path))
+            else:
+                merged_file_path = os.path.join(merge_folder, f'{group}.csv')
+        jobs.append((dialect, input_file_path, output_file_path, merged_file_path, separator, groups, slow_down, options, fmt, summary, instrument, profile))
+
+    # Barra de carga para el procesamiento de archivos
+    records = run_jobs(process_file, jobs, workers)
+
+    if shards:
+        merge_shards(merge_folder, shards, compress)
+    if merge:
+        write_columnar_merge(merge_folder, fmt, dialect.schema, separator)
+        if summary:
+            write_merge_summaries(merge_folder, members)
+    export_instrumentation(records, output_folder, metrics_log, prometheus, profile)
+
+def build_parser(description: str):
+    """
+    Parser de línea de comandos con las opciones comunes a los scripts de
+    pre-procesado; cada script añade las suyas (p. ej. --engine, --follow).
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--input_folder", default="base_txt",
+                        help="Carpeta de entrada con los archivos (por defecto: base_txt)")
+    parser.add_argument("--output_folder", default="preprocessed_csv",
+                        help="Carpeta de salida donde se guardarán los resultados (por defecto: preprocessed_csv)")
+    parser.add_argument("--slow-down", type=float, default=0.0,
+                        help="Tiempo de retardo en segundos durante el procesamiento de cada archivo (por defecto: 0)")
+    parser.add_argument("--separator", default=",",
+                        help="Separador para el archivo CSV (por defecto: ',')")
+    parser.add_argument("--merge", action='store_true', default=False,
+                        help="Si se establece, fusiona todos los archivos en uno solo")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Número de procesos para procesar archivos en paralelo (por defecto: 1)")
+    parser.add_argument("--incremental", action='store_true', default=False,
+                        help="Sólo procesa las entradas nuevas o modificadas según el manifiesto de la carpeta de salida")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="csv",
+                        help="Formato de salida: 'csv' o, además del CSV, un archivo columnar tipado 'parquet' o 'feather' (por defecto: csv)")
+    parser.add_argument("--metrics-log", default=None,
+                        help="Añade a este archivo JSON lines un registro de instrumentación por archivo (bytes, líneas, coincidencias por regex, filas emitidas/descartadas, tiempos)")
+    parser.add_argument("--prometheus", default=None,
+                        help="Escribe la instrumentación por archivo en este archivo de texto de Prometheus (textfile collector)")
+    parser.add_argument("--profile", action='store_true', default=False,
+                        help="Muestrea el parseo con un perfilador por señales y guarda las pilas en <output_folder>/profile.folded")
+    parser.add_argument("--compress", choices=COMPRESSIONS, default=None,
+                        help="Comprime los CSV de salida y los merge (gz, zst o xz); las entradas comprimidas se leen siempre sin descomprimir a disco")
+    parser.add_argument("--summary", action='store_true', default=False,
+                        help="Escribe junto a cada CSV (y a cada merge) un resumen .summary.json con conteos, CRC, overflows y estadísticos de cada columna")
+    return parser
+
+def run_cli(dialect: Dialect, args, options: dict | None = None):
+    """
+    Ejecuta process_files con los argumentos de build_parser.
+    """
+    process_files(dialect, args.input_folder, args.output_folder, args.merge, args.slow_down, args.separator, args.workers, options,
+                  args.incremental, args.format, args.summary, args.metrics_log, args.prometheus, args.profile, args.compress)
@@ -1,11 +1,9 @@
 #!/usr/bin/env python3
-import os
 import re
-import argparse
-from tqdm import tqdm
 from dataclasses import dataclass
 from io import TextIOWrapper
-from time import sleep
+from time import perf_counter
+from preprocess_common import Dialect, RowSink, RunSummary, TXT_SUFFIX, build_parser, count_lines, header_line, instrument_rows, run_cli
 
 # Regex de las Líneas
 numbers = r"[+-]?(?:(?:\d+(?:\.\d*)?)|\.\d+)(?:[eE][+-]?\d+)?"
@@ -15,8 +13,26 @@ MESSAGE = re.compile(f"Received string: (.+:(\\d+))") #?
 DATA = re.compile(f"RSSI: ({numbers}) dBm, SNR: ({numbers}) dB") #?
 
 
+# Nombre de cada regex en los contadores de coincidencias (instrumentación)
+HIT_NAMES = ('SIZE', 'MESSAGE', 'DATA')
+
+# Versión del formato de salida; cambiarla invalida el manifiesto de --incremental
+PARSER_VERSION = "2"
+
+# Esquema de la salida columnar (--format parquet|feather)
+SCHEMA = {
+    'mensaje': 'str',
+    'numero': 'Int32',
+    'rssi (dBm)': 'float32',
+    'snr (dB)': 'float32',
+    'size (bytes)': 'Int16',
+}
+
+# Columnas numéricas del CSV que se resumen en línea (opción --summary)
+SUMMARY_COLUMNS = [col for col in SCHEMA if col != 'mensaje']
+
 # Clase de lineas csv dataclass
-@dataclass
+@dataclass(slots=True)
 class Row:
     mensaje: str            # *
     numero: int             # *
@@ -25,7 +41,8 @@ class Row:
     size: str     # *
 
 # Expresión regular para filtrar los archivos
-FILE_REGEX = re.compile(r'^(\d+[m])(\d+msps)[.]txt$', re.IGNORECASE)
+# (también comprimidos: .txt.gz, .txt.zst, .txt.xz)
+FILE_REGEX = re.compile(r'^(\d+[m])(\d+msps)' + TXT_SUFFIX, re.IGNORECASE)
 
 def set_header(outfile: TextIOWrapper, separator: str):
     """
@@ -39,9 +56,9 @@ def set_header(outfile: TextIOWrapper, separator: str):
       None
     """
     # Escribiendo encabezado en el archivo de salida
-    outfile.write(f'mensaje{separator}numero{separator}rssi (dBm){separator}snr (dB){separator}size (bytes)\n')
+    outfile.write(header_line(['mensaje', 'numero', 'rssi (dBm)', 'snr (dB)', 'size (bytes)'], separator))
 
-def pre_process(infile: TextIOWrapper, outfile: TextIOWrapper, merged_file: TextIOWrapper| None, separator: str, freq, distance, version):
+def pre_process(infile: TextIOWrapper, outfile: TextIOWrapper, merged_file: TextIOWrapper| None, separator: str, freq, distance, version, summary: RunSummary | None = None, stats: dict | None = None):
     """
     Función de pre-procesado (aún sin implementación).
     
@@ -51,6 +68,8 @@ def pre_process(infile: TextIOWrapper, outfile: TextIOWrapper, merged_file: Text
       freq     - Frecuencia de muestreo (primer grupo de la regex)
       distance - Distancia (segundo grupo de la regex)
       version  - Versión (tercer grupo de la regex)
+      summary  - RunSummary que se actualiza con cada fila, o None
+      stats    - Diccionario donde se dejan los contadores de instrumentación, o None
     
     La función se encargará de leer el contenido del archivo de entrada y escribir
     el resultado en el archivo de salida. Por ahora, simplemente copia el contenido.
@@ -58,14 +77,13 @@ def pre_process(infile: TextIOWrapper, outfile: TextIOWrapper, merged_file: Text
     #escribiendo encabezado en el archivo de salida
     set_header(outfile, separator)
 
+    sink = RowSink([outfile, merged_file], separator, summary)
+    write = sink.write
+
     # Función para escribir en el archivo de salida
     def write_row(row: Row):
-        # Convertir el dataclass a una cadena CSV
-        values = [f'"{row.mensaje}"', str(row.numero), row.rssi, row.snr, row.size]
-        outfile.write(separator.join(values) + '\n')
-        if merged_file:
-            # Escribir en el archivo combinado
-            merged_file.write(separator.join(values) + '\n')
+        # Convertir el dataclass a las columnas del CSV (el mensaje aparte, lo cita el sink)
+        write(row.mensaje, [str(row.numero), row.rssi, row.snr, row.size])
 
         row.mensaje = ""
         row.numero = 0
@@ -73,16 +91,25 @@ def pre_process(infile: TextIOWrapper, outfile: TextIOWrapper, merged_file: Text
         row.snr = ""
         row.size = ""
 
+    if stats is not None:
+        write_row = instrument_rows(write_row, stats)
+        infile = count_lines(infile, stats)
+
     # Aquí se implementará el pre-procesado deseado.
     row = Row(mensaje="", numero="", rssi="", snr="", size="")
 
+    # Coincidencias por regex, en el orden de HIT_NAMES
+    hits = [0] * len(HIT_NAMES)
     for line in infile:
         if match := SIZE.search(line):
+            hits[0] += 1
             row.size = match.group(2)
         elif match := MESSAGE.search(line):
+            hits[1] += 1
             row.mensaje = match.group(1)
             row.numero = int(match.group(2))
         elif match := DATA.search(line):
+            hits[2] += 1
             row.rssi = match.group(1)
             row.snr = match.group(2)
             write_row(row)
@@ -90,6 +117,12 @@ def pre_process(infile: TextIOWrapper, outfile: TextIOWrapper, merged_file: Text
             # Si no hay coincidencias, continuar con la siguiente línea
             continue
 
+    flush_start = perf_counter()
+    sink.flush()
+    if stats is not None:
+        stats['write_seconds'] += perf_counter() - flush_start
+        stats['hits'] = hits
+
 def gen_file_name(freq: str, distance: str, version: str, str_format: str):
     """
     Genera un nombre de archivo basado en la frecuencia, distancia y versión.
@@ -106,62 +139,42 @@ def gen_file_name(freq: str, distance: str, version: str, str_format: str):
     return str_format.format(freq=freq, distance=distance, version=version)
     
 
-def process_files(input_folder: str, output_folder: str, merge: bool, slow_down: float, separator: str):
-    # Asegurarse de que la carpeta de salida exista
-    os.makedirs(output_folder, exist_ok=True)
-    if merge:
-        os.makedirs(os.path.join(output_folder, 'merge'), exist_ok=True)
-        # Limpiar la carpeta merge si existe
-        merge_folder = os.path.join(output_folder, 'merge')
-        for file in os.listdir(merge_folder):
-            os.remove(os.path.join(merge_folder, file))
-    
-    # Listar los archivos que cumplen con la regex en la carpeta de entrada
-    files = [f for f in os.listdir(input_folder) if FILE_REGEX.match(f)]
+def parse_file_name(filename: str):
+    """
+    Extrae los grupos del nombre de un archivo de entrada.
     
-    # Barra de carga para el procesamiento de archivos
-    for filename in tqdm(files, desc="Procesando archivos"):
-        match = FILE_REGEX.match(filename)
-        if match:
-            freq, distance = match.groups()
-            input_file_path = os.path.join(input_folder, filename)
-            output_file_path = os.path.join(output_folder, filename.replace('.txt', '.csv'))
-            if merge:
-                merged_file_path = os.path.join(output_folder, 'merge', f'{freq}-{distance}.csv')
-            
-            with open(input_file_path, 'r', encoding='utf-8', errors='replace') as infile, \
-                 open(output_file_path, 'w', encoding='utf-8') as outfile:
-                if merge:
-                    # Check if merged file exists to write header
-                    file_exists = os.path.isfile(merged_file_path)
-                    with open(merged_file_path, 'a', encoding='utf-8') as merged_file:
-                        # Write header if file is new
-                        if not file_exists:
-                            set_header(merged_file, separator)
-                        pre_process(infile, outfile, merged_file, separator, freq, distance, None)
-                else:
-                    pre_process(infile, outfile, None, separator, freq, distance, None)
-                
-            # Opcional: mensaje de confirmación por archivo
-            # print(f"Procesado: {filename}")
-            sleep(slow_down)  # Simulación de tiempo de procesamiento
+    Devuelve:
+      Tupla (grupo1, grupo2, None) de FILE_REGEX (los archivos Neisser no tienen
+      versión; el grupo de merge es '{grupo1}-{grupo2}') o None si el nombre no
+      cumple la regex.
+    """
+    if match := FILE_REGEX.match(filename):
+        return (*match.groups(), None)
+    return None
+
+def order_key(groups: tuple, filename: str):
+    """
+    Clave de orden de un archivo dentro de su grupo de merge: sin versión, el nombre.
+    """
+    return filename
+
+# Dialecto Neisser para la orquestación común (preprocess_common.process_files)
+DIALECT = Dialect(
+    name='neisser',
+    parse_name=parse_file_name,
+    order_key=order_key,
+    pre_process=pre_process,
+    set_header=set_header,
+    schema=SCHEMA,
+    summary_columns=SUMMARY_COLUMNS,
+    hit_names=HIT_NAMES,
+    parser_version=PARSER_VERSION,
+)
 
 def main():
-    parser = argparse.ArgumentParser(description="Script para procesar archivos según una regex")
-    parser.add_argument("--input_folder", default="base_txt",
-                        help="Carpeta de entrada con los archivos (por defecto: base_txt)")
-    parser.add_argument("--output_folder", default="preprocessed_csv",
-                        help="Carpeta de salida donde se guardarán los resultados (por defecto: preprocessed_csv)")
-    parser.add_argument("--slow-down", type=float, default=0.3,
-                        help="Tiempo de retardo en segundos durante el procesamiento de cada archivo (por defecto: 0.3)")
-    parser.add_argument("--separator", default=",",
-                        help="Separador para el archivo CSV (por defecto: ',')")
-    parser.add_argument("--merge", action='store_true', default=False,
-                        help="Si se establece, fusiona todos los archivos en uno solo")
-    
+    parser = build_parser("Script para procesar archivos según una regex")
     args = parser.parse_args()
-    
-    process_files(args.input_folder, args.output_folder, args.merge, args.slow_down, args.separator)
+    run_cli(DIALECT, args)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,165 @@
+import os
+import re
+import sqlite3
+import pandas as pd
+from src.data_processes import load_csv
+
+# Mismos patrones que FILE_REGEX* de preprocess.py y preprocess_neisser.py, pero
+# sobre las salidas ya pre-procesadas (csv, también comprimido, parquet o feather)
+_EXT = r'[.](?:csv(?:[.](?:gz|zst|xz))?|parquet|feather)$'
+FILE_REGEX = re.compile(r'^(\d+[mk])-(\d+m)-(\d+)' + _EXT, re.IGNORECASE)
+FILE_REGEX_EXTENDED = re.compile(r'^(\d+[m])-(\d+MSPs)-(\d+)' + _EXT, re.IGNORECASE)
+FILE_REGEX_EXTENDED2 = re.compile(r'^(\d+[m])-(\d+MSPs)-(\d+sf)-(\d+khz)-(\d+)' + _EXT, re.IGNORECASE)
+FILE_REGEX_NEISSER = re.compile(r'^(\d+[m])(\d+msps)' + _EXT, re.IGNORECASE)
+
+TEST_REGEX = re.compile(r'^prueba_(\d+)$')
+DATE_REGEX = re.compile(r'(\d{2}-\d{2}-\d{4})')
+
+INDEX_FILE = 'catalog.sqlite'
+
+# Columnas de metadatos que load() añade a cada corrida (como categóricas,
+# salvo distancia, que se usa numérica en los modelos de propagación)
+METADATA = ['test', 'fecha', 'dialecto', 'msps', 'sf', 'bw_khz', 'version']
+
+# Columnas enteras del índice que pueden faltar (p. ej. sf en las pruebas 1-3)
+_INT_COLUMNS = ['test', 'msps', 'sf', 'bw_khz', 'version']
+
+def _number(text):
+    return int(re.match(r'\d+', text).group()) if text else None
+
+def parse_name(filename):
+    """
+    Extrae los metadatos codificados en el nombre de una corrida.
+
+    Devuelve un diccionario con distancia, msps, sf, bw_khz, version y dialecto,
+    o None si el nombre no cumple ningún patrón.
+    """
+    sf = bw = version = None
+    if match := FILE_REGEX.match(filename):
+        freq, distance, version = match.groups()
+        dialect = 'gnuradio'
+    elif match := FILE_REGEX_EXTENDED.match(filename):
+        distance, freq, version = match.groups()
+        dialect = 'gnuradio'
+    elif match := FILE_REGEX_EXTENDED2.match(filename):
+        distance, freq, sf, bw, version = match.groups()
+        dialect = 'gnuradio'
+    elif match := FILE_REGEX_NEISSER.match(filename):
+        distance, freq = match.groups()
+        dialect = 'neisser'
+    else:
+        return None
+
+    return {
+        'distancia': float(_number(distance)),
+        'msps': _number(freq),
+        'sf': _number(sf),
+        'bw_khz': _number(bw),
+        'version': _number(version),
+        'dialecto': dialect,
+    }
+
+def scan(root='data'):
+    """
+    Recorre una sola vez el árbol de datos (data/prueba_N/<carpeta>/) y devuelve
+    un DataFrame con una fila por corrida pre-procesada. Se ignoran las carpetas
+    merge/ y, si una corrida existe en varios formatos, se registra una vez.
+    """
+    registros = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d != 'merge' and not d.startswith('.'))
+        parts = os.path.relpath(dirpath, root).split(os.sep)
+        test = TEST_REGEX.match(parts[0]) if parts else None
+        if not test:
+            continue
+        folder = parts[-1]
+        date = DATE_REGEX.search(folder)
+
+        for filename in sorted(filenames):
+            meta = parse_name(filename)
+            if meta is None:
+                continue
+            name = re.sub(_EXT, '', filename, flags=re.IGNORECASE)
+            key = (dirpath, name)
+            if key in registros:
+                continue
+            if folder.lower().startswith('neisser'):
+                meta['dialecto'] = 'neisser'
+            registros[key] = {
+                'test': int(test.group(1)),
+                'fecha': date.group(1) if date else None,
+                'directorio': dirpath + os.sep,
+                'nombre': name,
+                **meta,
+            }
+
+    index = pd.DataFrame(list(registros.values()), columns=['test', 'fecha', 'directorio', 'nombre', 'distancia', 'msps', 'sf', 'bw_khz', 'version', 'dialecto'])
+    return index.astype({col: 'Int64' for col in _INT_COLUMNS})
+
+def build_index(root='data', index_path=None):
+    """
+    Escanea el árbol de datos y persiste el índice en SQLite (por defecto
+    `<root>/catalog.sqlite`). Devuelve el índice como DataFrame.
+    """
+    index_path = index_path or os.path.join(root, INDEX_FILE)
+    index = scan(root)
+    with sqlite3.connect(index_path) as con:
+        index.to_sql('corridas', con, if_exists='replace', index=False)
+    return index
+
+def read_index(root='data', index_path=None, refresh=False):
+    """
+    Lee el índice persistido; lo construye si no existe o si refresh=True.
+    """
+    index_path = index_path or os.path.join(root, INDEX_FILE)
+    if refresh or not os.path.isfile(index_path):
+        return build_index(root, index_path)
+    with sqlite3.connect(index_path) as con:
+        index = pd.read_sql('SELECT * FROM corridas', con)
+    return index.astype({col: 'Int64' for col in _INT_COLUMNS})
+
+def query(root='data', refresh=False, **filtros):
+    """
+    Filtra el índice. Cada filtro es un valor o una lista de valores sobre las
+    columnas del índice; se aceptan los alias test, msps, sf, bw, distance,
+    dialect, version y date.
+
+    Ejemplo:
+      query(test=4, msps=[2, 8])
+    """
+    alias = {'bw': 'bw_khz', 'distance': 'distancia', 'dialect': 'dialecto', 'date': 'fecha'}
+    index = read_index(root, refresh=refresh)
+    mask = pd.Series(True, index=index.index)
+    for key, value in filtros.items():
+        col = alias.get(key, key)
+        if col not in index.columns:
+            raise ValueError(f"Filtro desconocido: {key}")
+        values = value if isinstance(value, (list, tuple, set)) else [value]
+        mask &= index[col].isin(values)
+    return index[mask].reset_index(drop=True)
+
+def load(root='data', refresh=False, **filtros):
+    """
+    Carga y concatena todas las corridas que cumplen los filtros (ver query),
+    con las columnas de metadatos ya añadidas. `muestras` de load_csv se toma
+    de los MSPs de cada corrida.
+
+    Ejemplo:
+      df = catalog.load(test=4, msps=2)
+    """
+    corridas = query(root, refresh, **filtros)
+    if corridas.empty:
+        return pd.DataFrame()
+
+    frames = []
+    for corrida in corridas.itertuples(index=False):
+        df = load_csv(corrida.directorio, corrida.nombre, muestras=corrida.msps)
+        df['distancia'] = corrida.distancia
+        for col in METADATA:
+            df[col] = getattr(corrida, col)
+        frames.append(df)
+
+    df = pd.concat(frames, ignore_index=True)
+    for col in METADATA:
+        df[col] = df[col].astype('category')
+    return df
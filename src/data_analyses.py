@@ -1,8 +1,60 @@
+import numpy as np
 import pandas as pd
-from scipy.stats import f_oneway, kruskal, levene, shapiro
-from pingouin import welch_anova
+from concurrent.futures import ProcessPoolExecutor
+from src.summaries import Accumulator, RunSummary
+
+def _acumulador(valores):
+    # Accumulator de una columna de un bloque, calculado de forma vectorizada
+    valores = valores[~np.isnan(valores)]
+    acc = Accumulator()
+    if not len(valores):
+        return acc
+    acc.n = len(valores)
+    acc.mean = float(valores.mean())
+    acc.m2 = float(((valores - acc.mean) ** 2).sum())
+    acc.min = float(valores.min())
+    acc.max = float(valores.max())
+
+    positivos = valores[valores > 1e-12]
+    negativos = -valores[valores < -1e-12]
+    acc.zero = int(len(valores) - len(positivos) - len(negativos))
+    for cubetas, lado in ((acc.positive, positivos), (acc.negative, negativos)):
+        claves, conteos = np.unique(np.ceil(np.log(lado) / Accumulator._log_gamma).astype(np.int64), return_counts=True)
+        cubetas.update(zip(claves.tolist(), conteos.tolist()))
+    return acc
+
+def resumir_chunks(chunks):
+    """
+    Recorre un iterador de bloques (ver iter_csv / iter_runs) y lo reduce a un
+    RunSummary, con memoria acotada al tamaño de un bloque. Se resumen las
+    mismas columnas que DataFrame.describe(): las numéricas, sin las bool.
+    """
+    summary = None
+    for chunk in chunks:
+        columnas = chunk.select_dtypes(include='number', exclude='bool').columns.tolist()
+        parcial = RunSummary(columnas)
+        if 'mensaje' in chunk.columns:
+            parcial.paquetes = int(chunk['mensaje'].count())
+        if 'crc_error' in chunk.columns:
+            parcial.con_crc = True
+            parcial.crc_ok = int((chunk['crc_error'] == 0).sum())
+            parcial.crc_err = int((chunk['crc_error'] == 1).sum())
+        if 'previous_overflow_sum' in chunk.columns:
+            parcial.con_overflow = True
+            parcial.overflow_sum = int(chunk['previous_overflow_sum'].sum())
+        for col in columnas:
+            parcial.metricas[col] = _acumulador(chunk[col].to_numpy(dtype=np.float64, na_value=np.nan))
+        summary = parcial if summary is None else summary.merge(parcial)
+    return summary or RunSummary([])
 
 def stats_paquetes(df):
+    # También acepta un RunSummary (ver load_summary) o un iterador de bloques
+    # (ver iter_runs): no hace falta tener todas las filas en memoria
+    if not isinstance(df, (pd.DataFrame, RunSummary)):
+        df = resumir_chunks(df)
+    if isinstance(df, RunSummary):
+        return _stats_paquetes_resumen(df)
+
     resumen = {}
 
     if 'mensaje' in df.columns:
@@ -21,16 +73,62 @@ def stats_paquetes(df):
 
     return pd.DataFrame([resumen])
 
+def _stats_paquetes_resumen(summary):
+    return pd.DataFrame([summary.packet_stats()])
+
 def describir_metricas(df):
+    # También acepta un RunSummary o un iterador de bloques; en ese caso los
+    # cuartiles salen del sketch (aproximados, error relativo de 1 %)
+    if not isinstance(df, (pd.DataFrame, RunSummary)):
+        df = resumir_chunks(df)
+    if isinstance(df, RunSummary):
+        return _describir_resumen(df)
     cols = df.select_dtypes(include=['number']).columns.tolist()
     return df[cols].describe()
 
-def comparar_metricas_por_distancia(df, metrica, columna_grupo='distancia'):
-    grupos = [grupo[metrica].dropna() for _, grupo in df.groupby(columna_grupo)]
+def _describir_resumen(summary):
+    tabla = {}
+    for col in summary.columns:
+        acc = summary.metricas[col]
+        vacio = acc.n == 0
+        tabla[col] = [acc.n, np.nan if vacio else acc.mean, acc.std(), np.nan if vacio else acc.min,
+                      acc.quantile(0.25), acc.quantile(0.5), acc.quantile(0.75), np.nan if vacio else acc.max]
+    return pd.DataFrame(tabla, index=['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max'], dtype=float)
 
-    grupos = [g for g in grupos if len(g) > 0]
+def welch_anova_vectorizado(n, media, varianza):
+    """
+    ANOVA de Welch para varias métricas a la vez a partir de los estadísticos
+    de cada grupo (mismo resultado que pingouin.welch_anova).
+
+    Parámetros:
+      n, media, varianza - Arrays de forma (grupos, métricas); varianza con ddof=1
+
+    Devuelve:
+      Tupla (F, p) con un valor por métrica.
+    """
+    from scipy.stats import f as f_dist
+
+    n = np.asarray(n, dtype=float)
+    media = np.asarray(media, dtype=float)
+    varianza = np.asarray(varianza, dtype=float)
+    k = n.shape[0]
+
+    w = n / varianza
+    sw = w.sum(axis=0)
+    media_w = (w * media).sum(axis=0) / sw
+    numerador = (w * (media - media_w) ** 2).sum(axis=0) / (k - 1)
+    lam = 3 * ((1 - w / sw) ** 2 / (n - 1)).sum(axis=0) / (k ** 2 - 1)
+    F = numerador / (1 + 2 * lam * (k - 2) / 3)
+    p = f_dist.sf(F, k - 1, 1 / lam)
+    return F, p
+
+def _comparar_grupos(metrica, grupos):
+    # Elige y ejecuta el test según normalidad (Shapiro) y homocedasticidad (Levene)
+    from scipy.stats import f_oneway, kruskal, levene, shapiro
+
+    tamanos = [len(g) for g in grupos]
     if len(grupos) < 2:
-        return {"metrica": metrica, "test": "Insuficiente", "p-valor": None}
+        return {"metrica": metrica, "test": "Insuficiente", "estadistico": None, "p-valor": None, "n_grupos": len(grupos), "tamanos": tamanos}
 
     normal = all(shapiro(g)[1] > 0.05 for g in grupos)
 
@@ -43,13 +141,193 @@ def comparar_metricas_por_distancia(df, metrica, columna_grupo='distancia'):
             test = "ANOVA"
         else:
             # Varianzas desiguales → Welch ANOVA
-            resultado = welch_anova(data=df[[columna_grupo, metrica]].dropna(), dv=metrica, between=columna_grupo)
-            stat = resultado["F"].iloc[0]
-            p = resultado["p-unc"].iloc[0]
+            F, p = welch_anova_vectorizado(
+                [[len(g)] for g in grupos], [[np.mean(g)] for g in grupos], [[np.var(g, ddof=1)] for g in grupos])
+            stat, p = F[0], p[0]
             test = "ANOVA de Welch"
     else:
         # No hay normalidad → Kruskal-Wallis
         stat, p = kruskal(*grupos)
         test = "Kruskal-Wallis"
 
-    return {"metrica": metrica, "test": test, "p-valor": p}
\ No newline at end of file
+    return {"metrica": metrica, "test": test, "estadistico": float(stat), "p-valor": float(p), "n_grupos": len(grupos), "tamanos": tamanos}
+
+def comparar_metricas_por_distancia(df, metrica, columna_grupo='distancia'):
+    grupos = [grupo[metrica].dropna() for _, grupo in df.groupby(columna_grupo)]
+
+    grupos = [g for g in grupos if len(g) > 0]
+    resultado = _comparar_grupos(metrica, [g.to_numpy() for g in grupos])
+    return {"metrica": metrica, "test": resultado["test"], "p-valor": resultado["p-valor"]}
+
+def comparar_metricas(df, metricas, columna_grupo='distancia', por=None, workers=1):
+    """
+    Versión por lotes de comparar_metricas_por_distancia: agrupa una sola vez y
+    ejecuta la matriz métrica × estrato (p. ej. cada MSPs) en un pool de procesos.
+
+    Parámetros:
+      df            - DataFrame con todas las corridas concatenadas
+      metricas      - Lista de métricas a comparar
+      columna_grupo - Factor cuyos niveles se comparan (p. ej. distancia)
+      por           - Columna o lista de columnas de estratificación (p. ej. 'msps');
+                      se obtiene una fila por estrato y métrica
+      workers       - Número de procesos (1: secuencial)
+
+    Devuelve:
+      DataFrame ordenado con estrato, métrica, test elegido, estadístico,
+      p-valor, número de grupos y tamaño de cada grupo.
+    """
+    por = [por] if isinstance(por, str) else list(por or [])
+    metricas = [m for m in metricas if m in df.columns]
+
+    # Una sola agrupación para todas las métricas
+    tareas = []
+    estratos = df.groupby(por, sort=True, observed=True) if por else [((), df)]
+    for clave, sub in estratos:
+        clave = clave if isinstance(clave, tuple) else (clave,)
+        niveles = [grupo[metricas] for _, grupo in sub.groupby(columna_grupo, sort=True, observed=True)]
+        for metrica in metricas:
+            grupos = [g[metrica].dropna().to_numpy() for g in niveles]
+            tareas.append((clave, metrica, [g for g in grupos if len(g) > 0]))
+
+    if workers > 1 and len(tareas) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            resultados = list(pool.map(_comparar_grupos, [t[1] for t in tareas], [t[2] for t in tareas]))
+    else:
+        resultados = [_comparar_grupos(metrica, grupos) for _, metrica, grupos in tareas]
+
+    filas = [dict(zip(por, clave), **resultado) for (clave, _, _), resultado in zip(tareas, resultados)]
+    return pd.DataFrame(filas, columns=por + ["metrica", "test", "estadistico", "p-valor", "n_grupos", "tamanos"])
+
+# Columnas por las que se agrupan por defecto los modelos de propagación
+# (configuración del enlace y receptor, ver catalog.load)
+GRUPOS_PROPAGACION = ['dialecto', 'msps', 'sf', 'bw_khz']
+
+# Máximo de elementos (remuestreos × filas) por bloque del bootstrap
+BOOTSTRAP_BLOQUE = 4_000_000
+
+def _minimos_cuadrados(sx, sy, sxx, sxy, n):
+    # Recta y = a + b·x a partir de las sumas de cada grupo (sirve para arrays
+    # de cualquier forma); NaN si x no varía dentro del grupo
+    with np.errstate(divide='ignore', invalid='ignore'):
+        det = n * sxx - sx ** 2
+        b = np.where(det > 1e-12 * n * n, (n * sxy - sx * sy) / det, np.nan)
+        a = (sy - b * sx) / n
+    return a, b
+
+def ajustar_modelos_propagacion(df, por=None, metrica='rssi (dBm)', n_bootstrap=1000, nivel=0.95, semilla=0):
+    """
+    Ajusta a la vez el modelo log-distancia de todos los grupos de una campaña:
+    metrica ≈ a + b·log10(distancia), con exponente de pérdida n = -b / 10.
+
+    Los coeficientes salen de mínimos cuadrados en forma cerrada sobre las
+    sumas de cada grupo (una pasada con bincount) y los intervalos de confianza
+    de un bootstrap no paramétrico vectorizado: cada remuestreo elige filas con
+    reemplazo dentro de su grupo, para todos los grupos y remuestreos a la vez
+    (por bloques de BOOTSTRAP_BLOQUE elementos).
+
+    Parámetros:
+      df          - DataFrame con las corridas concatenadas y la columna distancia
+      por         - Columna o lista de columnas de agrupación (por defecto, las
+                    de GRUPOS_PROPAGACION presentes en df)
+      metrica     - Columna de potencia a modelar (por defecto 'rssi (dBm)')
+      n_bootstrap - Número de remuestreos (0: sin intervalos)
+      nivel       - Nivel de confianza de los intervalos percentiles
+      semilla     - Semilla del generador
+
+    Devuelve:
+      DataFrame con una fila por grupo: muestras, distancias, intercepto,
+      pendiente, n, r2, rmse y, con bootstrap, intercepto_inf/sup y n_inf/sup.
+      El dibujo es un paso aparte (ver plot_modelos_propagacion).
+    """
+    por = [por] if isinstance(por, str) else list(por or [col for col in GRUPOS_PROPAGACION if col in df.columns])
+    validas = df[metrica].notna() & df['distancia'].notna() & (df['distancia'] > 0)
+    datos = df.loc[validas, por + ['distancia', metrica]]
+
+    if por:
+        agrupado = datos.groupby(por, sort=True, observed=True, dropna=False)
+        indice = agrupado.size().index
+        codigos = agrupado.ngroup().to_numpy()
+    else:
+        indice = pd.RangeIndex(1)
+        codigos = np.zeros(len(datos), dtype=np.int64)
+    g = len(indice)
+
+    # Filas ordenadas por grupo: cada grupo ocupa un tramo contiguo
+    orden = np.argsort(codigos, kind='stable')
+    codigos = codigos[orden]
+    distancia = datos['distancia'].to_numpy(dtype=np.float64)[orden]
+    x = np.log10(distancia)
+    y = datos[metrica].to_numpy(dtype=np.float64)[orden]
+
+    def sumar(valores):
+        return np.bincount(codigos, weights=valores, minlength=g)
+
+    n = sumar(None)
+    sx, sy, sxx, sxy, syy = sumar(x), sumar(y), sumar(x * x), sumar(x * y), sumar(y * y)
+    a, b = _minimos_cuadrados(sx, sy, sxx, sxy, n)
+
+    # Suma de cuadrados residual a partir de las mismas sumas
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sse = syy - 2 * a * sy - 2 * b * sxy + a * a * n + 2 * a * b * sx + b * b * sxx
+        sst = syy - sy ** 2 / n
+        r2 = 1 - sse / sst
+        rmse = np.sqrt(np.maximum(sse, 0) / n)
+
+    # Distancias distintas por grupo: pares (grupo, distancia) únicos
+    pares = np.unique(np.stack([codigos.astype(np.float64), distancia]), axis=1)
+    distancias = np.bincount(pares[0].astype(np.int64), minlength=g)
+
+    resultado = pd.DataFrame({
+        'muestras': n.astype(np.int64),
+        'distancias': distancias,
+        'intercepto': a,
+        'pendiente': b,
+        'n': -b / 10,
+        'r2': r2,
+        'rmse': rmse,
+    }, index=indice)
+
+    if n_bootstrap > 0 and len(x):
+        a_boot, b_boot = _bootstrap_propagacion(x, y, codigos, n, n_bootstrap, semilla)
+        alfa = (1 - nivel) / 2
+        a_inf, a_sup = _percentiles(a_boot, alfa)
+        n_inf, n_sup = _percentiles(-b_boot / 10, alfa)
+        resultado['intercepto_inf'] = a_inf
+        resultado['intercepto_sup'] = a_sup
+        resultado['n_inf'] = n_inf
+        resultado['n_sup'] = n_sup
+
+    return resultado.reset_index() if por else resultado.reset_index(drop=True)
+
+def _percentiles(boot, alfa):
+    # Intervalo percentil de cada grupo ignorando los remuestreos sin recta
+    # (NaN); un grupo sin ninguno válido (p. ej. una sola distancia) queda en
+    # NaN sin pasar por nanquantile, que avisaría de una columna toda NaN
+    inf = np.full(boot.shape[1], np.nan)
+    sup = np.full(boot.shape[1], np.nan)
+    validos = ~np.isnan(boot).all(axis=0)
+    if validos.any():
+        inf[validos], sup[validos] = np.nanquantile(boot[:, validos], [alfa, 1 - alfa], axis=0)
+    return inf, sup
+
+def _bootstrap_propagacion(x, y, codigos, n, n_bootstrap, semilla):
+    # Remuestreo con reemplazo dentro de cada grupo, vectorizado sobre grupos y
+    # remuestreos; x, y ordenados por grupo. Devuelve arrays (remuestreos, grupos)
+    rng = np.random.default_rng(semilla)
+    g = len(n)
+    n = n.astype(np.int64)
+    inicio = np.concatenate([[0], np.cumsum(n)[:-1]])
+    base, tamano = inicio[codigos], n[codigos]
+    con_datos = n > 0
+
+    a_boot = np.full((n_bootstrap, g), np.nan)
+    b_boot = np.full((n_bootstrap, g), np.nan)
+    bloque = max(1, BOOTSTRAP_BLOQUE // len(x))
+    for desde in range(0, n_bootstrap, bloque):
+        hasta = min(desde + bloque, n_bootstrap)
+        # Para cada posición, una fila al azar de su mismo grupo
+        idx = base + (rng.random((hasta - desde, len(x))) * tamano).astype(np.int64)
+        xb, yb = x[idx], y[idx]
+        sumas = [np.add.reduceat(v, inicio[con_datos], axis=1) for v in (xb, yb, xb * xb, xb * yb)]
+        a_boot[desde:hasta, con_datos], b_boot[desde:hasta, con_datos] = _minimos_cuadrados(*sumas, n[con_datos])
+    return a_boot, b_boot
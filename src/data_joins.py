@@ -0,0 +1,219 @@
+import numpy as np
+import pandas as pd
+from src import catalog
+
+# Columnas que identifican la misma transmisión vista por los dos receptores
+# (en los nombres de archivo de ambos dialectos). `version` sólo entra en la
+# clave cuando los dos receptores la tienen (Neisser no la lleva en el nombre)
+CLAVE_CRUCE = ['test', 'distancia', 'msps', 'version']
+
+# Columnas del índice de cada registro dentro de su corrida (además de numero)
+CLAVE_REGISTRO = ['tramo', 'numero', 'ocurrencia']
+
+def _claves(df_a, df_b, por):
+    por = [por] if isinstance(por, str) else list(por or [])
+    return por or [col for col in CLAVE_CRUCE if col in df_a.columns and col in df_b.columns
+                   and (col != 'version' or (df_a[col].notna().any() and df_b[col].notna().any()))]
+
+def _corridas(df_a, df_b, por):
+    """
+    Código de corrida común a los dos DataFrames: una sola tabla hash sobre
+    las claves de ambos, así una misma (test, distancia, msps) tiene el mismo
+    código en los dos receptores aunque sus categorías difieran.
+
+    Devuelve:
+      Tupla (códigos de df_a, códigos de df_b, DataFrame con las claves de cada código).
+    """
+    claves = pd.concat([df_a[por].astype(object), df_b[por].astype(object)], ignore_index=True)
+    agrupado = claves.groupby(por, sort=True, dropna=False)
+    codigos = agrupado.ngroup().to_numpy()
+    tabla = agrupado.size().index.to_frame(index=False)
+    return codigos[:len(df_a)], codigos[len(df_a):], tabla
+
+def _indexar(df, codigos, solo_crc_ok=True):
+    """
+    Índice (corrida, tramo, numero, ocurrencia) de cada registro válido de un
+    receptor, en orden de llegada dentro de cada corrida.
+
+    Un `numero` menor que el anterior es un reinicio del contador y abre un
+    tramo nuevo; dentro de un tramo, la k-ésima repetición de un mismo `numero`
+    tiene ocurrencia k. Así los duplicados se emparejan en orden y los
+    contadores reiniciados no se confunden con los del tramo anterior.
+
+    Devuelve:
+      Tupla (DataFrame con _fila, _corrida y CLAVE_REGISTRO de los registros
+      válidos, máscara de registros válidos en el orden de df).
+    """
+    numero = df['numero'].to_numpy(dtype=np.float64, na_value=np.nan)
+    # numero = -1 (o vacío) no tiene posición en la secuencia; con CRC inválido
+    # el contador tampoco es fiable
+    valido = ~np.isnan(numero) & (numero >= 0)
+    if solo_crc_ok and 'crc_error' in df.columns:
+        valido &= df['crc_error'].to_numpy(dtype=np.float64, na_value=0) != 1
+
+    filas = np.flatnonzero(valido)
+    orden = filas[np.argsort(codigos[filas], kind='stable')]
+    c = codigos[orden]
+    n = numero[orden].astype(np.int64)
+
+    primero = np.ones(len(n), dtype=bool)
+    primero[1:] = c[1:] != c[:-1]
+    reinicio = np.zeros(len(n), dtype=bool)
+    reinicio[1:] = (n[1:] < n[:-1]) & ~primero[1:]
+    # Número de reinicios acumulados desde el inicio de la corrida
+    acumulado = np.cumsum(reinicio)
+    tramo = acumulado - acumulado[np.flatnonzero(primero)][np.cumsum(primero) - 1]
+
+    indice = pd.DataFrame({'_fila': orden, '_corrida': c, 'tramo': tramo, 'numero': n})
+    indice['ocurrencia'] = indice.groupby(['_corrida', 'tramo', 'numero'], sort=False).cumcount()
+    return indice, valido
+
+def _alinear_tramos(indice_a, indice_b):
+    """
+    Alinea los tramos de los dos receptores dentro de cada corrida. Cada
+    receptor numera sus tramos por los reinicios que él vio, así que un reinicio
+    que sólo detecta uno (p. ej. el otro perdió los paquetes previos) desplazaría
+    todos los tramos siguientes. Se emparejan en orden los tramos de ambos
+    maximizando los `numero` que comparten (alineamiento monótono por
+    programación dinámica) y cada registro recibe el tramo común; los tramos
+    sin pareja quedan con un tramo propio.
+
+    Devuelve:
+      Tupla (indice_a, indice_b con `tramo` común, tramos emparejados por corrida).
+    """
+    unicos_a = indice_a[['_corrida', 'tramo', 'numero']].drop_duplicates()
+    unicos_b = indice_b[['_corrida', 'tramo', 'numero']].drop_duplicates()
+    solape = unicos_a.merge(unicos_b, on=['_corrida', 'numero'], suffixes=('_a', '_b'))
+    solape = solape.groupby(['_corrida', 'tramo_a', 'tramo_b']).size()
+    n_a = indice_a.groupby('_corrida')['tramo'].max() + 1
+    n_b = indice_b.groupby('_corrida')['tramo'].max() + 1
+
+    mapas = ([], [])
+    emparejados = {}
+    for corrida in n_a.index.union(n_b.index):
+        na, nb = int(n_a.get(corrida, 0)), int(n_b.get(corrida, 0))
+        comun = np.zeros((na, nb), dtype=np.int64)
+        if corrida in solape.index.get_level_values(0):
+            s = solape.xs(corrida)
+            comun[s.index.get_level_values(0), s.index.get_level_values(1)] = s.to_numpy()
+        mejor = np.zeros((na + 1, nb + 1), dtype=np.int64)
+        for i in range(1, na + 1):
+            for j in range(1, nb + 1):
+                mejor[i, j] = max(mejor[i - 1, j], mejor[i, j - 1], mejor[i - 1, j - 1] + comun[i - 1, j - 1])
+
+        pasos = []
+        i, j = na, nb
+        while i or j:
+            if i and j and comun[i - 1, j - 1] and mejor[i, j] == mejor[i - 1, j - 1] + comun[i - 1, j - 1]:
+                i, j = i - 1, j - 1
+                pasos.append((i, j))
+            elif i and (not j or mejor[i, j] == mejor[i - 1, j]):
+                i -= 1
+                pasos.append((i, None))
+            else:
+                j -= 1
+                pasos.append((None, j))
+        for tramo, par in enumerate(reversed(pasos)):
+            for mapa, propio in zip(mapas, par):
+                if propio is not None:
+                    mapa.append((corrida, propio, tramo))
+        emparejados[corrida] = sum(a is not None and b is not None for a, b in pasos)
+
+    alineados = []
+    for indice, mapa in zip((indice_a, indice_b), mapas):
+        mapa = pd.DataFrame(mapa, columns=['_corrida', 'tramo', 'tramo_comun'], dtype=np.int64)
+        indice = indice.merge(mapa, on=['_corrida', 'tramo'], how='left')
+        indice['tramo'] = indice.pop('tramo_comun')
+        alineados.append(indice)
+    return alineados[0], alineados[1], pd.Series(emparejados, dtype=np.int64)
+
+def cruzar_receptores(gnuradio, neisser, por=None, solo_crc_ok=True, solo_emparejados=False, nombres=('gnuradio', 'neisser')):
+    """
+    Une los registros de los dos receptores de una campaña (GNU Radio:
+    sto, cfo, snr, k_hat...; Neisser: rssi, snr, size) por el contador
+    transmitido, en una sola pasada sobre todas las corridas.
+
+    Cada registro válido se indexa por (corrida, tramo, numero, ocurrencia)
+    (ver _indexar), los tramos de ambos receptores se alinean (ver
+    _alinear_tramos) y los dos índices se unen con un único merge por hash, en
+    vez de un merge por corrida.
+
+    Parámetros:
+      gnuradio         - DataFrame con las corridas de GNU Radio (p. ej.
+                         catalog.load(test=2, dialect='gnuradio'))
+      neisser          - DataFrame con las corridas de Neisser
+      por              - Columnas que identifican la corrida en ambos (por
+                         defecto, las de CLAVE_CRUCE presentes en los dos)
+      solo_crc_ok      - Si se descartan del cruce los registros con CRC inválido
+      solo_emparejados - Si sólo se devuelven los registros presentes en ambos
+      nombres          - Sufijos de las columnas que existen en ambos receptores
+
+    Devuelve:
+      Tupla (unido, resumen):
+        unido   - Las columnas de `por`, tramo, numero y ocurrencia, las de cada
+                  receptor (las repetidas con sufijo _<nombre>) y `origen`
+                  ('ambos' o el nombre del único receptor que lo recibió)
+        resumen - Una fila por corrida: registros, descartados, duplicados y
+                  reinicios de cada receptor, reinicios_distintos (si los dos
+                  receptores vieron un número distinto de reinicios), emparejados,
+                  solo_<nombre> y cobertura_<nombre> (emparejados / válidos de
+                  ese receptor)
+    """
+    por = _claves(gnuradio, neisser, por)
+    codigos_a, codigos_b, corridas = _corridas(gnuradio, neisser, por)
+    indice_a, valido_a = _indexar(gnuradio, codigos_a, solo_crc_ok)
+    indice_b, valido_b = _indexar(neisser, codigos_b, solo_crc_ok)
+    # Reinicios vistos por cada receptor, antes de alinear los tramos
+    reinicios = [indice.groupby('_corrida')['tramo'].max() for indice in (indice_a, indice_b)]
+    indice_a, indice_b, _ = _alinear_tramos(indice_a, indice_b)
+
+    lados = []
+    for df, indice, valido, codigos, nombre in zip((gnuradio, neisser), (indice_a, indice_b), (valido_a, valido_b), (codigos_a, codigos_b), nombres):
+        datos = df.drop(columns=por + ['numero']).iloc[indice['_fila'].to_numpy()].reset_index(drop=True)
+        lados.append((nombre, indice, valido, codigos, datos))
+
+    (nombre_a, indice_a, *_, datos_a), (nombre_b, indice_b, *_, datos_b) = lados
+    repetidas = set(datos_a.columns) & set(datos_b.columns)
+    izquierda = pd.concat([indice_a.drop(columns='_fila'), datos_a.rename(columns={col: f'{col}_{nombre_a}' for col in repetidas})], axis=1)
+    derecha = pd.concat([indice_b.drop(columns='_fila'), datos_b.rename(columns={col: f'{col}_{nombre_b}' for col in repetidas})], axis=1)
+
+    unido = izquierda.merge(derecha, on=['_corrida'] + CLAVE_REGISTRO, how='inner' if solo_emparejados else 'outer',
+                            sort=True, indicator='origen')
+    unido['origen'] = unido['origen'].cat.rename_categories({'both': 'ambos', 'left_only': nombre_a, 'right_only': nombre_b})
+
+    # Conteos por corrida con bincount sobre el código común
+    n_corridas = len(corridas)
+
+    def contar(codigos, pesos=None):
+        return np.bincount(codigos, weights=pesos, minlength=n_corridas).astype(np.int64)
+
+    resumen = corridas.copy()
+    for (nombre, indice, valido, codigos, _), vistos in zip(lados, reinicios):
+        resumen[f'registros_{nombre}'] = contar(codigos)
+        resumen[f'descartados_{nombre}'] = contar(codigos, ~valido)
+        resumen[f'duplicados_{nombre}'] = contar(indice['_corrida'].to_numpy(), indice['ocurrencia'].to_numpy() > 0)
+        resumen[f'reinicios_{nombre}'] = vistos.reindex(range(n_corridas), fill_value=0).to_numpy()
+    resumen['reinicios_distintos'] = resumen[f'reinicios_{nombre_a}'] != resumen[f'reinicios_{nombre_b}']
+    # Los emparejados se cuentan sobre los índices, también con solo_emparejados
+    emparejados = indice_a[['_corrida'] + CLAVE_REGISTRO].merge(indice_b[['_corrida'] + CLAVE_REGISTRO], on=['_corrida'] + CLAVE_REGISTRO)
+    resumen['emparejados'] = contar(emparejados['_corrida'].to_numpy())
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for nombre, indice, *_ in lados:
+            validos = contar(indice['_corrida'].to_numpy())
+            resumen[f'solo_{nombre}'] = validos - resumen['emparejados']
+            resumen[f'cobertura_{nombre}'] = resumen['emparejados'] / validos
+
+    unido = pd.concat([corridas.iloc[unido['_corrida'].to_numpy()].reset_index(drop=True), unido.drop(columns='_corrida')], axis=1)
+    return unido, resumen.set_index(por)
+
+def cruzar_campana(root='data', refresh=False, solo_crc_ok=True, solo_emparejados=False, **filtros):
+    """
+    cruzar_receptores sobre todas las corridas del catálogo que cumplen los
+    filtros (ver catalog.query), p. ej. cruzar_campana(test=2).
+    """
+    filtros.pop('dialect', None)
+    gnuradio = catalog.load(root, refresh, dialect='gnuradio', **filtros)
+    neisser = catalog.load(root, refresh, dialect='neisser', **filtros)
+    if gnuradio.empty or neisser.empty:
+        raise ValueError("El cruce necesita corridas de ambos receptores (gnuradio y neisser)")
+    return cruzar_receptores(gnuradio, neisser, solo_crc_ok=solo_crc_ok, solo_emparejados=solo_emparejados)
@@ -1,9 +1,100 @@
-import pandas as pd
+import os
 import re
+import shutil
+import hashlib
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from src.summaries import merge_summaries, summary_path
+
+# Versión del cálculo de columnas derivadas; cambiarla invalida la caché de load_csv
+CACHE_VERSION = 1
+
+# Caché de load_csv: LRU en memoria para la sesión actual y copia en disco
+CACHE_DIR = os.path.join('.cache', 'load_csv')
+CACHE_MAX_ENTRIES = 64
+_cache = OrderedDict()
+_hashes = {}
+
+# Tipos explícitos de la carga por bloques (iter_csv); las columnas que no
+# estén en el archivo se ignoran, así sirve para ambos dialectos
+DTYPES = {
+    'mensaje': 'str',
+    'numero': 'Int32',
+    'my_sto': 'float32',
+    'sto': 'float32',
+    'cfo': 'float32',
+    'snr': 'float32',
+    'crc_error': 'int8',
+    'previous_overflow_sum': 'int32',
+    'k_hat': 'Int32',
+    'k_hat2': 'Int32',
+    'espacios': 'Int32',
+    'cfo_int2': 'Int32',
+    'sto_estimate2': 'float32',
+    'rssi (dBm)': 'float32',
+    'snr (dB)': 'float32',
+    'size (bytes)': 'Int16',
+}
+
+# Tipos de las columnas derivadas del STO en la carga por bloques
+DERIVED_DTYPES = {
+    'sto_int': 'int32',
+    'sto_fraq': 'float32',
+    'muestras': 'float32',
+    'muestras_2': 'float32',
+}
+
+CHUNK_SIZE = 100_000
+
+def _run_path(directory, name, columnar=False):
+    # El CSV puede estar comprimido (--compress); pandas lo descomprime al leer
+    # Con columnar=True, si el pre-procesado generó una versión columnar
+    # (--format parquet|feather) al menos tan reciente como el CSV, se lee esa
+    csv_path = next((f"{directory}{name}.csv{ext}" for ext in ('', '.gz', '.zst', '.xz') if os.path.isfile(f"{directory}{name}.csv{ext}")), f"{directory}{name}.csv")
+    if not columnar:
+        return csv_path
+    csv_mtime = os.path.getmtime(csv_path) if os.path.isfile(csv_path) else None
+    for ext in ('parquet', 'feather'):
+        path = f"{directory}{name}.{ext}"
+        if os.path.isfile(path) and (csv_mtime is None or os.path.getmtime(path) >= csv_mtime):
+            return path
+    return csv_path
+
+def _como_csv(df):
+    # Deja un DataFrame leído de parquet/feather con las columnas y tipos que
+    # daría pd.read_csv sobre el CSV equivalente: sin mensaje_prefijo, con
+    # crc_error en 0/1 y la misma inferencia numérica (int64 si la columna no
+    # tiene vacíos ni decimales, float64 si no). `mensaje` ya se lee como texto
+    df = df.drop(columns=['mensaje_prefijo'], errors='ignore')
+    tipos = {}
+    for col, dtype in df.dtypes.items():
+        if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype) or pd.api.types.is_float_dtype(dtype):
+            valores = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            enteros = not np.isnan(valores).any() and (valores == np.round(valores)).all()
+            tipos[col] = 'int64' if enteros else 'float64'
+    return df.astype(tipos)
+
+def _read_run(path):
+    if path.endswith('.parquet'):
+        return _como_csv(pd.read_parquet(path))
+    if path.endswith('.feather'):
+        return _como_csv(pd.read_feather(path))
+    return pd.read_csv(path)
 
-def load_csv(directory, name, muestras):
-    df = pd.read_csv(f"{directory}{name}.csv")
-    
+def _content_hash(path):
+    # El hash se recuerda por (ruta, tamaño, mtime) para no releer el archivo
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if key not in _hashes:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        _hashes[key] = digest.hexdigest()
+    return _hashes[key]
+
+def _enriquecer(df, muestras):
     if 'sto' in df.columns:
         df['sto_int'] = df['sto'].astype(int)
         df['sto_fraq'] = df['sto'] - df['sto_int']
@@ -14,28 +105,218 @@ def load_csv(directory, name, muestras):
         
         df['muestras'] = (df['sto'] + 0.5) * (32 if muestras == 4 else 64)
         df['muestras_2'] = df['sto_int'] + 0.5 - df['sto_fraq']
-        
+    return df
+
+def load_csv(directory, name, muestras, cache=False, columnar=False):
+    """
+    Carga una corrida pre-procesada y añade las columnas derivadas del STO.
+
+    Con columnar=True se lee la versión parquet/feather de la corrida si existe
+    y no es más antigua que el CSV; el resultado tiene las mismas columnas y
+    tipos que la lectura del CSV (las medidas, con la precisión float32 con
+    que se guardaron).
+
+    Con cache=True (desactivado por defecto) el resultado se guarda por (hash
+    del contenido, muestras, CACHE_VERSION) en un LRU en memoria y en disco
+    (CACHE_DIR, relativo al directorio de trabajo), de modo que volver a
+    ejecutar las celdas de un notebook no relee ni recalcula nada. Se
+    devuelve siempre una copia, así que modificarla no altera la caché.
+    """
+    path = _run_path(directory, name, columnar)
+    if not cache:
+        df = _enriquecer(_read_run(path), muestras)
+        df['prueba'] = name
+        return df
+
+    key = (_content_hash(path), muestras, CACHE_VERSION)
+    if key in _cache:
+        _cache.move_to_end(key)
+        df = _cache[key]
+    else:
+        cache_path = os.path.join(CACHE_DIR, f"{key[0]}-{muestras}-v{CACHE_VERSION}.pkl")
+        if os.path.isfile(cache_path):
+            df = pd.read_pickle(cache_path)
+        else:
+            df = _enriquecer(_read_run(path), muestras)
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            df.to_pickle(cache_path)
+        _cache[key] = df
+        if len(_cache) > CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+
+    df = df.copy()
     df['prueba'] = name
     return df
 
-def limpiar_datos(df, columnas=None, iqr_multiplier=1.5):
-    df_limpio = df.copy()
-    
+def _tipar(df):
+    # Aplica DTYPES a un bloque leído de parquet/feather (el CSV ya se lee tipado)
+    df = df.drop(columns=['mensaje_prefijo'], errors='ignore')
+    return df.astype({col: dtype for col, dtype in DTYPES.items() if col in df.columns and dtype != 'str'})
+
+def _iter_run(path, chunksize):
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield _tipar(batch.to_pandas())
+    elif path.endswith('.feather'):
+        df = pd.read_feather(path, memory_map=True)
+        for start in range(0, len(df), chunksize):
+            yield _tipar(df.iloc[start:start + chunksize])
+    else:
+        header = pd.read_csv(path, nrows=0).columns
+        dtypes = {col: dtype for col, dtype in DTYPES.items() if col in header}
+        yield from pd.read_csv(path, dtype=dtypes, chunksize=chunksize)
+
+def iter_csv(directory, name, muestras, chunksize=CHUNK_SIZE, categorias=None, columnar=False):
+    """
+    Versión por bloques de load_csv para archivos que no caben cómodamente en
+    memoria (p. ej. los merge de capturas largas): lee la corrida en bloques de
+    `chunksize` filas con tipos explícitos (DTYPES: float32 para las medidas,
+    enteros pequeños) y calcula las columnas derivadas del STO en cada bloque.
+    `prueba` es categórica. No usa la caché de load_csv.
+
+    Parámetros:
+      directory, name, muestras - Como en load_csv
+      chunksize  - Filas por bloque
+      categorias - Categorías de `prueba` (por defecto sólo `name`)
+      columnar   - Si se lee la versión parquet/feather (ver load_csv)
+
+    Devuelve:
+      Iterador de DataFrames.
+    """
+    prueba = pd.CategoricalDtype(categorias or [name])
+    for chunk in _iter_run(_run_path(directory, name, columnar), chunksize):
+        chunk = _enriquecer(chunk, muestras)
+        chunk = chunk.astype({col: dtype for col, dtype in DERIVED_DTYPES.items() if col in chunk.columns})
+        chunk['prueba'] = pd.Series(name, index=chunk.index, dtype=prueba)
+        yield chunk
+
+def iter_runs(corridas, chunksize=CHUNK_SIZE):
+    """
+    Concatenación en streaming de varias corridas: recorre los bloques de cada
+    una, en orden, sin cargarlas a la vez. Todas comparten las mismas categorías
+    de `prueba`, así que los bloques se pueden concatenar directamente.
+
+    Parámetros:
+      corridas  - Lista de tuplas (directory, name, muestras)
+      chunksize - Filas por bloque
+
+    Devuelve:
+      Iterador de DataFrames.
+
+    Ejemplo:
+      bloques = iter_runs([(directory, "2MSPs-1m", 2), (directory, "2MSPs-60m", 2)])
+      describir_metricas(bloques)
+    """
+    categorias = list(dict.fromkeys(name for _, name, _ in corridas))
+    for directory, name, muestras in corridas:
+        yield from iter_csv(directory, name, muestras, chunksize, categorias)
+
+def concat_runs(corridas, chunksize=CHUNK_SIZE):
+    """
+    Carga varias corridas en un único DataFrame con los tipos reducidos de
+    iter_runs (aprox. la mitad de memoria que load_csv + pd.concat).
+    """
+    chunks = list(iter_runs(corridas, chunksize))
+    if not chunks:
+        return pd.DataFrame()
+    return pd.concat(chunks, ignore_index=True)
+
+def load_summary(directory, names):
+    """
+    Lee los resúmenes en línea (.summary.json, ver preprocess.py --summary) de
+    una o varias corridas, o de archivos de merge, y los combina en uno solo.
+    Con él, stats_paquetes y describir_metricas no necesitan cargar las filas.
+
+    Parámetros:
+      directory - Carpeta con las salidas pre-procesadas
+      names     - Nombre (sin extensión) o lista de nombres de las corridas
+
+    Devuelve:
+      RunSummary combinado.
+
+    Ejemplo:
+      resumen = load_summary("data/prueba_4/26-06-2025_csv/merge/", ["2MSPs-1m", "2MSPs-60m"])
+      stats_paquetes(resumen)
+    """
+    names = [names] if isinstance(names, str) else list(names)
+    paths = [summary_path(os.path.join(directory, name)) for name in names]
+    faltantes = [path for path in paths if not os.path.isfile(path)]
+    if faltantes:
+        raise FileNotFoundError(f"No hay resumen para: {', '.join(faltantes)}")
+    return merge_summaries(paths)
+
+def clear_cache(disk=True):
+    """
+    Invalida la caché de load_csv: la de memoria y, si disk=True, la de disco.
+    """
+    _cache.clear()
+    _hashes.clear()
+    if disk and os.path.isdir(CACHE_DIR):
+        shutil.rmtree(CACHE_DIR)
+
+def _cuartiles(valores, codigos, n_grupos, mask):
+    # Q1 y Q3 por grupo (filas) y columna de `valores`, usando sólo las filas de
+    # `mask`. Los grupos sin filas quedan en NaN. Interpolación lineal, como
+    # Series.quantile.
+    if n_grupos == 1:
+        if not mask.any():
+            vacio = np.full((1, valores.shape[1]), np.nan)
+            return vacio, vacio
+        q = np.quantile(valores[mask], [0.25, 0.75], axis=0)
+        return q[0][None, :], q[1][None, :]
+
+    q = pd.DataFrame(valores[mask]).groupby(codigos[mask]).quantile([0.25, 0.75])
+    q1 = q.xs(0.25, level=1).reindex(range(n_grupos)).to_numpy()
+    q3 = q.xs(0.75, level=1).reindex(range(n_grupos)).to_numpy()
+    return q1, q3
+
+def limpiar_datos(df, columnas=None, iqr_multiplier=1.5, modo='sequential', by=None):
+    """
+    Elimina outliers por el criterio IQR.
+
+    Parámetros:
+      columnas       - Columnas a limpiar (por defecto todas las numéricas, salvo las de `by`)
+      iqr_multiplier - Multiplicador del rango intercuartílico
+      modo           - 'sequential': cada columna se evalúa sobre las filas que
+                       sobrevivieron a las anteriores (comportamiento original).
+                       'joint': los límites de todas las columnas se calculan de
+                       una vez sobre los mismos datos y se aplica una sola máscara.
+      by             - Columna o lista de columnas (p. ej. prueba, distancia, MSPs):
+                       los límites se calculan por grupo, de modo que una campaña
+                       concatenada se limpia en una sola llamada.
+    """
+    if modo not in ('sequential', 'joint'):
+        raise ValueError(f"Modo de limpieza desconocido: {modo}")
+    by = [by] if isinstance(by, str) else list(by or [])
+
     if columnas is None:
-        columnas = df_limpio.select_dtypes(include='number').columns.tolist()
+        columnas = [c for c in df.select_dtypes(include='number').columns if c not in by]
 
-    df_limpio = df_limpio.dropna(subset=columnas)
+    df_limpio = df.dropna(subset=columnas)
+    valores = df_limpio[columnas].to_numpy(dtype=float, na_value=np.nan)
 
-    for col in columnas:
-        Q1 = df_limpio[col].quantile(0.25)
-        Q3 = df_limpio[col].quantile(0.75)
-        IQR = Q3 - Q1
-        lower_bound = Q1 - iqr_multiplier * IQR
-        upper_bound = Q3 + iqr_multiplier * IQR
+    if by:
+        codigos = df_limpio.groupby(by, sort=False, observed=True, dropna=False).ngroup().to_numpy()
+        n_grupos = int(codigos.max()) + 1 if len(codigos) else 1
+    else:
+        codigos = np.zeros(len(df_limpio), dtype=int)
+        n_grupos = 1
 
-        df_limpio = df_limpio[(df_limpio[col] >= lower_bound) & (df_limpio[col] <= upper_bound)]
+    mask = np.ones(len(df_limpio), dtype=bool)
+    if modo == 'joint':
+        q1, q3 = _cuartiles(valores, codigos, n_grupos, mask)
+        iqr = q3 - q1
+        lower, upper = (q1 - iqr_multiplier * iqr)[codigos], (q3 + iqr_multiplier * iqr)[codigos]
+        mask = ((valores >= lower) & (valores <= upper)).all(axis=1)
+    else:
+        for j in range(len(columnas)):
+            q1, q3 = _cuartiles(valores[:, j:j + 1], codigos, n_grupos, mask)
+            iqr = q3[:, 0] - q1[:, 0]
+            lower, upper = (q1[:, 0] - iqr_multiplier * iqr)[codigos], (q3[:, 0] + iqr_multiplier * iqr)[codigos]
+            mask &= (valores[:, j] >= lower) & (valores[:, j] <= upper)
 
-    return df_limpio
+    return df_limpio[mask]
 
 def extraer_distancia(prueba):
     match = re.search(r'(?<![A-Za-z0-9])(\d+)m(?![A-Za-z])', prueba)
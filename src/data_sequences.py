@@ -0,0 +1,170 @@
+import numpy as np
+import pandas as pd
+
+# Columnas que identifican una corrida en un DataFrame con varias concatenadas
+# (load_csv añade 'prueba'; catalog.load añade además test, fecha y dialecto)
+CLAVE_CORRIDA = ['test', 'fecha', 'dialecto', 'prueba']
+
+# Factores por los que se agrega el PER por defecto (columnas de catalog.load)
+FACTORES_PER = ['distancia', 'msps', 'sf']
+
+def _claves(df, por):
+    por = [por] if isinstance(por, str) else list(por or [])
+    return por or [col for col in CLAVE_CORRIDA if col in df.columns]
+
+def _secuencias(df, por, solo_crc_ok=True, inicio=None):
+    """
+    Núcleo vectorizado del análisis de secuencias: una sola ordenación estable
+    por corrida y operaciones sobre arrays, sin bucles de Python por corrida.
+
+    Devuelve:
+      Tupla (índice de corridas, diccionario de columnas por corrida,
+      código de corrida de cada hueco, longitud de cada hueco).
+    """
+    agrupado = df.groupby(por, sort=True, observed=True, dropna=False)
+    indice = agrupado.size().index
+    n_corridas = len(indice)
+    codigos = agrupado.ngroup().to_numpy()
+
+    # Orden estable: las filas de cada corrida quedan juntas y en orden de llegada
+    orden = np.argsort(codigos, kind='stable')
+    codigos = codigos[orden]
+    numero = df['numero'].to_numpy(dtype=np.float64, na_value=np.nan)[orden]
+
+    # numero = -1 (o vacío) es un mensaje corrupto: cuenta como recibido pero
+    # no tiene posición en la secuencia
+    legible = ~np.isnan(numero) & (numero >= 0)
+    valido = legible.copy()
+    crc_err = np.zeros(len(numero), dtype=bool)
+    if 'crc_error' in df.columns:
+        crc_err = df['crc_error'].to_numpy(dtype=np.float64, na_value=0)[orden] == 1
+        if solo_crc_ok:
+            valido &= ~crc_err
+
+    c = codigos[valido]
+    n = numero[valido].astype(np.int64)
+    primero = np.ones(len(n), dtype=bool)
+    primero[1:] = c[1:] != c[:-1]
+
+    d = np.diff(n, prepend=0)
+    duplicado = (d == 0) & ~primero
+    reinicio = (d < 0) & ~primero
+    hueco = np.where((d > 1) & ~primero, d - 1, 0)
+    if inicio is not None:
+        # Paquetes anteriores al primero recibido de cada corrida
+        hueco[primero] = np.maximum(n[primero] - inicio, 0)
+
+    # Tramos monótonos entre reinicios: cada uno espera (último - primero + 1)
+    inicio_tramo = primero | reinicio
+    fin_tramo = np.zeros_like(inicio_tramo)
+    fin_tramo[:-1] = inicio_tramo[1:]
+    fin_tramo[-1:] = True
+    esperados_tramo = n[fin_tramo] - n[inicio_tramo] + 1
+
+    def contar(pesos=None, codigos_=c):
+        return np.bincount(codigos_, weights=pesos, minlength=n_corridas).astype(np.int64)
+
+    recibidos = contar(codigos_=codigos)
+    validos = contar()
+    duplicados = contar(duplicado)
+    perdidos = contar(hueco)
+    esperados = np.bincount(c[inicio_tramo], weights=esperados_tramo, minlength=n_corridas).astype(np.int64)
+    if inicio is not None:
+        esperados += contar(np.where(primero, hueco, 0))
+
+    hay_hueco = hueco > 0
+    rafaga_max = np.zeros(n_corridas, dtype=np.int64)
+    np.maximum.at(rafaga_max, c[hay_hueco], hueco[hay_hueco])
+    rafagas = contar(hay_hueco)
+
+    columnas = {
+        'recibidos': recibidos,
+        'invalidos': contar(~legible, codigos),
+        'crc_err': contar(crc_err, codigos),
+        'validos': validos,
+        'unicos': validos - duplicados,
+        'esperados': esperados,
+        'perdidos': perdidos,
+        'duplicados': duplicados,
+        'reinicios': contar(reinicio),
+        'rafagas': rafagas,
+        'rafaga_max': rafaga_max,
+    }
+    return indice, columnas, c[hay_hueco], hueco[hay_hueco]
+
+def analizar_secuencias(df, por=None, solo_crc_ok=True, inicio=None):
+    """
+    Pérdida de paquetes a partir del contador transmitido (`numero`) de cada
+    corrida, en una sola pasada vectorizada sobre todas las corridas.
+
+    Dentro de cada corrida, en orden de llegada: un salto de `numero` mayor que
+    1 es una ráfaga de pérdida de (salto - 1) paquetes, un `numero` igual al
+    anterior es un duplicado y uno menor es un reinicio del contador (empieza
+    un tramo nuevo). Los esperados son la suma de (último - primero + 1) de
+    cada tramo, así que perdidos = esperados - unicos.
+
+    Parámetros:
+      df          - DataFrame con una o varias corridas concatenadas (load_csv,
+                    concat_runs o catalog.load)
+      por         - Columna o lista de columnas que identifican la corrida (por
+                    defecto, las de CLAVE_CORRIDA presentes en df)
+      solo_crc_ok - Si sólo cuentan como recibidos en la secuencia los paquetes
+                    con CRC válido (la pérdida es entonces el PER); si False,
+                    cuenta todo paquete con `numero` legible
+      inicio      - Valor inicial del contador; si se indica, los paquetes
+                    anteriores al primero recibido también se cuentan perdidos
+
+    Devuelve:
+      DataFrame con una fila por corrida: recibidos (filas), invalidos
+      (numero ilegible), crc_err, validos, unicos, esperados, perdidos,
+      tasa_perdida, duplicados, reinicios, rafagas, rafaga_max y rafaga_media.
+    """
+    por = _claves(df, por)
+    indice, columnas, _, _ = _secuencias(df, por, solo_crc_ok, inicio)
+    resultado = pd.DataFrame(columnas, index=indice)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        resultado['tasa_perdida'] = resultado['perdidos'] / resultado['esperados']
+        resultado['rafaga_media'] = resultado['perdidos'] / resultado['rafagas']
+    return resultado
+
+def histograma_huecos(df, por=None, solo_crc_ok=True, inicio=None):
+    """
+    Histograma de la longitud de las ráfagas de pérdida de cada corrida (mismos
+    criterios que analizar_secuencias).
+
+    Devuelve:
+      DataFrame largo con las columnas de `por`, longitud y rafagas (número de
+      ráfagas de esa longitud); sólo aparecen las longitudes observadas.
+    """
+    por = _claves(df, por)
+    indice, _, codigos, longitudes = _secuencias(df, por, solo_crc_ok, inicio)
+    # Un único np.unique sobre pares (corrida, longitud)
+    pares, conteos = np.unique(np.stack([codigos, longitudes]), axis=1, return_counts=True)
+    claves = indice[pares[0]].to_frame(index=False) if len(pares[0]) else pd.DataFrame(columns=por)
+    claves['longitud'] = pares[1]
+    claves['rafagas'] = conteos
+    return claves
+
+def per_por(df, factores=None, por=None, solo_crc_ok=True, inicio=None):
+    """
+    PER (packet error rate) agregado por factores experimentales: suma los
+    esperados y perdidos de todas las corridas de cada combinación.
+
+    Parámetros:
+      factores - Columnas constantes dentro de cada corrida por las que agregar
+                 (por defecto, las de FACTORES_PER presentes: distancia, msps, sf)
+      (el resto como en analizar_secuencias)
+
+    Devuelve:
+      DataFrame con una fila por combinación de factores: corridas, esperados,
+      unicos, perdidos, crc_err, duplicados, reinicios, rafagas y per.
+    """
+    factores = [factores] if isinstance(factores, str) else list(factores or [col for col in FACTORES_PER if col in df.columns])
+    por = _claves(df, por)
+    corridas = analizar_secuencias(df, factores + [col for col in por if col not in factores], solo_crc_ok, inicio)
+    sumas = ['esperados', 'unicos', 'perdidos', 'crc_err', 'duplicados', 'reinicios', 'rafagas']
+    resultado = corridas[sumas].groupby(level=factores, sort=True, dropna=False).sum()
+    resultado.insert(0, 'corridas', corridas.groupby(level=factores, sort=True, dropna=False).size())
+    with np.errstate(divide='ignore', invalid='ignore'):
+        resultado['per'] = resultado['perdidos'] / resultado['esperados']
+    return resultado
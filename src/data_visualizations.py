@@ -1,12 +1,24 @@
 import os
-import matplotlib.pyplot as plt
-import seaborn as sns
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
-from sklearn.linear_model import LinearRegression
+import pandas as pd
+# matplotlib, seaborn y scikit-learn se importan dentro de cada gráfico: importar
+# el módulo (p. ej. desde analyze.py) no carga la pila gráfica
+from src.data_analyses import GRUPOS_PROPAGACION, ajustar_modelos_propagacion
+
+# Versión de los gráficos; cambiarla fuerza a regenerar todos en render_batch
+RENDER_VERSION = 1
+
+# Archivo (dentro de cada carpeta de salida) con las huellas de los datos graficados
+FINGERPRINT_FILE = '.fingerprints.json'
 
 #Histograma de las métricas
 def plot_histograma(df, output_path='output'):
-    
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     drop_cols = ['numero', 'crc_error', 'previous_overflow_sum', 'size (bytes)']
     for col in drop_cols:
         if col in df.columns:
@@ -20,17 +32,25 @@ def plot_histograma(df, output_path='output'):
 
     os.makedirs(output_path, exist_ok=True)
 
+    # Se reutiliza la misma figura para todas las columnas
+    fig, ax = plt.subplots(figsize=(6, 4))
+    archivos = []
     for col in numeric_cols:
-        plt.figure(figsize=(6, 4))
-        sns.histplot(df[col].dropna(), kde=True, bins=7)
-        plt.title(f'Histograma: {col}')
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        plt.savefig(os.path.join(output_path, f"histograma_{col}.png"))
-        plt.close()
+        ax.clear()
+        sns.histplot(df[col].dropna(), kde=True, bins=7, ax=ax)
+        ax.set_title(f'Histograma: {col}')
+        ax.tick_params(axis='x', labelrotation=45)
+        fig.tight_layout()
+        archivos.append(f"histograma_{col}.png")
+        fig.savefig(os.path.join(output_path, archivos[-1]))
+    plt.close(fig)
+    return archivos
 
 #Diagrama de correlación de las métricas
 def plot_correlacion(df, output_path='output'):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
 
     if not numeric_cols:
@@ -47,25 +67,180 @@ def plot_correlacion(df, output_path='output'):
     plt.tight_layout()
     plt.savefig(os.path.join(output_path, "correlacion.png"))
     plt.close()
+    return ["correlacion.png"]
 
 def plot_metricas_por_distancia(df, metricas, tipo='box', columna_grupo='prueba', output_path='output'):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     metricas_presentes = [m for m in metricas if m in df.columns]
     os.makedirs(output_path, exist_ok=True)
 
+    # Se reutiliza la misma figura para todas las métricas
+    fig, ax = plt.subplots(figsize=(6, 4))
+    archivos = []
     for metrica in metricas_presentes:
-        plt.figure(figsize=(6, 4))
+        ax.clear()
         if tipo == 'box':
-            sns.boxplot(data=df, x=columna_grupo, y=metrica)
+            sns.boxplot(data=df, x=columna_grupo, y=metrica, ax=ax)
         elif tipo == 'hist':
-            sns.histplot(data=df, x=metrica, hue=columna_grupo, kde=True, element="step", common_norm=False)
-        plt.title(f'{metrica} por {columna_grupo}')
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        plt.savefig(os.path.join(output_path, f"{tipo}_{metrica}.png"))
-        plt.close()
-
-# Modelo de propagación de la señal
+            sns.histplot(data=df, x=metrica, hue=columna_grupo, kde=True, element="step", common_norm=False, ax=ax)
+        ax.set_title(f'{metrica} por {columna_grupo}')
+        ax.tick_params(axis='x', labelrotation=45)
+        fig.tight_layout()
+        archivos.append(f"{tipo}_{metrica}.png")
+        fig.savefig(os.path.join(output_path, archivos[-1]))
+    plt.close(fig)
+    return archivos
+
+# Modelos de propagación de varios grupos en una misma figura
+def plot_modelos_propagacion(df, ajustes=None, por=None, metrica='rssi (dBm)', output_path='output'):
+    """
+    Dibuja el resultado de ajustar_modelos_propagacion: la media (± desviación)
+    de la métrica en cada distancia y la recta ajustada de cada grupo, con el
+    exponente n y su intervalo en la leyenda.
+
+    Parámetros:
+      df       - Datos usados en el ajuste
+      ajustes  - Tabla de ajustar_modelos_propagacion; si es None se ajusta aquí
+                 (sin bootstrap)
+      por      - Columnas de agrupación (las mismas del ajuste)
+      metrica  - Columna modelada
+    """
+    import matplotlib.pyplot as plt
+
+    por = [por] if isinstance(por, str) else list(por or [col for col in GRUPOS_PROPAGACION if col in df.columns])
+    if ajustes is None:
+        ajustes = ajustar_modelos_propagacion(df, por, metrica, n_bootstrap=0)
+
+    datos = df[df[metrica].notna() & df['distancia'].notna() & (df['distancia'] > 0)]
+    medias = datos.groupby(por + ['distancia'], observed=True, dropna=False)[metrica].agg(['mean', 'std']).reset_index()
+
+    os.makedirs(output_path, exist_ok=True)
+
+    fig, ax = plt.subplots(figsize=(7, 5))
+    x = np.linspace(np.log10(datos['distancia'].min()), np.log10(datos['distancia'].max()), 50) if len(datos) else np.array([])
+    for i, ajuste in enumerate(ajustes.itertuples(index=False)):
+        fila = ajuste._asdict()
+        nombre = ", ".join(f"{col}={fila[col]}" for col in por if pd.notna(fila[col])) or metrica
+        etiqueta = f"{nombre}: n={fila['n']:.2f}"
+        if 'n_inf' in fila:
+            etiqueta += f" [{fila['n_inf']:.2f}, {fila['n_sup']:.2f}]"
+        color = f"C{i % 10}"
+
+        mask = np.ones(len(medias), dtype=bool)
+        for col in por:
+            mask &= (medias[col] == fila[col]).to_numpy() | (medias[col].isna().to_numpy() & pd.isna(fila[col]))
+        grupo = medias[mask]
+        ax.errorbar(np.log10(grupo['distancia']), grupo['mean'], yerr=grupo['std'], fmt='o', color=color, alpha=0.7, capsize=3)
+        ax.plot(x, fila['intercepto'] + fila['pendiente'] * x, color=color, label=etiqueta)
+
+    ax.set_title(f"Modelos de propagación: {metrica} vs log10(distancia)")
+    ax.set_xlabel("log10(distancia en metros)")
+    ax.set_ylabel(metrica)
+    ax.grid(True)
+    ax.legend(fontsize='small')
+    fig.tight_layout()
+    fig.savefig(os.path.join(output_path, "modelos_propagacion.png"))
+    plt.close(fig)
+    return ["modelos_propagacion.png"]
+
+# Gráficos disponibles para render_batch
+PLOTS = {
+    'histograma': plot_histograma,
+    'correlacion': plot_correlacion,
+    'metricas': plot_metricas_por_distancia,
+    'propagacion': plot_modelos_propagacion,
+}
+
+def _huella(df, tipo, kwargs):
+    # Huella del contenido graficado: datos (valores, índice y columnas), tipo y
+    # parámetros del gráfico, y versión del código de renderizado
+    digest = hashlib.sha256()
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    digest.update(json.dumps([list(map(str, df.columns)), [str(t) for t in df.dtypes], tipo, kwargs, RENDER_VERSION], sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+def _clave(tipo, kwargs):
+    # Entrada del archivo de huellas: un mismo tipo con otros parámetros (p. ej.
+    # 'metricas' en box y en hist) puede compartir carpeta sin pisarse
+    return json.dumps([tipo, kwargs], sort_keys=True, default=str)
+
+def _leer_huellas(output_path):
+    path = os.path.join(output_path, FINGERPRINT_FILE)
+    if not os.path.isfile(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _iniciar_worker():
+    # Los procesos del pool (y el principal con workers=1) renderizan sin
+    # interfaz gráfica
+    import matplotlib.pyplot as plt
+    plt.switch_backend('Agg')
+
+def _renderizar(df, tipo, output_path, kwargs):
+    return PLOTS[tipo](df, output_path=output_path, **kwargs) or []
+
+def render_batch(jobs, workers=None):
+    """
+    Renderiza una lista de gráficos en un pool de procesos (backend Agg),
+    omitiendo los que ya existen y cuyos datos no cambiaron desde la última vez.
+
+    Parámetros:
+      jobs    - Lista de tuplas (df, tipo, output_path) o (df, tipo, output_path, kwargs),
+                con tipo en PLOTS ('histograma', 'correlacion', 'metricas', 'propagacion')
+      workers - Número de procesos (por defecto os.cpu_count(); 1: en este proceso,
+                que también pasa al backend Agg)
+
+    Devuelve:
+      Lista con 'renderizado' u 'omitido' para cada trabajo.
+
+    Ejemplo:
+      render_batch([(df, 'histograma', 'output/prueba_4/2mm1m_sf7_125k/histograma/'),
+                    (df, 'correlacion', 'output/prueba_4/2mm1m_sf7_125k/correlacion/')])
+    """
+    estados = []
+    pendientes = []
+    for job in jobs:
+        df, tipo, output_path = job[:3]
+        kwargs = job[3] if len(job) > 3 else {}
+        if tipo not in PLOTS:
+            raise ValueError(f"Tipo de gráfico desconocido: {tipo}")
+        huella = _huella(df, tipo, kwargs)
+        previa = _leer_huellas(output_path).get(_clave(tipo, kwargs))
+        if previa and previa['huella'] == huella and all(os.path.isfile(os.path.join(output_path, a)) for a in previa['archivos']):
+            estados.append('omitido')
+            continue
+        estados.append('renderizado')
+        pendientes.append((df, tipo, output_path, kwargs, huella))
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(pendientes) > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_iniciar_worker) as pool:
+            archivos = list(pool.map(_renderizar, *zip(*[p[:4] for p in pendientes])))
+    else:
+        if pendientes:
+            _iniciar_worker()
+        archivos = [_renderizar(*p[:4]) for p in pendientes]
+
+    # Las huellas se escriben en el proceso principal para no competir por el archivo
+    for (_, tipo, output_path, kwargs, huella), generados in zip(pendientes, archivos):
+        huellas = _leer_huellas(output_path)
+        huellas[_clave(tipo, kwargs)] = {'huella': huella, 'archivos': generados}
+        os.makedirs(output_path, exist_ok=True)
+        with open(os.path.join(output_path, FINGERPRINT_FILE), 'w', encoding='utf-8') as f:
+            json.dump(huellas, f, indent=2)
+
+    return estados
+
+# Modelo de propagación de la señal (un solo grupo, con sklearn); para comparar
+# varias configuraciones ver ajustar_modelos_propagacion y plot_modelos_propagacion
 def plot_modelo_propagacion(df, nombre_modelo="", output_path='output'):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    from sklearn.linear_model import LinearRegression
+
     df_modelo = df[df['rssi (dBm)'].notna() & df['distancia'].notna() & (df['distancia'] > 0)].copy()
     df_modelo['log_distancia'] = np.log10(df_modelo['distancia'])
 
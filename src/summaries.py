@@ -0,0 +1,234 @@
+import os
+import re
+import json
+import math
+
+# Sufijo del resumen (opción --summary) que se escribe junto a cada CSV y merge
+SUMMARY_SUFFIX = '.summary.json'
+
+# Extensión de compresión de un CSV de salida (--compress), que no forma
+# parte del nombre del resumen
+COMPRESSED_SUFFIX = r'[.](?:gz|zst|xz)$'
+
+# Precisión relativa del sketch de cuantiles de RunSummary
+SKETCH_ACCURACY = 0.01
+
+class Accumulator:
+    """
+    Estadísticos en línea de una columna numérica: conteo, media y varianza
+    (Welford), mínimo, máximo y un sketch de cuantiles de precisión relativa
+    (cubetas logarítmicas, como DDSketch). Dos acumuladores se combinan sin
+    perder información, así que los resúmenes por corrida se pueden unir.
+    """
+    __slots__ = ('n', 'mean', 'm2', 'min', 'max', 'positive', 'negative', 'zero')
+
+    _gamma = (1 + SKETCH_ACCURACY) / (1 - SKETCH_ACCURACY)
+    _log_gamma = math.log(_gamma)
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.positive = {}
+        self.negative = {}
+        self.zero = 0
+
+    def add(self, x: float):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+        if x > 1e-12:
+            key = math.ceil(math.log(x) / self._log_gamma)
+            self.positive[key] = self.positive.get(key, 0) + 1
+        elif x < -1e-12:
+            key = math.ceil(math.log(-x) / self._log_gamma)
+            self.negative[key] = self.negative.get(key, 0) + 1
+        else:
+            self.zero += 1
+
+    def merge(self, other: 'Accumulator'):
+        # Combinación de Chan et al. para media y varianza
+        n = self.n + other.n
+        if other.n:
+            delta = other.mean - self.mean
+            self.m2 += other.m2 + delta * delta * self.n * other.n / n
+            self.mean += delta * other.n / n
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+        self.n = n
+        for key, count in other.positive.items():
+            self.positive[key] = self.positive.get(key, 0) + count
+        for key, count in other.negative.items():
+            self.negative[key] = self.negative.get(key, 0) + count
+        self.zero += other.zero
+
+    def std(self):
+        # Desviación estándar muestral (ddof=1, como pandas.describe)
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else math.nan
+
+    def quantile(self, q: float):
+        """
+        Cuantil aproximado (error relativo <= SKETCH_ACCURACY), acotado por min y max.
+        """
+        if not self.n:
+            return math.nan
+        rank = q * (self.n - 1)
+        value = lambda key: 2 * self._gamma ** key / (self._gamma + 1)
+        buckets = [(-value(k), c) for k, c in sorted(self.negative.items(), reverse=True)]
+        buckets.append((0.0, self.zero))
+        buckets += [(value(k), c) for k, c in sorted(self.positive.items())]
+
+        seen = 0
+        for estimate, count in buckets:
+            seen += count
+            if seen > rank:
+                return min(max(estimate, self.min), self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            'n': self.n, 'mean': self.mean, 'm2': self.m2,
+            'min': self.min if self.n else None, 'max': self.max if self.n else None,
+            'positive': self.positive, 'negative': self.negative, 'zero': self.zero,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        acc = cls()
+        acc.n, acc.mean, acc.m2, acc.zero = data['n'], data['mean'], data['m2'], data['zero']
+        acc.min = data['min'] if data['min'] is not None else math.inf
+        acc.max = data['max'] if data['max'] is not None else -math.inf
+        acc.positive = {int(k): v for k, v in data['positive'].items()}
+        acc.negative = {int(k): v for k, v in data['negative'].items()}
+        return acc
+
+class RunSummary:
+    """
+    Resumen en línea de una corrida (o de un grupo de corridas): paquetes,
+    CRC válidos/inválidos, suma de overflows y un Accumulator por cada columna
+    numérica del CSV. Se alimenta fila a fila desde write_row mientras se parsea.
+
+    Parámetros:
+      columns - Columnas numéricas del CSV, en el orden en que llegan a add()
+    """
+    def __init__(self, columns: list):
+        self.columns = list(columns)
+        self.paquetes = 0
+        self.crc_ok = 0
+        self.crc_err = 0
+        self.overflow_sum = 0
+        self.metricas = {col: Accumulator() for col in self.columns}
+        self._accumulators = [self.metricas[col] for col in self.columns]
+        self._crc = self.columns.index('crc_error') if 'crc_error' in self.columns else None
+        self._overflow = self.columns.index('previous_overflow_sum') if 'previous_overflow_sum' in self.columns else None
+        # Si hay contadores de CRC y de overflows, aunque su columna no se
+        # resuma (p. ej. un crc_error bool, ver resumir_chunks)
+        self.con_crc = self._crc is not None
+        self.con_overflow = self._overflow is not None
+
+    def add(self, mensaje: str, values: list):
+        """
+        Añade una fila: el mensaje (vacío si no hubo) y los valores, como texto
+        del CSV, de las columnas numéricas. Los valores vacíos se ignoran.
+        """
+        if mensaje:
+            self.paquetes += 1
+        for acc, value in zip(self._accumulators, values):
+            if value == '':
+                continue
+            x = float(value)
+            if x == x:
+                acc.add(x)
+        if self._crc is not None:
+            if values[self._crc] == '1':
+                self.crc_err += 1
+            else:
+                self.crc_ok += 1
+        if self._overflow is not None:
+            self.overflow_sum += int(values[self._overflow])
+
+    def merge(self, other: 'RunSummary'):
+        for col in other.columns:
+            if col not in self.metricas:
+                self.columns.append(col)
+                self.metricas[col] = Accumulator()
+            self.metricas[col].merge(other.metricas[col])
+        self.paquetes += other.paquetes
+        self.crc_ok += other.crc_ok
+        self.crc_err += other.crc_err
+        self.overflow_sum += other.overflow_sum
+        self.con_crc |= other.con_crc
+        self.con_overflow |= other.con_overflow
+        return self
+
+    def packet_stats(self):
+        """
+        Las mismas claves que stats_paquetes (src.data_analyses), sin pandas.
+        """
+        stats = {'paquetes_totales': self.paquetes}
+        if self.con_crc:
+            stats['paquetes_ok'] = self.crc_ok
+            stats['paquetes_err'] = self.crc_err
+            stats['crc_errors'] = self.crc_err
+        if self.con_overflow:
+            stats['overflow_sum'] = self.overflow_sum
+        if stats['paquetes_totales'] and stats.get('paquetes_ok') is not None:
+            stats['porcentaje_rx_ok'] = 100 * stats['paquetes_ok'] / stats['paquetes_totales']
+        return stats
+
+    def to_dict(self):
+        return {
+            'paquetes': self.paquetes,
+            'crc_ok': self.crc_ok if self.con_crc else None,
+            'crc_err': self.crc_err if self.con_crc else None,
+            'overflow_sum': self.overflow_sum if self.con_overflow else None,
+            'metricas': {col: self.metricas[col].to_dict() for col in self.columns},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        summary = cls(list(data['metricas']))
+        summary.paquetes = data['paquetes']
+        summary.crc_ok = data['crc_ok'] or 0
+        summary.crc_err = data['crc_err'] or 0
+        summary.overflow_sum = data['overflow_sum'] or 0
+        summary.con_crc = data['crc_ok'] is not None
+        summary.con_overflow = data['overflow_sum'] is not None
+        summary.metricas = {col: Accumulator.from_dict(acc) for col, acc in data['metricas'].items()}
+        summary._accumulators = [summary.metricas[col] for col in summary.columns]
+        return summary
+
+    def save(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path: str):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+def summary_path(csv_path: str):
+    """
+    Ruta del resumen que acompaña a un CSV de salida.
+    """
+    return os.path.splitext(re.sub(COMPRESSED_SUFFIX, '', csv_path, flags=re.IGNORECASE))[0] + SUMMARY_SUFFIX
+
+def merge_summaries(paths: list):
+    """
+    Combina los resúmenes de varias corridas en uno solo (None si no hay ninguno).
+    """
+    summary = None
+    for path in paths:
+        if not os.path.isfile(path):
+            continue
+        run = RunSummary.load(path)
+        summary = run if summary is None else summary.merge(run)
+    return summary
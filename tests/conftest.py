@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Los scripts (preprocess.py, ...) y el paquete src/ se importan desde la raíz del repositorio
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
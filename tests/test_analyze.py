@@ -0,0 +1,68 @@
+import os
+import sys
+import json
+import shutil
+import subprocess
+import pytest
+import analyze
+import preprocess
+from preprocess_common import process_files
+from src.data_analyses import describir_metricas, stats_paquetes
+from conftest import ROOT
+
+CORRIDAS = ['120m-2MSPs-7sf-125khz-1', '1m-2MSPs-7sf-125khz-1', '30m-2MSPs-7sf-125khz-1']
+
+@pytest.fixture
+def salida(tmp_path):
+    # CSV, resúmenes, parquet y merge de tres corridas de la prueba 4
+    (tmp_path / 'txt').mkdir()
+    for nombre in CORRIDAS:
+        shutil.copy(os.path.join(ROOT, 'data', 'prueba_4', '26-06-2025_txt', f'{nombre}.txt'), tmp_path / 'txt')
+    process_files(preprocess.DIALECT, str(tmp_path / 'txt'), str(tmp_path / 'csv'), merge=True, slow_down=0, separator=',', fmt='parquet', summary=True)
+    return str(tmp_path / 'csv')
+
+def ejecutar(monkeypatch, capsys, *argumentos):
+    monkeypatch.setattr(sys, 'argv', ['analyze.py', '--format', 'json', *argumentos])
+    analyze.main()
+    return json.loads(capsys.readouterr().out)
+
+def test_find_runs(salida):
+    runs = analyze.find_runs([salida, os.path.join(salida, 'merge', '2MSPs-30m.csv')])
+    # Una corrida por nombre aunque esté en CSV y parquet
+    assert runs == [(salida + os.sep, nombre) for nombre in CORRIDAS] + [(os.path.join(salida, 'merge') + os.sep, '2MSPs-30m')]
+    with pytest.raises(FileNotFoundError):
+        analyze.find_runs([os.path.join(salida, 'no_existe')])
+
+@pytest.mark.parametrize('nombre, distancia, msps', [
+    ('30m-2MSPs-7sf-125khz-1', 30.0, 2),
+    ('8M-21m', 21.0, 8),
+    ('2MSPs-120m', 120.0, 2),
+    ('120m-4msps', 120.0, 4),
+])
+def test_run_metadata(nombre, distancia, msps):
+    # Nombres de corrida y de merge/ ({freq}-{distance} o {distance}-{msps})
+    meta = analyze.run_metadata(nombre)
+    assert (meta['distancia'], meta['msps']) == (distancia, msps)
+
+def test_stats_y_describe(salida, monkeypatch, capsys):
+    # Con resúmenes, stats responde desde los .summary.json; sin ellos, con
+    # stats_paquetes sobre los CSV
+    filas = ejecutar(monkeypatch, capsys, 'stats', salida)
+    tabla = ejecutar(monkeypatch, capsys, 'stats', '--no-summary', salida)['data']
+    assert [fila['prueba'] for fila in filas] == [fila['prueba'] for fila in tabla] == CORRIDAS
+    for fila, esperada in zip(filas, tabla):
+        assert {k: fila[k] for k in esperada} == pytest.approx(esperada)
+    esperada = stats_paquetes(analyze.load_runs([(salida + os.sep, CORRIDAS[1])])).iloc[0]
+    assert {k: tabla[1][k] for k in esperada.index} == pytest.approx(esperada.to_dict())
+
+    tabla = ejecutar(monkeypatch, capsys, 'describe', '--no-summary', os.path.join(salida, f'{CORRIDAS[1]}.csv'))['data']
+    esperada = describir_metricas(analyze.load_runs([(salida + os.sep, CORRIDAS[1])]))
+    assert [fila['index'] for fila in tabla] == esperada.index.tolist()
+    assert [fila['sto'] for fila in tabla] == pytest.approx(esperada['sto'].tolist())
+
+def test_stats_con_resumenes_no_importa_pandas(salida):
+    codigo = ("import sys, analyze; sys.argv = ['analyze.py', '--format', 'csv', 'stats', sys.argv[1]]; "
+              "analyze.main(); assert 'pandas' not in sys.modules, 'pandas importado'")
+    resultado = subprocess.run([sys.executable, '-c', codigo, salida], cwd=ROOT, capture_output=True, text=True)
+    assert resultado.returncode == 0, resultado.stderr
+    assert resultado.stdout.splitlines()[0].startswith('prueba,')
@@ -0,0 +1,52 @@
+import os
+import shutil
+import pandas as pd
+import pytest
+from src import catalog
+from src.data_processes import load_csv
+from conftest import ROOT
+
+def test_parse_name():
+    assert catalog.parse_name('8M-21m-2.csv') == {'distancia': 21.0, 'msps': 8, 'sf': None, 'bw_khz': None, 'version': 2, 'dialecto': 'gnuradio'}
+    assert catalog.parse_name('120m-4MSPs-12sf-500khz-1.csv.gz') == {'distancia': 120.0, 'msps': 4, 'sf': 12, 'bw_khz': 500, 'version': 1, 'dialecto': 'gnuradio'}
+    assert catalog.parse_name('40m8msps.parquet') == {'distancia': 40.0, 'msps': 8, 'sf': None, 'bw_khz': None, 'version': None, 'dialecto': 'neisser'}
+    assert catalog.parse_name('8M-21m-2.txt') is None
+
+@pytest.fixture
+def arbol(tmp_path):
+    # Dos carpetas de la prueba 2 (una de cada dialecto), con un merge/ que
+    # no se indexa y una corrida también en otro formato que cuenta una vez
+    for carpeta, nombres in (('03-04-2025_csv', ['4M-1m-1', '4M-40m-1', '8M-1m-1']), ('Neisser_03-04-2025_csv', ['1m4msps', '1m8msps'])):
+        destino = tmp_path / 'prueba_2' / carpeta
+        os.makedirs(destino / 'merge')
+        for nombre in nombres:
+            shutil.copy(os.path.join(ROOT, 'data', 'prueba_2', carpeta, f'{nombre}.csv'), destino)
+        shutil.copy(destino / f'{nombres[0]}.csv', destino / 'merge' / f'{nombres[0]}.csv')
+    (tmp_path / 'prueba_2' / '03-04-2025_csv' / '4M-1m-1.feather').write_bytes(b'')
+    return str(tmp_path)
+
+def test_scan_y_query(arbol):
+    index = catalog.scan(arbol)
+    assert len(index) == 5
+    assert index['test'].unique().tolist() == [2]
+    assert index['fecha'].unique().tolist() == ['03-04-2025']
+    assert index.groupby('dialecto').size().to_dict() == {'gnuradio': 3, 'neisser': 2}
+
+    assert catalog.query(arbol, msps=4, dialect='gnuradio')['nombre'].tolist() == ['4M-1m-1', '4M-40m-1']
+    assert catalog.query(arbol, distance=[1.0], date='03-04-2025')['nombre'].tolist() == ['4M-1m-1', '8M-1m-1', '1m4msps', '1m8msps']
+    with pytest.raises(ValueError):
+        catalog.query(arbol, potencia=1)
+
+    # El índice persistido se reutiliza hasta que se pide refresh
+    os.remove(os.path.join(arbol, 'prueba_2', 'Neisser_03-04-2025_csv', '1m8msps.csv'))
+    assert len(catalog.query(arbol)) == 5
+    assert len(catalog.query(arbol, refresh=True)) == 4
+
+def test_load(arbol):
+    df = catalog.load(arbol, msps=4, dialect='gnuradio')
+    directorio = os.path.join(arbol, 'prueba_2', '03-04-2025_csv') + os.sep
+    esperado = pd.concat([load_csv(directorio, nombre, muestras=4) for nombre in ('4M-1m-1', '4M-40m-1')], ignore_index=True)
+    pd.testing.assert_frame_equal(df[esperado.columns], esperado)
+    assert df.groupby('prueba')['distancia'].first().to_dict() == {'4M-1m-1': 1.0, '4M-40m-1': 40.0}
+    assert (df['test'] == 2).all() and (df['msps'] == 4).all()
+    assert catalog.load(arbol, msps=16).empty
@@ -0,0 +1,66 @@
+import os
+import shutil
+import numpy as np
+import pandas as pd
+import pytest
+import preprocess
+from preprocess_common import process_files
+from src.data_analyses import ajustar_modelos_propagacion, describir_metricas, stats_paquetes, welch_anova_vectorizado
+from src.data_processes import iter_csv, load_csv
+from conftest import ROOT
+
+def test_welch_anova_calculado_a_mano():
+    # Grupos [1..5], [2, 4, ..., 12] y [10, 11, 13]:
+    #   n = 5, 6, 3; medias 3, 7, 34/3; varianzas 5/2, 14, 7/3
+    #   w = n/var = 2, 3/7, 9/7 (suma 26/7); media ponderada 165/26
+    #   numerador = sum(w (media - 165/26)^2) / 2 = 9929/364
+    #   lambda = 3 sum((1 - w / (26/7))^2 / (n - 1)) / 8 = 8589/54080
+    #   F = numerador / (1 + 2 lambda / 3) = 5163080/209321, gl = (2, 54080/8589)
+    grupos = [np.arange(1.0, 6.0), np.arange(2.0, 13.0, 2.0), np.array([10.0, 11.0, 13.0])]
+    n = [[len(g)] * 2 for g in grupos]
+    media = [[g.mean(), 2 * g.mean() + 1] for g in grupos]
+    varianza = [[g.var(ddof=1), 4 * g.var(ddof=1)] for g in grupos]
+
+    # La segunda métrica (2x + 1) tiene el mismo F: el test no depende de la escala
+    F, p = welch_anova_vectorizado(n, media, varianza)
+    assert F == pytest.approx([5163080 / 209321] * 2, rel=1e-12)
+    assert p == pytest.approx([0.00104992921] * 2, rel=1e-8)
+
+@pytest.mark.filterwarnings('error')
+def test_propagacion_grupo_sin_recta_sin_avisos():
+    # sf 7: tres distancias; sf 9: una sola (sin recta, ni en el bootstrap);
+    # sf 12: dos filas, muchos remuestreos repiten la misma distancia
+    df = pd.DataFrame({
+        'sf': [7] * 6 + [9] * 3 + [12] * 2,
+        'distancia': [1, 1, 10, 10, 40, 40, 5, 5, 5, 2, 20],
+        'rssi (dBm)': [-40, -41, -60, -61, -70, -71, -50, -51, -52, -45, -65],
+    })
+    r = ajustar_modelos_propagacion(df, por='sf', n_bootstrap=200).set_index('sf')
+
+    b, a = np.polyfit(np.log10(df['distancia'][:6]), df['rssi (dBm)'][:6], 1)
+    assert r.loc[7, 'intercepto'] == pytest.approx(a)
+    assert r.loc[7, 'n'] == pytest.approx(-b / 10)
+    assert r.loc[7, 'n_inf'] <= r.loc[7, 'n'] <= r.loc[7, 'n_sup']
+    assert r.loc[9, ['intercepto', 'n', 'intercepto_inf', 'intercepto_sup', 'n_inf', 'n_sup']].isna().all()
+    assert r.loc[12, 'n_inf'] == pytest.approx(r.loc[12, 'n_sup']) == pytest.approx(r.loc[12, 'n'])
+
+def test_describir_metricas_por_bloques_mismas_columnas(tmp_path):
+    (tmp_path / 'txt').mkdir()
+    nombre = '1m-2MSPs-7sf-125khz-1'
+    shutil.copy(os.path.join(ROOT, 'data', 'prueba_4', '26-06-2025_txt', f'{nombre}.txt'), tmp_path / 'txt')
+    process_files(preprocess.DIALECT, str(tmp_path / 'txt'), str(tmp_path / 'csv'), merge=False, slow_down=0, separator=',', fmt='parquet')
+    directorio = f"{tmp_path / 'csv'}/"
+
+    for columnar in (False, True):
+        completo = describir_metricas(load_csv(directorio, nombre, 2, columnar=columnar))
+        bloques = describir_metricas(iter_csv(directorio, nombre, 2, chunksize=30, columnar=columnar))
+        assert bloques.columns.tolist() == completo.columns.tolist()
+        assert bloques.loc['mean'].to_numpy() == pytest.approx(completo.loc['mean'].to_numpy(), nan_ok=True, rel=1e-5)
+
+    # Una columna bool (p. ej. crc_error leído de parquet) no se resume,
+    # igual que en DataFrame.describe(), pero sigue contando los CRC
+    df = load_csv(directorio, nombre, 2).assign(crc_error=lambda d: d['crc_error'].astype(bool))
+    bloques = [df.iloc[i:i + 30] for i in range(0, len(df), 30)]
+    assert describir_metricas(iter(bloques)).columns.tolist() == describir_metricas(df).columns.tolist()
+    assert 'crc_error' not in describir_metricas(df).columns
+    assert stats_paquetes(iter(bloques)).iloc[0]['paquetes_err'] == stats_paquetes(df).iloc[0]['paquetes_err']
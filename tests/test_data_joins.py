@@ -0,0 +1,45 @@
+import pandas as pd
+from src.data_joins import cruzar_receptores
+
+def corrida(numeros, **claves):
+    df = pd.DataFrame({'numero': numeros, 'valor': range(len(numeros))})
+    for col, valor in {'test': 2, 'distancia': 1.0, 'msps': 4, **claves}.items():
+        df[col] = valor
+    return df
+
+def test_reinicio_visto_por_un_solo_receptor():
+    # Neisser perdió los paquetes 3 y 4 previos al reinicio: sólo GNU Radio lo
+    # ve, y aun así los registros posteriores deben emparejarse
+    gnuradio = corrida([3, 4, 0, 1, 2, 5, 6])
+    neisser = corrida([0, 1, 2, 5, 6])
+    unido, resumen = cruzar_receptores(gnuradio, neisser)
+
+    assert resumen['emparejados'].iloc[0] == 5
+    assert resumen['solo_neisser'].iloc[0] == 0
+    assert resumen['reinicios_gnuradio'].iloc[0] == 1
+    assert resumen['reinicios_neisser'].iloc[0] == 0
+    assert bool(resumen['reinicios_distintos'].iloc[0])
+    ambos = unido[unido['origen'] == 'ambos']
+    assert ambos['numero'].tolist() == [0, 1, 2, 5, 6]
+    assert ambos['valor_neisser'].tolist() == [0, 1, 2, 3, 4]
+
+def test_reinicios_iguales_conservan_tramos():
+    gnuradio = corrida([1, 2, 3, 0, 1, 2])
+    neisser = corrida([1, 3, 0, 2])
+    unido, resumen = cruzar_receptores(gnuradio, neisser)
+
+    assert resumen['emparejados'].iloc[0] == 4
+    assert not resumen['reinicios_distintos'].iloc[0]
+    ambos = unido[unido['origen'] == 'ambos']
+    assert ambos[['tramo', 'numero']].values.tolist() == [[0, 1], [0, 3], [1, 0], [1, 2]]
+
+def test_version_en_la_clave_si_ambos_la_tienen():
+    gnuradio = pd.concat([corrida([0, 1], version=1), corrida([0, 1], version=2)], ignore_index=True)
+    neisser = pd.concat([corrida([0, 1], version=1), corrida([0, 1], version=2)], ignore_index=True)
+    unido, resumen = cruzar_receptores(gnuradio, neisser)
+    assert 'version' in resumen.index.names
+    assert resumen['emparejados'].tolist() == [2, 2]
+
+    # Sin versión en Neisser, la clave no la incluye
+    unido, resumen = cruzar_receptores(gnuradio, corrida([0, 1], version=None))
+    assert 'version' not in resumen.index.names
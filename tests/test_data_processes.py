@@ -0,0 +1,134 @@
+import os
+import pytest
+import numpy as np
+import pandas as pd
+import preprocess_neisser
+from preprocess_common import process_files
+from src import data_processes
+from src.data_processes import concat_runs, limpiar_datos, load_csv
+
+# Log Neisser cuyo CSV tiene campos vacíos: un DATA antes del primer mensaje
+# (sin numero ni size) y un paquete sin "Packet Size"
+NEISSER_LOG = (
+    "RSSI: -40 dBm, SNR: 9.5 dB\n"
+    "Packet Size: 12 bytes\nReceived string: hola:7\nRSSI: -41 dBm, SNR: 9 dB\n"
+    "Received string: x:8\nRSSI: -42 dBm, SNR: 8 dB\n"
+)
+
+def test_iter_csv_campos_vacios(tmp_path):
+    (tmp_path / 'in').mkdir()
+    (tmp_path / 'in' / '1m4msps.txt').write_text(NEISSER_LOG)
+    process_files(preprocess_neisser.DIALECT, str(tmp_path / 'in'), str(tmp_path / 'out'), merge=False, slow_down=0, separator=',')
+
+    df = concat_runs([(f"{tmp_path / 'out'}/", '1m4msps', 4)])
+    assert df['numero'].isna().tolist() == [True, False, False]
+    assert df['numero'].dropna().tolist() == [7, 8]
+    assert df['size (bytes)'].dropna().tolist() == [12]
+
+@pytest.fixture
+def corrida_cacheable(tmp_path, monkeypatch):
+    # Corrida mínima y caché de disco en tmp_path; cuenta las lecturas del CSV
+    monkeypatch.setattr(data_processes, 'CACHE_DIR', str(tmp_path / 'cache'))
+    data_processes.clear_cache(disk=False)
+    lecturas = []
+    read_run = data_processes._read_run
+    monkeypatch.setattr(data_processes, '_read_run', lambda path: lecturas.append(path) or read_run(path))
+    (tmp_path / 'run.csv').write_text('mensaje,numero,sto\na:1,1,2.5\nb:2,2,3.5\n')
+    yield f"{tmp_path}/", lecturas
+    data_processes.clear_cache(disk=False)
+
+def test_load_csv_sin_cache_por_defecto(corrida_cacheable):
+    directorio, lecturas = corrida_cacheable
+    load_csv(directorio, 'run', muestras=4)
+    load_csv(directorio, 'run', muestras=4)
+    assert len(lecturas) == 2
+    assert not os.path.exists(data_processes.CACHE_DIR)
+
+def test_load_csv_cache_memoria_y_disco(corrida_cacheable):
+    directorio, lecturas = corrida_cacheable
+    primera = load_csv(directorio, 'run', muestras=4, cache=True)
+    assert len(lecturas) == 1 and os.listdir(data_processes.CACHE_DIR)
+
+    # Acierto en memoria; modificar la copia devuelta no altera la caché
+    primera['sto'] = 0
+    segunda = load_csv(directorio, 'run', muestras=4, cache=True)
+    assert len(lecturas) == 1
+    assert segunda['sto'].tolist() == [2.5, 3.5]
+
+    # Acierto en disco tras vaciar la memoria
+    data_processes.clear_cache(disk=False)
+    tercera = load_csv(directorio, 'run', muestras=4, cache=True)
+    assert len(lecturas) == 1
+    pd.testing.assert_frame_equal(tercera, segunda)
+
+def test_load_csv_cache_invalidada_por_contenido(corrida_cacheable):
+    directorio, lecturas = corrida_cacheable
+    load_csv(directorio, 'run', muestras=4, cache=True)
+    with open(os.path.join(directorio, 'run.csv'), 'a') as f:
+        f.write('c:3,3,4.5\n')
+    df = load_csv(directorio, 'run', muestras=4, cache=True)
+    assert len(lecturas) == 2
+    assert df['numero'].tolist() == [1, 2, 3]
+
+def test_clear_cache(corrida_cacheable):
+    directorio, lecturas = corrida_cacheable
+    load_csv(directorio, 'run', muestras=4, cache=True)
+    data_processes.clear_cache()
+    assert not os.path.exists(data_processes.CACHE_DIR)
+    load_csv(directorio, 'run', muestras=4, cache=True)
+    assert len(lecturas) == 2
+
+def limpiar_por_corrida(df, columnas, iqr_multiplier=1.5, modo='sequential'):
+    # Bucle original de limpiar_datos: cada columna sobre las filas que
+    # sobreviven a las anteriores ('joint': límites sobre los datos iniciales)
+    df_limpio = df.dropna(subset=columnas)
+    iniciales = df_limpio
+    for col in columnas:
+        datos = df_limpio if modo == 'sequential' else iniciales
+        Q1 = datos[col].quantile(0.25)
+        Q3 = datos[col].quantile(0.75)
+        IQR = Q3 - Q1
+        df_limpio = df_limpio[(df_limpio[col] >= Q1 - iqr_multiplier * IQR) & (df_limpio[col] <= Q3 + iqr_multiplier * IQR)]
+    return df_limpio
+
+@pytest.fixture
+def campania():
+    # Corridas con outliers, una de una sola fila y otra con una métrica sin datos
+    rng = np.random.default_rng(7)
+    partes = []
+    for prueba, n in (('1m', 200), ('40m', 150), ('80m', 1), ('120m', 40)):
+        partes.append(pd.DataFrame({
+            'prueba': prueba,
+            'distancia': float(prueba[:-1]),
+            'sto': rng.standard_t(2, n),
+            'snr': rng.normal(10, 2, n),
+            'rssi (dBm)': rng.normal(-50, 5, n),
+        }))
+    df = pd.concat(partes, ignore_index=True)
+    df.loc[df['prueba'] == '120m', 'snr'] = np.nan
+    df.loc[[3, 17, 250], 'rssi (dBm)'] = [-150.0, 40.0, np.nan]
+    # Filas con STO fuera de rango y RSSI alto: en modo 'sequential' se
+    # eliminan antes de calcular los límites del RSSI, así los modos difieren
+    df.loc[20:49, ['sto', 'rssi (dBm)']] = [50.0, -30.0]
+    df.loc[[60, 61], 'rssi (dBm)'] = -36.0
+    return df
+
+@pytest.mark.parametrize('modo', ['sequential', 'joint'])
+def test_limpiar_datos_igual_que_bucle_por_corrida(campania, modo):
+    columnas = ['sto', 'snr', 'rssi (dBm)']
+
+    # Campaña completa como una sola corrida
+    esperado = limpiar_por_corrida(campania, columnas, modo=modo)
+    pd.testing.assert_frame_equal(limpiar_datos(campania, columnas, modo=modo), esperado)
+
+    # by=: igual que limpiar cada corrida por separado y concatenar
+    esperado = pd.concat([limpiar_por_corrida(corrida, columnas, modo=modo) for _, corrida in campania.groupby('prueba', sort=False)]).sort_index()
+    resultado = limpiar_datos(campania, columnas, modo=modo, by='prueba')
+    pd.testing.assert_frame_equal(resultado, esperado)
+    assert (resultado['prueba'] == '80m').sum() == 1
+    assert not (resultado['prueba'] == '120m').any()
+    otro = 'joint' if modo == 'sequential' else 'sequential'
+    assert not resultado.index.equals(limpiar_datos(campania, columnas, modo=otro, by='prueba').index)
+
+    # Sin columnas explícitas se excluyen las de by
+    pd.testing.assert_frame_equal(limpiar_datos(campania.drop(columns='distancia'), modo=modo, by='prueba'), esperado.drop(columns='distancia'))
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.data_sequences import analizar_secuencias, histograma_huecos, per_por
+
+def corrida(prueba, numeros, crc_error=None, **factores):
+    df = pd.DataFrame({'prueba': prueba, 'numero': numeros})
+    df['crc_error'] = crc_error if crc_error is not None else 0
+    for col, valor in factores.items():
+        df[col] = valor
+    return df
+
+def test_secuencia_con_reinicios():
+    # Tramos [3, 4, 6] y [0, 1, 1, 2, 5] (reinicio del contador), un -1
+    # ilegible y un CRC inválido que no cuenta en la secuencia
+    df = corrida('a', [3, 4, 6, 0, 1, 1, -1, 2, 9, 5], crc_error=[0, 0, 0, 0, 0, 0, 0, 0, 1, 0])
+    r = analizar_secuencias(df).loc['a']
+    assert r['recibidos'] == 10
+    assert r['invalidos'] == 1
+    assert r['crc_err'] == 1
+    assert r['validos'] == 8
+    assert r['duplicados'] == 1
+    assert r['reinicios'] == 1
+    assert r['esperados'] == 4 + 6
+    assert r['perdidos'] == 1 + 2
+    assert r['perdidos'] == r['esperados'] - r['unicos']
+    assert r['rafagas'] == 2 and r['rafaga_max'] == 2
+
+    # Con el valor inicial del contador también falta [0, 1, 2] del primer tramo
+    r = analizar_secuencias(df, inicio=0).loc['a']
+    assert r['perdidos'] == 3 + 3
+    assert r['perdidos'] == r['esperados'] - r['unicos']
+
+@pytest.mark.filterwarnings('error')
+@pytest.mark.parametrize('inicio', [None, 0])
+@pytest.mark.parametrize('solo_crc_ok', [True, False])
+def test_perdidos_igual_a_esperados_menos_unicos(solo_crc_ok, inicio):
+    # Corridas aleatorias con pérdidas, duplicados, reinicios, CRC inválidos y
+    # números ilegibles; también una corrida vacía de válidos y una de una fila
+    rng = np.random.default_rng(3)
+    partes = [corrida('ilegible', [-1, -1]), corrida('una', [7])]
+    for i in range(20):
+        numeros = []
+        for _ in range(rng.integers(1, 4)):
+            tramo = np.cumsum(rng.choice([0, 1, 1, 1, 2, 5], size=rng.integers(1, 60))) + rng.integers(0, 10)
+            numeros.extend(tramo.tolist())
+        numeros = np.array(numeros)
+        numeros[rng.random(len(numeros)) < 0.05] = -1
+        partes.append(corrida(f'c{i}', numeros, crc_error=(rng.random(len(numeros)) < 0.1).astype(int), distancia=float(i % 3)))
+    df = pd.concat(partes, ignore_index=True)
+
+    r = analizar_secuencias(df, solo_crc_ok=solo_crc_ok, inicio=inicio)
+    assert (r['perdidos'] == r['esperados'] - r['unicos']).all()
+    assert r['reinicios'].sum() > 0 and r['duplicados'].sum() > 0
+    assert r.loc['ilegible', 'esperados'] == 0 and r.loc['ilegible', 'invalidos'] == 2
+    assert np.isnan(r.loc['ilegible', 'tasa_perdida'])
+
+    huecos = histograma_huecos(df, solo_crc_ok=solo_crc_ok, inicio=inicio)
+    assert (huecos['longitud'] * huecos['rafagas']).sum() == r['perdidos'].sum()
+
+    per = per_por(df.dropna(subset=['distancia']), solo_crc_ok=solo_crc_ok, inicio=inicio)
+    assert (per['perdidos'] == per['esperados'] - per['unicos']).all()
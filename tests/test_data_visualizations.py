@@ -0,0 +1,32 @@
+import os
+import json
+import pandas as pd
+import matplotlib
+from src.data_visualizations import FINGERPRINT_FILE, render_batch
+
+def corridas(desplazamiento=0.0):
+    return pd.DataFrame({
+        'prueba': ['1m'] * 4 + ['40m'] * 4,
+        'snr': [9.0, 9.5, 8.5, 9.2, 4.0, 4.5, 3.5, 4.2],
+        'rssi (dBm)': [-40.0 + desplazamiento, -41.0, -40.5, -39.5, -60.0, -61.0, -59.5, -60.5],
+    })
+
+def test_render_batch_omite_y_vuelve_a_renderizar(tmp_path):
+    carpeta = str(tmp_path)
+    box = (corridas(), 'metricas', carpeta, {'metricas': ['snr', 'rssi (dBm)'], 'tipo': 'box'})
+    hist = (corridas(), 'metricas', carpeta, {'metricas': ['snr', 'rssi (dBm)'], 'tipo': 'hist'})
+
+    assert render_batch([box, hist], workers=1) == ['renderizado', 'renderizado']
+    assert matplotlib.get_backend().lower() == 'agg'
+    assert sorted(os.listdir(carpeta)) == sorted([FINGERPRINT_FILE, 'box_snr.png', 'box_rssi (dBm).png', 'hist_snr.png', 'hist_rssi (dBm).png'])
+    with open(os.path.join(carpeta, FINGERPRINT_FILE), encoding='utf-8') as f:
+        assert len(json.load(f)) == 2
+
+    # Mismo tipo con otros parámetros en la misma carpeta: no se pisan
+    assert render_batch([box, hist], workers=1) == ['omitido', 'omitido']
+
+    # Cambian los datos de uno, o falta uno de sus archivos
+    assert render_batch([(corridas(1.0), *box[1:]), hist], workers=1) == ['renderizado', 'omitido']
+    os.remove(os.path.join(carpeta, 'hist_snr.png'))
+    assert render_batch([box, hist], workers=1) == ['renderizado', 'renderizado']
+    assert render_batch([box, hist], workers=1) == ['omitido', 'omitido']
@@ -0,0 +1,67 @@
+import io
+import os
+import glob
+import random
+import pytest
+import preprocess
+from conftest import ROOT
+
+# Trozos de línea con los que se arman logs aleatorios, incluidos los casos
+# raros: mensajes vacíos o sin contador, marcadores sin número y varias
+# coincidencias en la misma línea
+PIECES = [
+    "rx msg: ", "rx msg:   ", "rx msg: hola:12", "rx msg: x", "rx msg: a:b:7", "  rx msg: pad:3  ", "rx msg: \tz:5",
+    "CRC valid!", "CRC invalid!", "12 overflows", " overflows", "O 3 overflows",
+    "[1frame_sync_impl.cc] 4My STO: 1e-5",
+    "[frame_sync_impl.cc] 5 CFO estimate: -0.1, STO estimate: 3.5, snr est: 9, k_hat: 3, k_hat2: 4, espacios: 5, CFO_INT2: 600, STO estimate 2: -7",
+    "", "\t", "--------Header--------", "rx msg: x:1 CRC valid", "7 overflows rx msg: y:2",
+]
+
+def run_engine(path, engine, stats=None):
+    out = io.StringIO()
+    binary = engine in preprocess.BINARY_ENGINES
+    with open(path, 'rb' if binary else 'r', **({} if binary else {'encoding': 'utf-8', 'errors': 'replace'})) as infile:
+        preprocess.pre_process(infile, out, None, ',', None, None, None, engine, stats=stats)
+    return out.getvalue()
+
+def assert_same_output(path):
+    outputs = {engine: run_engine(path, engine) for engine in preprocess.ENGINES}
+    for engine, output in outputs.items():
+        assert output == outputs['regex'], f"{engine} difiere de regex en {path}"
+
+@pytest.mark.parametrize('seed', range(300))
+def test_engines_fuzzed_logs(tmp_path, seed):
+    rng = random.Random(seed)
+    newline = rng.choice(['\n', '\r\n'])
+    text = newline.join(rng.choice(PIECES) for _ in range(rng.randrange(1, 15))) + rng.choice(['', newline])
+    path = tmp_path / 'log.txt'
+    path.write_bytes(text.encode())
+    assert_same_output(path)
+
+def test_engines_empty_message(tmp_path):
+    path = tmp_path / 'log.txt'
+    path.write_text("rx msg:   \nCRC invalid!\nrx msg: a:1\nCRC valid!\n")
+    assert_same_output(path)
+    lines = run_engine(path, 'mmap').splitlines()
+    # El "rx msg:" vacío no es un mensaje: la primera fila queda sin él
+    assert lines[1].startswith('"",')
+    assert lines[2].startswith('"a:1",1,')
+
+@pytest.mark.parametrize('path', sorted(glob.glob(os.path.join(ROOT, 'data', 'prueba_*', '*_txt', '*.txt')))[:6])
+def test_engines_real_logs(path):
+    assert_same_output(path)
+
+@pytest.mark.parametrize('seed', range(50))
+def test_engines_line_counts(tmp_path, seed):
+    # Las líneas, vacías y bytes leídos se cuentan durante el parseo; todos
+    # los motores deben dar lo mismo que una lectura en modo texto
+    rng = random.Random(seed)
+    text = ''.join(rng.choice(PIECES) + rng.choice(['\n', '\r\n', '\r']) for _ in range(rng.randrange(0, 15)))
+    path = tmp_path / 'log.txt'
+    path.write_bytes(text.encode())
+    lines = list(io.StringIO(text, newline=None))
+    expected = (len(lines), sum(1 for line in lines if not line.strip()), len(text.encode()))
+    for engine in preprocess.ENGINES:
+        stats = {}
+        run_engine(path, engine, stats)
+        assert (stats['lines'], stats['blank_lines'], stats['bytes_read']) == expected, engine
@@ -0,0 +1,107 @@
+import os
+import pytest
+import preprocess
+from preprocess_common import process_files
+from conftest import ROOT
+from test_parallel_incremental import leer_salida
+
+ENTRADA = os.path.join(ROOT, 'data', 'prueba_1', 'base_txt')
+GRUPO = ['8M-21m-1.txt', '8M-21m-2.txt']
+
+class Detenido(Exception):
+    pass
+
+class Guion:
+    # Sustituye a FolderWatcher: en cada espera ejecuta el siguiente paso
+    # (escribir en los logs) y, al acabarse los pasos, detiene el seguimiento
+    # como si se matara el proceso
+    def __init__(self, pasos):
+        self.pasos = list(pasos)
+
+    def __call__(self, folder, poll_interval):
+        return self
+
+    def wait(self):
+        if not self.pasos:
+            raise Detenido
+        self.pasos.pop(0)()
+
+    def close(self):
+        pass
+
+def seguir(monkeypatch, entrada, salida, pasos):
+    monkeypatch.setattr(preprocess, 'FolderWatcher', Guion(pasos))
+    with pytest.raises(Detenido):
+        preprocess.follow_files(entrada, salida, merge=True, separator=',', poll_interval=0)
+
+def por_lotes(tmp_path, logs):
+    # Salida del modo por lotes para el contenido final de los logs
+    (tmp_path / 'final').mkdir(parents=True)
+    for nombre, contenido in logs.items():
+        (tmp_path / 'final' / nombre).write_bytes(contenido)
+    process_files(preprocess.DIALECT, str(tmp_path / 'final'), str(tmp_path / 'lotes'), merge=True, slow_down=0, separator=',')
+    return filas(leer_salida(str(tmp_path / 'lotes')))
+
+def filas(salida):
+    # En --follow el merge guarda las filas en el orden en que llegan, no por
+    # versión: se comparan como conjunto (con repeticiones) de líneas
+    return {nombre: sorted(contenido.splitlines()) if nombre.startswith('merge') else contenido
+            for nombre, contenido in salida.items()}
+
+def escribir(path, contenido, modo='ab'):
+    def paso():
+        with open(path, modo) as f:
+            f.write(contenido)
+    return paso
+
+def leer_logs():
+    logs = {}
+    for nombre in GRUPO:
+        with open(os.path.join(ENTRADA, nombre), 'rb') as f:
+            logs[nombre] = f.read()
+    return logs
+
+def test_follow_reanudar_tras_matar(tmp_path, monkeypatch):
+    # Los logs crecen en trozos que cortan líneas por la mitad y el seguidor se
+    # mata varias veces: al reanudar no se duplica ni se pierde ninguna fila
+    logs = leer_logs()
+    entrada = tmp_path / 'in'
+    entrada.mkdir()
+    for nombre in GRUPO:
+        (entrada / nombre).write_bytes(b'')
+    salida = str(tmp_path / 'out')
+
+    trozos = [escribir(entrada / nombre, contenido[i:i + 997])
+              for i in range(0, max(map(len, logs.values())), 997)
+              for nombre, contenido in logs.items() if i < len(contenido)]
+    for inicio in range(0, len(trozos), 7):
+        seguir(monkeypatch, str(entrada), salida, trozos[inicio:inicio + 7])
+        # Fila a medio escribir después del último checkpoint
+        for nombre in (GRUPO[0].replace('.txt', '.csv'), 'merge/8M-21m.csv'):
+            with open(os.path.join(salida, nombre), 'a') as f:
+                f.write('"basura:1",1,')
+    seguir(monkeypatch, str(entrada), salida, [])
+
+    assert filas(leer_salida(salida)) == por_lotes(tmp_path, logs)
+
+def test_follow_log_truncado_o_reemplazado(tmp_path, monkeypatch):
+    logs = leer_logs()
+    entrada = tmp_path / 'in'
+    entrada.mkdir()
+    for nombre, contenido in logs.items():
+        (entrada / nombre).write_bytes(contenido)
+    salida = str(tmp_path / 'out')
+    primero, segundo = GRUPO
+    mitad = logs[primero][:len(logs[primero]) // 2]
+    mitad = mitad[:mitad.rindex(b'\n') + 1]
+
+    # Truncado en el sitio (mismo inodo, más corto)
+    seguir(monkeypatch, str(entrada), salida, [escribir(entrada / primero, mitad, 'wb')])
+    assert filas(leer_salida(salida)) == por_lotes(tmp_path / 'truncado', {primero: mitad, segundo: logs[segundo]})
+
+    # Reemplazado por otro archivo más grande mientras el seguidor no corre:
+    # se detecta por el inodo al reanudar
+    (entrada / 'nuevo').write_bytes(logs[segundo] + logs[primero])
+    os.replace(entrada / 'nuevo', entrada / primero)
+    seguir(monkeypatch, str(entrada), salida, [])
+    assert filas(leer_salida(salida)) == por_lotes(tmp_path / 'reemplazado', {primero: logs[segundo] + logs[primero], segundo: logs[segundo]})
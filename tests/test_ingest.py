@@ -0,0 +1,40 @@
+import os
+import shutil
+import preprocess
+import preprocess_neisser
+from ingest import detect_dialect, ingest, mirror_path
+from preprocess_common import process_files
+from conftest import ROOT
+from test_parallel_incremental import leer_salida
+
+def test_detect_dialect():
+    assert detect_dialect('8M-21m-1.txt') == ('gnuradio', ('8M', '21m', '1'))
+    assert detect_dialect('120m-2MSPs-7sf-125khz-1.txt.gz')[0] == 'gnuradio'
+    assert detect_dialect('120m4msps.txt')[0] == 'neisser'
+    assert detect_dialect('120m4msps.csv') is None
+    assert detect_dialect('notas.txt') is None
+
+def test_mirror_path():
+    assert mirror_path('data', 'output/ingest', 'data') == 'output/ingest'
+    assert mirror_path('data', 'output/ingest', os.path.join('data', 'prueba_2', '03-04-2025_txt')) == os.path.join('output/ingest', 'prueba_2', '03-04-2025_csv')
+    assert mirror_path('data', 'out', os.path.join('data', 'prueba_1', 'base_TXT')) == os.path.join('out', 'prueba_1', 'base_csv')
+
+def test_ingest_igual_que_cada_dialecto(tmp_path):
+    # Un árbol con una carpeta de cada dialecto y, dentro de la entrada, una
+    # carpeta *_csv previa que no se debe recorrer
+    carpetas = {
+        os.path.join('prueba_1', 'base_txt'): preprocess.DIALECT,
+        os.path.join('prueba_2', 'Neisser_03-04-2025_txt'): preprocess_neisser.DIALECT,
+    }
+    for carpeta in carpetas:
+        shutil.copytree(os.path.join(ROOT, 'data', carpeta), tmp_path / 'data' / carpeta)
+    shutil.copytree(os.path.join(ROOT, 'data', 'prueba_1', 'base_txt'), tmp_path / 'data' / 'prueba_1' / 'viejo_csv')
+
+    archivos = ingest(str(tmp_path / 'data'), str(tmp_path / 'out'), merge=True, workers=2)
+    assert len(archivos) == sum(len(os.listdir(tmp_path / 'data' / carpeta)) for carpeta in carpetas)
+
+    for carpeta, dialect in carpetas.items():
+        referencia = str(tmp_path / 'ref' / carpeta)
+        process_files(dialect, str(tmp_path / 'data' / carpeta), referencia, merge=True, slow_down=0, separator=',', options={'engine': 'regex'} if dialect is preprocess.DIALECT else None)
+        assert leer_salida(mirror_path(str(tmp_path / 'data'), str(tmp_path / 'out'), str(tmp_path / 'data' / carpeta))) == leer_salida(referencia)
+    assert not os.path.exists(tmp_path / 'out' / 'prueba_1' / 'viejo_csv')
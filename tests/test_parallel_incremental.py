@@ -0,0 +1,69 @@
+import os
+import glob
+import shutil
+import pytest
+import preprocess
+import preprocess_neisser
+from preprocess_common import open_file, process_files
+from conftest import ROOT
+
+# Logs reales de cada dialecto (los de GNU Radio, con dos versiones por grupo de merge)
+CASOS = [
+    (preprocess.DIALECT, os.path.join(ROOT, 'data', 'prueba_1', 'base_txt'), {'engine': 'dispatch'}),
+    (preprocess_neisser.DIALECT, os.path.join(ROOT, 'data', 'prueba_2', 'Neisser_03-04-2025_txt'), None),
+]
+
+def leer_salida(folder):
+    # Contenido descomprimido de cada CSV de salida (incluidos los merge)
+    salida = {}
+    for path in glob.glob(os.path.join(folder, '**', '*.csv*'), recursive=True):
+        nombre = os.path.relpath(path, folder)
+        with open_file(path) as f:
+            salida[nombre.removesuffix('.gz')] = f.read()
+    return salida
+
+@pytest.mark.parametrize('dialect, entrada, options', CASOS, ids=[d.name for d, *_ in CASOS])
+def test_paralelo_e_incremental_igual_que_secuencial(tmp_path, dialect, entrada, options):
+    shutil.copytree(entrada, tmp_path / 'in')
+    entrada = str(tmp_path / 'in')
+
+    def procesar(nombre, **kwargs):
+        salida = str(tmp_path / nombre)
+        process_files(dialect, entrada, salida, merge=True, slow_down=0, separator=',', options=options, **kwargs)
+        return leer_salida(salida)
+
+    secuencial = procesar('secuencial')
+    assert any(nombre.startswith('merge') for nombre in secuencial)
+
+    assert procesar('paralelo', workers=2) == secuencial
+    assert procesar('comprimido', workers=2, compress='gz') == secuencial
+    assert procesar('incremental', incremental=True) == secuencial
+
+    # Segunda pasada incremental tras modificar una entrada: se reprocesa sólo
+    # ésa y los merge deben seguir iguales a una pasada secuencial completa
+    modificado = sorted(os.listdir(entrada))[0]
+    with open(os.path.join(entrada, modificado), 'rb') as f:
+        lineas = f.readlines()
+    with open(os.path.join(entrada, modificado), 'wb') as f:
+        f.writelines(lineas[:len(lineas) // 2])
+    assert procesar('incremental', incremental=True, workers=2) == procesar('secuencial_2')
+
+def test_incremental_entrada_eliminada(tmp_path):
+    # Al desaparecer una entrada se eliminan su CSV, su resumen y su versión
+    # columnar, y su grupo de merge se reconstruye (o se elimina si queda vacío)
+    pytest.importorskip('pyarrow')
+    shutil.copytree(os.path.join(ROOT, 'data', 'prueba_1', 'base_txt'), tmp_path / 'in')
+    entrada = str(tmp_path / 'in')
+
+    def procesar(nombre, **kwargs):
+        salida = str(tmp_path / nombre)
+        process_files(preprocess.DIALECT, entrada, salida, merge=True, slow_down=0, separator=',', fmt='parquet', summary=True, **kwargs)
+        # glob no lista el manifiesto (.manifest.json)
+        archivos = {os.path.relpath(path, salida) for path in glob.glob(os.path.join(salida, '**', '*'), recursive=True)}
+        return archivos, leer_salida(salida)
+
+    procesar('incremental', incremental=True)
+    for eliminado in ('8M-50m-2.txt', '8M-50m-1.txt'):
+        os.remove(os.path.join(entrada, eliminado))
+        shutil.rmtree(tmp_path / 'secuencial', ignore_errors=True)
+        assert procesar('incremental', incremental=True) == procesar('secuencial')
@@ -0,0 +1,89 @@
+import os
+import json
+import pytest
+import pipeline
+from pipeline import Stage, build_dag, load_config, load_result, run_dag
+from conftest import ROOT
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, 'CACHE_DIR', str(tmp_path / 'cache'))
+    return tmp_path
+
+def configuracion(tmp_path, **cambios):
+    # Prueba 1 leyendo sus CSV versionados (sin etapa parse)
+    config = {'nombre': 'prueba_1', 'csv': os.path.join(ROOT, 'data', 'prueba_1', 'preprocessed_csv'),
+              'salida': str(tmp_path / 'salida'), 'grupos': ['msps'], 'metricas': ['sto', 'cfo', 'snr'], **cambios}
+    path = tmp_path / 'config.json'
+    path.write_text(json.dumps(config))
+    return load_config(str(path))
+
+def test_stage_key_cambia_con_la_configuracion_de_arriba(cache, capsys):
+    base = run_dag(build_dag(configuracion(cache)), dry_run=True)
+    assert 'parse' not in base and 'load:8M-21m-1' in base
+
+    # Cambiar la limpieza cambia clean y lo que depende de ella, no lo anterior
+    otra = run_dag(build_dag(configuracion(cache, limpieza={'iqr_multiplier': 3})), dry_run=True)
+    cambiadas = {nombre for nombre in base if base[nombre] != otra[nombre]}
+    assert cambiadas == {'clean:msps=8', 'compare:msps=8', 'plot:box:msps=8'}
+
+    # Cambiar las métricas no toca las etapas por corrida
+    otra = run_dag(build_dag(configuracion(cache, metricas=['snr'])), dry_run=True)
+    cambiadas = {nombre for nombre in base if base[nombre] != otra[nombre]}
+    assert cambiadas == {'clean:msps=8', 'compare:msps=8', 'plot:box:msps=8'}
+
+    # La clave de una etapa incluye la de sus deps
+    dag = build_dag(configuracion(cache))
+    keys = dict(base, **{'load:8M-21m-1': 'otra'})
+    assert pipeline.stage_key(dag['enrich:8M-21m-1'], keys) != base['enrich:8M-21m-1']
+    assert pipeline.stage_key(dag['enrich:8M-21m-1'], base) == base['enrich:8M-21m-1']
+
+def test_run_dag_omite_etapas_en_cache(cache, monkeypatch, capsys):
+    llamadas = []
+
+    def etapa_suma(params, deps):
+        llamadas.append(params['nombre'])
+        return params['valor'] + sum(deps)
+
+    def etapa_archivo(params, deps):
+        llamadas.append(params['nombre'])
+        with open(params['archivo'], 'w') as f:
+            f.write(str(deps[0]))
+        return {'archivos': [params['archivo']]}
+
+    monkeypatch.setattr(pipeline, 'etapa_suma', etapa_suma, raising=False)
+    monkeypatch.setattr(pipeline, 'etapa_archivo', etapa_archivo, raising=False)
+    archivo = str(cache / 'total.txt')
+
+    def dag(valor_b=2):
+        return {
+            'a': Stage('a', 'etapa_suma', {'nombre': 'a', 'valor': 1}),
+            'b': Stage('b', 'etapa_suma', {'nombre': 'b', 'valor': valor_b}),
+            'c': Stage('c', 'etapa_suma', {'nombre': 'c', 'valor': 0}, deps=['a', 'b']),
+            'd': Stage('d', 'etapa_archivo', {'nombre': 'd', 'archivo': archivo}, deps=['c']),
+        }
+
+    keys = run_dag(dag())
+    assert sorted(llamadas) == ['a', 'b', 'c', 'd']
+    assert load_result(keys['c']) == 3
+
+    llamadas.clear()
+    capsys.readouterr()
+    run_dag(dag())
+    assert llamadas == []
+    assert all(linea.startswith('cache') for linea in capsys.readouterr().out.splitlines())
+
+    # Sólo se recalcula lo que depende del parámetro cambiado
+    keys = run_dag(dag(valor_b=5))
+    assert sorted(llamadas) == ['b', 'c', 'd']
+    assert load_result(keys['c']) == 6
+
+    # Un resultado cuyos archivos ya no existen no se da por bueno
+    llamadas.clear()
+    os.remove(archivo)
+    run_dag(dag(valor_b=5))
+    assert llamadas == ['d'] and os.path.isfile(archivo)
+
+    llamadas.clear()
+    run_dag(dag(valor_b=5), force=True)
+    assert sorted(llamadas) == ['a', 'b', 'c', 'd']
@@ -0,0 +1,53 @@
+import io
+import csv
+import pytest
+import preprocess
+import preprocess_neisser
+from preprocess_common import RowSink, RunSummary, header_line
+
+SEPARATORS = [',', ';', '\t', ' ', '.', '-', '|']
+
+# Mensajes con separadores, comillas y espacios dentro
+MENSAJES = ['hola:1', 'a,b;c:2', '"citado":3', 'x""y', 'con espacio:4', 'tab\tulado:5', '', '.-|:6', '"']
+
+@pytest.mark.parametrize('separator', SEPARATORS)
+def test_rowsink_roundtrip_csv_reader(separator):
+    out = io.StringIO()
+    sink = RowSink([out], separator, batch_rows=3)
+    filas = [(mensaje, [str(i), '-1.5e-3', '', '0.25']) for i, mensaje in enumerate(MENSAJES)]
+    for mensaje, values in filas:
+        sink.write(mensaje, values)
+    sink.flush()
+
+    leidas = list(csv.reader(io.StringIO(out.getvalue()), delimiter=separator))
+    assert leidas == [[mensaje, *values] for mensaje, values in filas]
+
+@pytest.mark.parametrize('separator', SEPARATORS)
+def test_header_line_csv_reader(separator):
+    columnas = ['mensaje', 'numero', 'rssi (dBm)', 'snr (dB)', 'size (bytes)']
+    assert next(csv.reader(io.StringIO(header_line(columnas, separator)), delimiter=separator)) == columnas
+
+def test_rowsink_summary_usa_valores_sin_citar():
+    summary = RunSummary(['numero', 'sto'])
+    sink = RowSink([io.StringIO()], '.', summary)
+    sink.write('a:1', ['1', '2.5'])
+    sink.write('b:2', ['2', '3.5'])
+    sink.flush()
+    assert summary.paquetes == 2
+    assert summary.metricas['sto'].mean == 3.0
+
+@pytest.mark.parametrize('separator', SEPARATORS)
+def test_dialectos_csv_reader(tmp_path, separator):
+    # La salida con cualquier separador tiene los mismos campos que con ','
+    gnuradio = ('rx msg: "hola", mundo:7\n'
+                '[frame_sync_impl.cc] 1 CFO estimate: -0.1, STO estimate: 3.5, snr est: 9, k_hat: 3, k_hat2: 4, espacios: 5, CFO_INT2: 600, STO estimate 2: -7\n'
+                'CRC valid!\n')
+    neisser = 'Packet Size: 12 bytes\nReceived string: a "b", c:8\nRSSI: -41.5 dBm, SNR: 9 dB\n'
+    for modulo, texto in ((preprocess, gnuradio), (preprocess_neisser, neisser)):
+        salidas = {}
+        for sep in (',', separator):
+            out = io.StringIO()
+            modulo.pre_process(io.StringIO(texto), out, None, sep, None, None, None)
+            salidas[sep] = list(csv.reader(io.StringIO(out.getvalue()), delimiter=sep))
+        assert salidas[separator] == salidas[',']
+        assert salidas[','][1][0] in ('"hola", mundo:7', 'a "b", c:8')